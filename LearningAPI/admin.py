@@ -187,6 +187,7 @@ class FoundationsLearnerProfileAdmin(admin.ModelAdmin):
 @admin.register(FoundationsExercise)
 class FoundationsExerciseAdmin(admin.ModelAdmin):
     list_display = ('learner_name', 'slug', 'attempts', 'complete', 'used_solution', 'completed_code')
+    list_select_related = ('solution',)
     ordering = ('-pk',)
     search_fields = ["learner_name"]
     search_help_text = "Search by learner name"
@@ -5,4 +5,4 @@ class LearningAPIConfig(AppConfig):
 
     def ready(self):
         # Import the signals module to ensure signal handlers are connected
-        pass
+        from . import signals  # pylint: disable=import-outside-toplevel,unused-import
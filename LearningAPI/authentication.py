@@ -0,0 +1,164 @@
+"""Token authentication that skips the database on the hot path"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import valkey
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("authentication")
+
+# User columns kept in the cache. Anything else is loaded on first access
+# through Django's deferred field machinery.
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email',
+               'is_staff', 'is_active', 'is_superuser')
+
+# Seconds an entry lives in each worker's memory. Invalidation only clears
+# Valkey and the current worker, so this bounds how long another worker can
+# keep honouring a deleted token.
+LOCAL_TTL = 5
+LOCAL_MAX_ENTRIES = 4096
+
+# Seconds an entry lives in Valkey, shared by every worker
+SHARED_TTL = 300
+
+
+def token_cache_key(key):
+    """Valkey key for a token. The raw token never leaves the database."""
+    return f'auth_token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+class LocalTokenCache:
+    """Thread-safe LRU of token payloads with a fixed time to live"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, payload)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+local_cache = LocalTokenCache(LOCAL_MAX_ENTRIES, LOCAL_TTL)
+
+
+def invalidate_token(key):
+    """Forget a cached token so the next request re-reads it from the database"""
+    cache_key = token_cache_key(key)
+    local_cache.delete(cache_key)
+
+    try:
+        valkey_client.delete(cache_key)
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("token_cache_invalidate_failed", error=str(ex))
+
+
+def invalidate_user_tokens(user_ids):
+    """Forget the cached tokens of every given user"""
+    for key in Token.objects.filter(user_id__in=list(user_ids)).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication backed by a two level cache
+
+    A token resolves to the user's core columns and group names from the
+    worker's own LRU, then Valkey, and only then Postgres. The signal
+    handlers in LearningAPI.signals invalidate entries on logout, token
+    deletion, user changes and group membership changes.
+
+    `request.auth` is an unsaved Token instance carrying the key and user,
+    so `request.auth.user` works as before without another query.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        payload = local_cache.get(cache_key)
+
+        if payload is None:
+            payload = self.shared_payload(cache_key)
+
+            if payload is None:
+                payload = self.database_payload(key)
+                self.store_shared_payload(cache_key, payload)
+
+            local_cache.set(cache_key, payload)
+
+        if not payload['user']['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        # from_db expects values in the model's field order
+        field_names = [field.attname for field in User._meta.concrete_fields
+                       if field.attname in USER_FIELDS]
+        user = User.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [payload['user'][field] for field in field_names]
+        )
+        user.group_names = frozenset(payload['groups'])
+
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        token._state.db = DEFAULT_DB_ALIAS
+
+        return (user, token)
+
+    def database_payload(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist as ex:
+            raise exceptions.AuthenticationFailed(_('Invalid token.')) from ex
+
+        return {
+            'user': {field: getattr(token.user, field) for field in USER_FIELDS},
+            'groups': list(token.user.groups.values_list('name', flat=True)),
+        }
+
+    def shared_payload(self, cache_key):
+        try:
+            cached = valkey_client.get(cache_key)
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("token_cache_read_failed", error=str(ex))
+            return None
+
+        return json.loads(cached) if cached else None
+
+    def store_shared_payload(self, cache_key, payload):
+        try:
+            valkey_client.set(cache_key, json.dumps(payload), ex=SHARED_TTL)
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("token_cache_write_failed", error=str(ex))
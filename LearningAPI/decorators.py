@@ -2,10 +2,12 @@
 from rest_framework.response import Response
 from rest_framework import status
 
+from LearningAPI.identity import get_identity
+
 def is_instructor():
     def decorator(func):
         def __wrapper(request, *args, **kwargs):
-            if request.user.groups.filter(name='Instructors').exists():
+            if get_identity(request).is_instructor:
                 return func(request, *args, **kwargs)
             else:
                 return Response(
@@ -18,7 +20,7 @@ def is_instructor():
 def is_staff():
     def decorator(func):
         def __wrapper(request, *args, **kwargs):
-            if request.user.groups.filter(name='Staff').exists():
+            if get_identity(request).is_staff:
                 return func(request, *args, **kwargs)
             else:
                 return Response(
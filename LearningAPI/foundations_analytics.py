@@ -0,0 +1,72 @@
+"""Keep the Foundations exercise analytics current
+
+The progress endpoints call `mark_stale()` with the slugs they wrote. The
+`refresh_foundations_analytics` management command rebuilds only those
+exercises' rows on each pass. While Valkey cannot be reached the passes
+are skipped, since the marks are being dropped, and the first pass after
+it is back rebuilds every exercise once so no change is missed.
+"""
+import valkey
+
+from LearningAPI.models.coursework import FoundationsExercise, FoundationsExerciseStats
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("foundations_analytics")
+
+STALE_KEY = 'foundations:stale_slugs'
+
+# Most slugs taken off the stale set in one pass
+REFRESH_BATCH = 500
+
+# Set when a pass found Valkey unreachable
+_marks_missed = False
+
+
+def mark_stale(slugs):
+    """Queue exercises for the next analytics refresh"""
+    slugs = set(slugs)
+    if not slugs:
+        return
+
+    try:
+        valkey_client.sadd(STALE_KEY, *slugs)
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("foundations_analytics_mark_failed", slug_count=len(slugs), error=str(ex))
+
+
+def mark_learner_stale(learner_github_id):
+    """Queue every exercise a learner has attempted, after their cohort changes"""
+    mark_stale(FoundationsExercise.objects
+               .filter(learner_github_id=learner_github_id)
+               .values_list('slug', flat=True))
+
+
+def refresh_stale():
+    """Rebuild the rows of exercises changed since the last pass
+
+    Returns:
+        int: Number of analytics rows written
+    """
+    global _marks_missed  # pylint: disable=global-statement
+
+    try:
+        slugs = {slug.decode() for slug in valkey_client.spop(STALE_KEY, REFRESH_BATCH)}
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("foundations_analytics_stale_unavailable", error=str(ex))
+        _marks_missed = True
+        return 0
+
+    rebuild_all, _marks_missed = _marks_missed, False
+    if not slugs and not rebuild_all:
+        return 0
+
+    if rebuild_all:
+        logger.info("foundations_analytics_rebuilding_after_outage")
+
+    try:
+        return FoundationsExerciseStats.refresh_for_slugs(None if rebuild_all else slugs)
+    except Exception:
+        # Put them back so the next pass tries again
+        _marks_missed = rebuild_all
+        mark_stale(slugs)
+        raise
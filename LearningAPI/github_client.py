@@ -0,0 +1,490 @@
+"""GitHub REST client that shares one rate limit budget across every worker"""
+import hashlib
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import valkey
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from urllib3.util.retry import Retry
+
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("github_client")
+
+PUBLIC_API_URL = 'https://api.github.com'
+BUDGET_KEY = 'github:rate_limit'
+ETAG_KEY_PREFIX = 'github:etag:'
+ETAG_STATS_KEY = 'github:etag_stats'
+
+# GitHub asks for at least a minute's pause after a secondary rate limit
+# that comes without Retry-After
+SECONDARY_LIMIT_WAIT = 60
+
+
+class GithubRateLimited(APIException):
+    """GitHub asked us to back off. Raised instead of sleeping inside a request.
+
+    DRF turns `wait` into a Retry-After header on the 503 response.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'GitHub rate limit reached. Try again later.'
+    default_code = 'github_rate_limited'
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        self.wait = wait
+
+
+class RateLimitBudget:
+    """The remaining GitHub quota as last reported by any worker
+
+    State lives in a Valkey hash so every gunicorn worker throttles
+    together. A copy is kept in process so a worker that was just told to
+    back off honours it even while Valkey is unreachable.
+    """
+    lock = threading.Lock()
+    local = {}
+
+    def __init__(self, reserve):
+        self.reserve = reserve
+
+    def shared_state(self):
+        try:
+            raw = valkey_client.hgetall(BUDGET_KEY)
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("github_budget_unavailable", error=str(ex))
+            return {}
+
+        return {key.decode(): float(value) for key, value in raw.items()}
+
+    def state(self):
+        with self.lock:
+            local = dict(self.local)
+        shared = self.shared_state()
+
+        state = {
+            'blocked_until': max(local.get('blocked_until', 0), shared.get('blocked_until', 0))
+        }
+
+        # Quota figures are only comparable within the same reset window, so
+        # take them together from whichever copy saw the latest window
+        window = shared if shared.get('reset', 0) >= local.get('reset', 0) else local
+        for key in ('remaining', 'reset'):
+            if key in window:
+                state[key] = window[key]
+
+        return state
+
+    def wait_seconds(self):
+        """Seconds until a request may be sent, or 0 when it may go now"""
+        now = time.time()
+        state = self.state()
+
+        blocked_until = state.get('blocked_until', 0)
+        if blocked_until > now:
+            return math.ceil(blocked_until - now)
+
+        reset = state.get('reset', 0)
+        if state.get('remaining', self.reserve + 1) <= self.reserve and reset > now:
+            return math.ceil(reset - now)
+
+        return 0
+
+    def spend(self):
+        """Reserve one request against the shared budget before sending it"""
+        try:
+            if valkey_client.hexists(BUDGET_KEY, 'remaining'):
+                valkey_client.hincrby(BUDGET_KEY, 'remaining', -1)
+        except valkey.exceptions.ValkeyError:
+            pass
+
+    @staticmethod
+    def is_secondary_limit(response):
+        """Whether a 403 or 429 is a secondary rate limit rather than a refused request
+
+        GitHub does not always send Retry-After with one, but always says so
+        in the error message. A 429 is never a permission error.
+        """
+        if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            return True
+
+        try:
+            message = str(response.json().get('message', ''))
+        except (ValueError, AttributeError):
+            return False
+
+        return 'secondary rate limit' in message.lower() or 'abuse detection' in message.lower()
+
+    def record(self, response):
+        """Update the budget from GitHub's rate limit headers
+
+        Returns:
+            int: Seconds GitHub asked us to wait, or 0
+        """
+        now = time.time()
+        headers = response.headers
+        update = {}
+
+        if 'X-RateLimit-Remaining' in headers:
+            update['remaining'] = int(headers['X-RateLimit-Remaining'])
+        if 'X-RateLimit-Reset' in headers:
+            update['reset'] = int(headers['X-RateLimit-Reset'])
+
+        wait = 0
+        if response.status_code in (status.HTTP_403_FORBIDDEN, status.HTTP_429_TOO_MANY_REQUESTS):
+            if 'Retry-After' in headers:
+                # Secondary rate limit
+                wait = int(headers['Retry-After'])
+            elif update.get('remaining') == 0:
+                wait = max(update.get('reset', now) - now, 1)
+            elif self.is_secondary_limit(response):
+                wait = SECONDARY_LIMIT_WAIT
+
+            if wait:
+                update['blocked_until'] = now + wait
+
+        if not update:
+            return 0
+
+        with self.lock:
+            self.local.update(update)
+
+        try:
+            pipeline = valkey_client.pipeline()
+            pipeline.hset(BUDGET_KEY, mapping=update)
+            pipeline.expireat(BUDGET_KEY, int(max(update.get('reset', 0), now + wait, now + 3600)))
+            pipeline.execute()
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("github_budget_unavailable", error=str(ex))
+
+        return math.ceil(wait)
+
+
+class ConditionalCache:
+    """The last ETag and body GitHub sent for each GET URL
+
+    Entries are keyed by token as well as URL because GitHub answers
+    differently depending on who is asking. Hits, misses and stale
+    answers are counted in a shared hash, see `etag_cache_stats()`.
+    """
+
+    def __init__(self, token, ttl):
+        self.token = token
+        self.ttl = ttl
+
+    def key(self, url):
+        return f'{ETAG_KEY_PREFIX}{hashlib.sha256(f"{self.token}:{url}".encode()).hexdigest()}'
+
+    def get(self, url):
+        try:
+            entry = valkey_client.hgetall(self.key(url))
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("github_etag_cache_unavailable", error=str(ex))
+            return None
+
+        if b'etag' not in entry:
+            return None
+
+        return {
+            'etag': entry[b'etag'].decode(),
+            'status': int(entry[b'status']),
+            'body': entry[b'body'],
+        }
+
+    def store(self, url, response):
+        try:
+            pipeline = valkey_client.pipeline()
+            pipeline.hset(self.key(url), mapping={
+                'etag': response.headers['ETag'],
+                'status': response.status_code,
+                'body': response.content,
+            })
+            pipeline.expire(self.key(url), self.ttl)
+            pipeline.execute()
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("github_etag_cache_unavailable", error=str(ex))
+
+    def count(self, event):
+        try:
+            valkey_client.hincrby(ETAG_STATS_KEY, event, 1)
+        except valkey.exceptions.ValkeyError:
+            pass
+
+    def response(self, url, entry, response=None):
+        """A response carrying the cached body
+
+        The 304 itself is reused when there is one, so its rate limit and
+        ETag headers stay visible to the caller.
+        """
+        if response is None:
+            response = requests.Response()
+            response.url = url
+            response.headers['ETag'] = entry['etag']
+
+        response.status_code = entry['status']
+        response._content = entry['body']  # pylint: disable=protected-access
+        response.from_cache = True
+
+        return response
+
+
+def etag_cache_stats():
+    """Counts of conditional GETs answered from cache (hit), by GitHub (miss),
+    or from cache while rate limited (stale)"""
+    stats = {'hit': 0, 'miss': 0, 'stale': 0}
+
+    try:
+        stats.update({key.decode(): int(value) for key, value in valkey_client.hgetall(ETAG_STATS_KEY).items()})
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("github_etag_cache_unavailable", error=str(ex))
+
+    return stats
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def github_session():
+    """Process-wide pooled session. Only connection failures are retried."""
+    global _session  # pylint: disable=global-statement
+
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+
+    return _session
+
+
+class CallOutcome:
+    """What happened to one request sent by `GithubClient.batch()`"""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    @property
+    def status_code(self):
+        return self.response.status_code if self.response is not None else None
+
+    def __repr__(self) -> str:
+        return f'<CallOutcome {self.status_code or repr(self.error)}>'
+
+
+class GithubClient:
+    """Thin GitHub REST client
+
+    Before each call the shared budget is checked, and GithubRateLimited
+    is raised at once if GitHub has asked every worker to wait. Callers
+    can let DRF answer 503 with Retry-After, or queue the work for later.
+
+    GET requests are conditional. A 304 costs no primary rate limit and
+    is answered with the body cached from the last 200.
+    """
+
+    def __init__(self, base_url=None, token=None):
+        self.base_url = (base_url or settings.GITHUB_CONFIG['API_URL']).rstrip('/')
+        self.budget = RateLimitBudget(settings.GITHUB_CONFIG['RESERVE'])
+        self.etags = ConditionalCache(token or settings.GITHUB_CONFIG["TOKEN"], settings.GITHUB_CONFIG['ETAG_TTL'])
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "nss/ticket-migrator",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "Authorization": f'Bearer {token or settings.GITHUB_CONFIG["TOKEN"]}'
+        }
+
+    def url(self, url):
+        """Absolute URL on the configured API host for a path or public API URL"""
+        if url.startswith(PUBLIC_API_URL):
+            url = url[len(PUBLIC_API_URL):]
+
+        if url.startswith('http'):
+            return url
+
+        return f'{self.base_url}/{url.lstrip("/")}'
+
+    def request(self, method, url, data=None, headers=None):
+        wait = self.budget.wait_seconds()
+        if wait:
+            raise GithubRateLimited(wait)
+
+        self.budget.spend()
+        response = github_session().request(
+            method,
+            self.url(url),
+            data=json.dumps(data) if data is not None else None,
+            headers={**self.headers, **headers} if headers else self.headers,
+            timeout=10
+        )
+
+        wait = self.budget.record(response)
+        if wait:
+            logger.warning("github_rate_limited", method=method, url=url, wait=wait)
+            raise GithubRateLimited(wait)
+
+        return response
+
+    def student_permissions_call(self, student_org_name: str, repo_name: str, student, permission: str = "write") -> tuple:
+        """The (method, url, data) of `assign_student_permissions`, for use with `batch`"""
+
+        # Construct request body for assigning permissions to the student
+        request_body = { "permission":permission }
+
+        return ('PUT', f'/repos/{student_org_name}/{repo_name}/collaborators/{student.github_handle}', request_body)
+
+    def get(self, url):
+        full_url = self.url(url)
+        cached = self.etags.get(full_url)
+
+        try:
+            response = self.request('GET', url, headers={'If-None-Match': cached['etag']} if cached else None)
+        except GithubRateLimited:
+            if cached is None:
+                raise
+            self.etags.count('stale')
+            return self.etags.response(full_url, cached)
+
+        if response.status_code == status.HTTP_304_NOT_MODIFIED and cached:
+            self.etags.count('hit')
+            return self.etags.response(full_url, cached, response)
+
+        self.etags.count('miss')
+        if response.status_code == status.HTTP_200_OK and 'ETag' in response.headers:
+            self.etags.store(full_url, response)
+
+        return response
+
+    def put(self, url, data):
+        return self.request('PUT', url, data)
+
+    def post(self, url, data):
+        return self.request('POST', url, data)
+
+    def delete(self, url):
+        return self.request('DELETE', url)
+
+    def get_all(self, url):
+        """Every item of a paginated list endpoint, following the Link header
+
+        Raises:
+            GithubRateLimited: Before all pages were read
+            requests.HTTPError: GitHub answered a page with an error
+        """
+        separator = '&' if '?' in url else '?'
+        url = f'{url}{separator}per_page=100'
+        items = []
+
+        while url:
+            response = self.get(url)
+            response.raise_for_status()
+            items.extend(response.json())
+            url = response.links.get('next', {}).get('url')
+
+        return items
+
+    def organization_member_logins(self, org_name):
+        """Logins of the organization's active members. Pending invitations are not included."""
+        return [member['login'] for member in self.get_all(f'/orgs/{org_name}/members')]
+
+    def batch(self, calls, max_workers=None):
+        """Send independent requests concurrently
+
+        Each request still goes through the shared budget, so once GitHub
+        asks us to wait, the calls that have not started yet come back
+        with a GithubRateLimited error instead of being sent.
+
+        Args:
+            calls (iterable): (key, (method, url, data)) pairs
+            max_workers (int): Requests in flight at once. Defaults to GITHUB_CONFIG['CONCURRENCY']
+
+        Returns:
+            dict: key -> CallOutcome, in the order the calls were given
+        """
+        calls = list(calls)
+        if not calls:
+            return {}
+
+        max_workers = min(max_workers or settings.GITHUB_CONFIG['CONCURRENCY'], len(calls))
+
+        def send(call):
+            try:
+                return CallOutcome(response=self.request(*call))
+            except (GithubRateLimited, requests.RequestException) as ex:
+                return CallOutcome(error=ex)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github') as executor:
+            futures = [(key, executor.submit(send, call)) for key, call in calls]
+
+        return {key: future.result() for key, future in futures}
+
+    def create_repository(self, source_url: str, student_org_url: str, repo_name: str, project_name: str) -> requests.Response:
+        """Create a repository for a student team
+
+        Args:
+            source_url (str): The URL of the source repository
+            student_org_url (str): The URL of the student organization
+            repo_name (str): The name of the repository
+            project_name (str): The name of the project
+
+        Returns:
+            requests.Response: The response from the GitHub API
+        """
+
+        return self.request(*self.create_repository_call(source_url, student_org_url, repo_name, project_name))
+
+    def create_repository_call(self, source_url: str, student_org_url: str, repo_name: str, project_name: str) -> tuple:
+        """The (method, url, data) of `create_repository`, for use with `batch`"""
+
+        # Split the full URL on '/' and get the last two items
+        ( org, repo, ) = source_url.split('/')[-2:]
+
+        student_org_name = student_org_url.split("/")[-1]
+
+        # Construct request body for creating the repository
+        request_body = {
+            "owner": student_org_name,
+            "name": repo_name,
+            "description": f"This is your client-side repository for the {project_name} sprint(s).",
+            "include_all_branches": False,
+            "private": False
+        }
+
+        return ('POST', f'/repos/{org}/{repo}/generate', request_body)
+
+    def assign_student_permissions(self, student_org_name: str, repo_name: str, student, permission: str = "write") -> requests.Response:
+        """Assign write permissions to a student for a repository
+
+        Args:
+            student_org_name (str): The name of the student organization
+            repo_name (str): The name of the repository
+            student (NSSUser): The student to assign permissions to
+
+        Returns:
+            requests.Response: The response from the GitHub API
+        """
+
+        # Assign the student write permissions to the repository
+        response = self.request(*self.student_permissions_call(student_org_name, repo_name, student, permission))
+
+        if response.status_code != 204:
+            logger.error(
+                "collaborator_not_added",
+                student=student.full_name,
+                repository=f'{student_org_name}/{repo_name}',
+                status=response.status_code
+            )
+
+        return response
@@ -0,0 +1,86 @@
+"""Per-request cache of who the caller is"""
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
+
+from LearningAPI.models.coursework import CohortCourse
+from LearningAPI.models.people import NssUser, NssUserCohort
+
+
+def cohort_assignments_prefetch():
+    """Prefetch of a user's cohort assignments with everything `NssUser.current_cohort` reads
+
+    Assignments are ordered by id, so `assigned_cohorts.first()` is also
+    answered from the prefetch cache.
+    """
+    return Prefetch(
+        'assigned_cohorts',
+        queryset=NssUserCohort.objects
+            .select_related('cohort__info')
+            .prefetch_related(
+                Prefetch('cohort__courses', queryset=CohortCourse.objects.select_related('course'))
+            )
+            .order_by('id')
+    )
+
+
+class Identity:
+    """The authenticated caller's NssUser, groups and cohort, each resolved at most once"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def nss_user(self):
+        """The caller's NssUser with cohort assignments prefetched
+
+        Raises:
+            NssUser.DoesNotExist: The user has not finished GitHub onboarding
+        """
+        nss_user = NssUser.objects \
+            .prefetch_related(cohort_assignments_prefetch()) \
+            .get(user=self.user)
+        nss_user.user = self.user
+
+        return nss_user
+
+    @cached_property
+    def groups(self):
+        # CachedTokenAuthentication attaches the names it already knows
+        cached = getattr(self.user, 'group_names', None)
+        if cached is not None:
+            return cached
+
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    @property
+    def is_instructor(self):
+        return 'Instructors' in self.groups
+
+    @property
+    def is_staff(self):
+        """Member of the Staff group. Distinct from the `User.is_staff` flag"""
+        return 'Staff' in self.groups
+
+    @cached_property
+    def current_cohort(self):
+        return self.nss_user.current_cohort
+
+    def owns(self, nss_user):
+        """Whether an NssUser instance is the caller"""
+        return nss_user.user_id == self.user.id
+
+
+def get_identity(request):
+    """The caller's identity, created on first use and reused for the rest of the request
+
+    Accepts either a DRF request or the Django request underneath it.
+    The cache lives on the Django request so both share it.
+    """
+    http_request = getattr(request, '_request', request)
+    identity = getattr(http_request, 'learning_identity', None)
+
+    if identity is None or identity.user != request.user:
+        identity = Identity(request.user)
+        http_request.learning_identity = identity
+
+    return identity
@@ -0,0 +1,202 @@
+"""Compare the legacy and LATERAL versions of get_cohort_student_data
+
+Migration 0080 later moved score computation out of the function, which
+now reads the stored NssUser score. Both benchmarked versions are taken
+from their own migrations and compute the score from learning records,
+so they do the same work. The current function is timed alongside them
+for reference only.
+"""
+import csv
+import importlib
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from LearningAPI.models import Tag
+from LearningAPI.models.coursework import (Book, Capstone, CapstoneTimeline, Course, Project,
+                                           ProposalStatus, StudentProject)
+from LearningAPI.models.people import (Cohort, NssUser, NssUserCohort, StudentNote,
+                                       StudentNoteType, StudentTag)
+from LearningAPI.models.skill import LearningRecord, LearningWeight
+
+LEGACY_MIGRATION = "LearningAPI.migrations.0051_add_student_note_type_to_database_function"
+LEGACY_FUNCTION = "get_cohort_student_data_0051"
+LATERAL_MIGRATION = "LearningAPI.migrations.0077_lateral_cohort_student_data_function"
+LATERAL_FUNCTION = "get_cohort_student_data_0077"
+CURRENT_FUNCTION = "get_cohort_student_data"
+
+TAGS_PER_STUDENT = 5
+CAPSTONES_PER_STUDENT = 2
+RECORDS_PER_STUDENT = 10
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard everything the benchmark seeded"""
+
+
+class Command(BaseCommand):
+    """Seed synthetic cohorts and time both function versions with EXPLAIN ANALYZE
+
+    Everything runs inside one transaction that is rolled back at the end, so
+    neither the seeded cohorts nor the copies of the old functions survive.
+    """
+    help = 'Benchmark the legacy and LATERAL get_cohort_student_data functions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, nargs='+', default=[20, 40, 80],
+                            help='Cohort sizes to seed')
+        parser.add_argument('--notes', type=int, nargs='+', default=[10, 50, 200],
+                            help='Notes per student to seed')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='EXPLAIN ANALYZE runs per function and scenario')
+        parser.add_argument('--output', type=str, default=None,
+                            help='Optional CSV file to record the timings in')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The cohort student functions only exist on PostgreSQL')
+
+        results = []
+
+        try:
+            with transaction.atomic():
+                self.install_function(LEGACY_MIGRATION, LEGACY_FUNCTION)
+                self.install_function(LATERAL_MIGRATION, LATERAL_FUNCTION)
+                fixtures = self.seed_fixtures()
+
+                for student_count in options['students']:
+                    for note_count in options['notes']:
+                        cohort = self.seed_cohort(fixtures, student_count, note_count)
+                        legacy = self.time_function(LEGACY_FUNCTION, cohort.id, options['repeat'])
+                        lateral = self.time_function(LATERAL_FUNCTION, cohort.id, options['repeat'])
+                        current = self.time_function(CURRENT_FUNCTION, cohort.id, options['repeat'])
+
+                        results.append({
+                            'students': student_count,
+                            'notes_per_student': note_count,
+                            'legacy_ms': legacy,
+                            'lateral_ms': lateral,
+                            'speedup': round(legacy / lateral, 2) if lateral else None,
+                            'stored_score_ms': current,
+                        })
+                        self.stdout.write(
+                            f'{student_count:>4} students x {note_count:>4} notes  '
+                            f'legacy {legacy:>10.2f} ms  lateral {lateral:>10.2f} ms  '
+                            f'stored score {current:>10.2f} ms'
+                        )
+
+                raise RollbackBenchmark()
+        except RollbackBenchmark:
+            pass
+
+        if options['output'] is not None and results:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=list(results[0].keys()))
+                writer.writeheader()
+                writer.writerows(results)
+
+            self.stdout.write(self.style.SUCCESS(f'Timings written to {options["output"]}'))
+
+    def install_function(self, migration_name, function_name):
+        """Create a copy of the function a migration installed under a different name"""
+        migration = importlib.import_module(migration_name).Migration
+        sql = migration.operations[0].sql.replace(CURRENT_FUNCTION, function_name)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def time_function(self, function_name, cohort_id, repeat):
+        """Median server-side execution time of one function call in milliseconds"""
+        timings = []
+
+        with connection.cursor() as cursor:
+            for _ in range(repeat):
+                cursor.execute(
+                    f'EXPLAIN (ANALYZE, FORMAT JSON) SELECT * FROM {function_name}(%s)',
+                    [cohort_id]
+                )
+                plan = cursor.fetchone()[0]
+                timings.append(plan[0]['Execution Time'])
+
+        return statistics.median(timings)
+
+    def seed_fixtures(self):
+        """Rows shared by every seeded cohort"""
+        course = Course.objects.create(name='Benchmark Course')
+        book = Book.objects.create(name='Benchmark Book', course=course, index=0)
+
+        return {
+            'course': course,
+            'project': Project.objects.create(
+                name='Benchmark Project', book=book, index=0, implementation_url=''
+            ),
+            'coach': NssUser.objects.create(
+                user=User.objects.create(username='benchmark-coach', is_staff=True)
+            ),
+            'note_type': StudentNoteType.objects.create(label='Benchmark'),
+            'proposal_status': ProposalStatus.objects.create(status='Benchmark'),
+            'tags': Tag.objects.bulk_create([Tag(name=f'bench-{i}') for i in range(TAGS_PER_STUDENT)]),
+            'weights': LearningWeight.objects.bulk_create([
+                LearningWeight(label=f'Benchmark {i}', weight=i + 1) for i in range(RECORDS_PER_STUDENT)
+            ]),
+        }
+
+    def seed_cohort(self, fixtures, student_count, note_count):
+        """Create a cohort of students with the requested number of notes each
+
+        Rows are bulk inserted, so no dashboard snapshot signals fire.
+        """
+        name = f'Benchmark {student_count}x{note_count}'
+        cohort = Cohort.objects.create(
+            name=name, slack_channel='benchmark',
+            start_date='2024-01-01', end_date='2024-06-01',
+            break_start_date='2024-01-01', break_end_date='2024-01-01',
+        )
+
+        users = User.objects.bulk_create([
+            User(username=f'{name}-{i}', first_name='Student', last_name=str(i))
+            for i in range(student_count)
+        ])
+        students = NssUser.objects.bulk_create([
+            NssUser(user=user, github_handle=user.username) for user in users
+        ])
+
+        NssUserCohort.objects.bulk_create([
+            NssUserCohort(nss_user=student, cohort=cohort) for student in students
+        ])
+        StudentProject.objects.bulk_create([
+            StudentProject(student=student, project=fixtures['project']) for student in students
+        ])
+        StudentNote.objects.bulk_create([
+            StudentNote(student=student, coach=fixtures['coach'],
+                        note_type=fixtures['note_type'], note=f'Benchmark note {i}')
+            for student in students
+            for i in range(note_count)
+        ], batch_size=5000)
+        StudentTag.objects.bulk_create([
+            StudentTag(student=student, tag=tag)
+            for student in students
+            for tag in fixtures['tags']
+        ])
+        LearningRecord.objects.bulk_create([
+            LearningRecord(student=student, weight=weight, achieved=True)
+            for student in students
+            for weight in fixtures['weights']
+        ])
+        capstones = Capstone.objects.bulk_create([
+            Capstone(student=student, course=fixtures['course'],
+                     proposal_url='https://example.com', description='Benchmark')
+            for student in students
+            for _ in range(CAPSTONES_PER_STUDENT)
+        ])
+        CapstoneTimeline.objects.bulk_create([
+            CapstoneTimeline(capstone=capstone, status=fixtures['proposal_status'])
+            for capstone in capstones
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        return cohort
@@ -0,0 +1,45 @@
+"""Deliver queued Slack messages"""
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from LearningAPI.slack_outbox import SlackDispatcher, wait_for_messages
+from LearningAPI.utils import get_logger
+
+logger = get_logger("dispatch_slack_outbox")
+
+
+class Command(BaseCommand):
+    """Long-running sender for SlackOutboxMessage rows
+
+    Run a single dispatcher. Slack's rate limits apply to the whole
+    workspace. The calls are counted in Valkey together with every other
+    Slack caller, see `slack_limits`.
+    """
+    help = 'Send pending Slack outbox messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=int, default=5,
+                            help='Seconds to wait for new messages before checking for due retries')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when no message is due instead of waiting for more')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Slack outbox dispatcher started')
+        dispatcher = SlackDispatcher()
+
+        while True:
+            close_old_connections()
+
+            try:
+                if dispatcher.dispatch():
+                    continue
+            except Exception:  # pylint: disable=broad-except
+                if options['once']:
+                    raise
+                # A database error is retried after the usual wait
+                logger.exception("slack_outbox_dispatch_crashed")
+
+            if options['once']:
+                return
+
+            wait_for_messages(options['poll'])
@@ -0,0 +1,45 @@
+"""Recompute the stored learning scores of every user"""
+from django.core.management.base import BaseCommand
+
+from LearningAPI.models.people import NssUser
+from LearningAPI.scoring import score_many
+
+
+class Command(BaseCommand):
+    """Backfill or repair NssUser.technical_score, core_skill_mean and final_score
+
+    Signal handlers keep scores current as learning records, weights and
+    core skill records change. Run this after bulk imports or raw SQL
+    edits that bypass those signals.
+    """
+    help = 'Recompute every stored learning score in one set-based pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report stored scores that differ from a fresh batch calculation')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            self.verify()
+            return
+
+        updated = NssUser.refresh_scores()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed learning scores for {updated} users'))
+
+    def verify(self):
+        stored = dict(NssUser.objects.values_list('id', 'final_score'))
+        computed = score_many(stored.keys())
+
+        stale = [
+            (student_id, score, computed[student_id]['score'])
+            for student_id, score in stored.items()
+            if computed[student_id]['score'] != score
+        ]
+
+        for student_id, score, expected in stale:
+            self.stdout.write(f'NssUser {student_id}: stored {score}, expected {expected}')
+
+        if stale:
+            self.stdout.write(self.style.WARNING(f'{len(stale)} of {len(stored)} stored scores are stale'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {len(stored)} stored scores are current'))
@@ -0,0 +1,80 @@
+"""Flag students who have joined their cohort's GitHub organization"""
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from LearningAPI.github_client import GithubClient, GithubRateLimited
+from LearningAPI.models.people import Cohort, NssUserCohort
+from LearningAPI.utils import get_logger
+
+logger = get_logger("reconcile_github_membership")
+
+
+class Command(BaseCommand):
+    """Batch replacement for the per-student membership check in Profile.list
+
+    For each active cohort the organization's member list is read a page
+    of 100 at a time, and every pending NssUserCohort row whose student
+    appears in it is updated in one query. Pages that have not changed
+    since the last run are answered from the ETag cache.
+    """
+    help = 'Mark cohort members who have accepted their GitHub organization invitation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohort', type=int, help='Only reconcile this cohort id')
+        parser.add_argument('--interval', type=int,
+                            help='Keep running, reconciling every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+
+            if not options['interval']:
+                self.reconcile(options['cohort'])
+                return
+
+            try:
+                self.reconcile(options['cohort'])
+            except Exception:  # pylint: disable=broad-except
+                # A database, Valkey or GitHub error is retried on the next pass
+                logger.exception("membership_reconcile_crashed")
+
+            time.sleep(options['interval'])
+
+    def reconcile(self, cohort_id):
+        cohorts = Cohort.objects \
+            .filter(active=True, info__student_organization_url__isnull=False) \
+            .exclude(info__student_organization_url='') \
+            .select_related('info') \
+            .order_by('pk')
+
+        if cohort_id is not None:
+            cohorts = Cohort.objects.filter(pk=cohort_id).select_related('info')
+
+        # Skip organizations whose students have all joined already
+        pending_cohorts = set(NssUserCohort.objects
+                              .filter(cohort__in=cohorts, is_github_org_member=False)
+                              .values_list('cohort_id', flat=True))
+
+        gh_request = GithubClient()
+
+        for cohort in cohorts:
+            if cohort.id not in pending_cohorts:
+                continue
+
+            org_name = cohort.info.student_organization_url.rstrip('/').split('/')[-1]
+
+            try:
+                logins = gh_request.organization_member_logins(org_name)
+            except GithubRateLimited as ex:
+                logger.warning("membership_reconcile_deferred", cohort=cohort.name, wait=ex.wait)
+                self.stdout.write(f'GitHub rate limit reached, stopping for {ex.wait} seconds')
+                return
+            except requests.RequestException as ex:
+                logger.error("membership_reconcile_failed", cohort=cohort.name, org=org_name, error=str(ex))
+                continue
+
+            joined = NssUserCohort.mark_github_members(cohort.id, logins)
+            self.stdout.write(f'{cohort.name}: {joined} new organization member(s)')
@@ -0,0 +1,31 @@
+"""Rebuild the pre-aggregated cohort dashboard rows"""
+from django.core.management.base import BaseCommand
+
+from LearningAPI.models.people import Cohort, CohortStudentSnapshot
+
+
+class Command(BaseCommand):
+    """Backfill or repair cohort dashboard snapshots
+
+    Signal handlers keep the rows current as notes, tags, projects,
+    assessments, capstones and learning records change. Run this after
+    deploying, after bulk imports, or when a project or book is renamed.
+    """
+    help = 'Rebuild the cohort dashboard snapshot rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohort', type=int, help='Only rebuild rows for this cohort id')
+        parser.add_argument('--active', action='store_true', help='Only rebuild rows for active cohorts')
+
+    def handle(self, *args, **options):
+        cohorts = Cohort.objects.all().order_by('pk')
+
+        if options['cohort'] is not None:
+            cohorts = cohorts.filter(pk=options['cohort'])
+
+        if options['active']:
+            cohorts = cohorts.filter(active=True)
+
+        for cohort in cohorts:
+            CohortStudentSnapshot.refresh_for_cohort(cohort.id)
+            self.stdout.write(f'Rebuilt dashboard rows for {cohort.name}')
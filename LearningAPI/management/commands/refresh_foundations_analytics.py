@@ -0,0 +1,46 @@
+"""Rebuild the pre-aggregated Foundations exercise analytics"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from LearningAPI.foundations_analytics import refresh_stale
+from LearningAPI.models.coursework import FoundationsExerciseStats
+from LearningAPI.utils import get_logger
+
+logger = get_logger("refresh_foundations_analytics")
+
+
+class Command(BaseCommand):
+    """Refresh the rows served by GET /foundations/analytics
+
+    Without options every exercise is rebuilt once, which is how to
+    backfill after deploying. With --interval only exercises whose
+    progress changed since the last pass are rebuilt.
+    """
+    help = 'Rebuild Foundations exercise analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int,
+                            help='Keep running, rebuilding changed exercises every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        if not options['interval']:
+            rows = FoundationsExerciseStats.refresh_for_slugs()
+            self.stdout.write(f'Rebuilt {rows} analytics row(s)')
+            return
+
+        while True:
+            close_old_connections()
+
+            try:
+                rows = refresh_stale()
+            except Exception:  # pylint: disable=broad-except
+                # The slugs were put back, so the next pass retries them
+                logger.exception("foundations_analytics_refresh_crashed")
+                rows = 0
+
+            if rows:
+                self.stdout.write(f'Rebuilt {rows} analytics row(s)')
+
+            time.sleep(options['interval'])
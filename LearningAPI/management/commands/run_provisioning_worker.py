@@ -0,0 +1,79 @@
+"""Run queued repository and Slack provisioning jobs"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import valkey
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from LearningAPI.provisioning import next_job_id, requeue_due_jobs, run_job
+from LearningAPI.utils import get_logger
+
+logger = get_logger("provisioning_worker")
+
+
+class Command(BaseCommand):
+    """Long-running worker for ProvisioningJob rows
+
+    Pops job ids from the Valkey list filled by TeamMakerView.create and
+    StudentViewSet.assess. Whenever the list stays empty for `--poll`
+    seconds it also re-queues deferred and orphaned jobs from the database,
+    and running jobs whose worker let their lease lapse.
+    Run as many workers as needed. A job is claimed by exactly one.
+
+    With `--concurrency` above one, the jobs for a whole cohort's teams run
+    side by side. Slack and GitHub calls from every thread share the same
+    rate limiters.
+    """
+    help = 'Process queued provisioning jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=int, default=5,
+                            help='Seconds to wait on the queue before sweeping the database')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of waiting for more jobs')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Jobs to run at the same time')
+
+    def run(self, job_id):
+        try:
+            run_job(job_id)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("provisioning_job_crashed", job_id=job_id)
+        finally:
+            # Each thread has its own database connection
+            connection.close()
+
+    def handle(self, *args, **options):
+        self.stdout.write('Provisioning worker started')
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=options['concurrency'], thread_name_prefix='provisioning') as executor:
+            while True:
+                if len(running) >= options['concurrency']:
+                    _, running = wait(running, return_when=FIRST_COMPLETED)
+                    continue
+
+                close_old_connections()
+
+                try:
+                    job_id = next_job_id(options['poll'] if not running else 1)
+                except valkey.exceptions.ValkeyError as ex:
+                    logger.warning("provisioning_queue_unavailable", error=str(ex))
+                    job_id = None
+                    time.sleep(options['poll'])
+
+                running = {future for future in running if not future.done()}
+
+                if job_id is not None:
+                    running.add(executor.submit(self.run, job_id))
+                    continue
+
+                try:
+                    requeued = requeue_due_jobs()
+                except valkey.exceptions.ValkeyError as ex:
+                    logger.warning("provisioning_queue_unavailable", error=str(ex))
+                    requeued = 0
+
+                if options['once'] and not requeued and not running:
+                    return
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0075_cohorteventtype_color'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortStudentSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='', max_length=300)),
+                ('github_handle', models.CharField(blank=True, max_length=55, null=True)),
+                ('avatar', models.CharField(blank=True, max_length=512, null=True)),
+                ('assessment_status_id', models.IntegerField(default=0)),
+                ('assessment_url', models.CharField(blank=True, max_length=512, null=True)),
+                ('project_id', models.IntegerField(blank=True, null=True)),
+                ('project_index', models.IntegerField(blank=True, null=True)),
+                ('project_name', models.CharField(blank=True, max_length=55, null=True)),
+                ('project_started_on', models.DateField(blank=True, null=True)),
+                ('book_id', models.IntegerField(blank=True, null=True)),
+                ('book_index', models.IntegerField(blank=True, null=True)),
+                ('book_name', models.CharField(blank=True, max_length=75, null=True)),
+                ('score', models.IntegerField(default=0)),
+                ('notes', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('tags', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('proposals', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_snapshots', to='LearningAPI.cohort')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to='LearningAPI.nssuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cohort', 'book_index', 'project_index'], name='snapshot_cohort_order_idx')],
+                'unique_together': {('student', 'cohort')},
+            },
+        ),
+    ]
@@ -0,0 +1,172 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("LearningAPI", "0076_cohortstudentsnapshot"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """
+            DROP FUNCTION IF EXISTS get_cohort_student_data(INT);
+
+            CREATE FUNCTION get_cohort_student_data(selected_cohort_id INT)
+            RETURNS TABLE (
+                user_id INT,
+                student_name TEXT,
+                score INT,
+                github_handle TEXT,
+                extra_data TEXT,
+                current_cohort TEXT,
+                current_cohort_id INT,
+                assessment_status_id INT,
+                assessment_url TEXT,
+                current_project_id INT,
+                current_project_index INT,
+                current_project_name TEXT,
+                current_book_id INT,
+                current_book_index INT,
+                current_book_name TEXT,
+                student_notes TEXT,
+                student_tags TEXT,
+                capstone_proposals TEXT,
+                project_duration DOUBLE PRECISION,
+                project_started_on DATE
+            ) AS $$
+            BEGIN
+                RETURN QUERY
+                SELECT
+                    nu.id::int AS user_id,
+                    au."first_name" || ' ' || au."last_name" AS student_name,
+                    COALESCE(lr.total_score, 0)::int AS score,
+                    nu.github_handle::text,
+                    social.extra_data::text,
+                    c.name::text AS current_cohort,
+                    c.id::int AS current_cohort_id,
+                    COALESCE(sa.status_id::int, 0) AS assessment_status_id,
+                    sa.url::text AS assessment_url,
+                    sp.project_id::int AS current_project_id,
+                    p.index::int AS current_project_index,
+                    p.name::text AS current_project_name,
+                    b.id::int AS current_book_id,
+                    b.index::int AS current_book_index,
+                    b.name::text AS current_book_name,
+                    notes.items::text AS student_notes,
+                    tags.items::text AS student_tags,
+                    proposals.items::text AS capstone_proposals,
+                    (
+                        EXTRACT(YEAR FROM AGE(NOW(), COALESCE(sa.date_created, sp.date_created))) * 365 +
+                        EXTRACT(MONTH FROM AGE(NOW(), COALESCE(sa.date_created, sp.date_created))) * 30 +
+                        EXTRACT(DAY FROM AGE(NOW(), COALESCE(sa.date_created, sp.date_created)))
+                    )::double precision AS project_duration,
+                    COALESCE(sa.date_created, sp.date_created) AS project_started_on
+                FROM "LearningAPI_nssusercohort" nc
+                JOIN "LearningAPI_cohort" c ON c."id" = nc."cohort_id"
+                JOIN "LearningAPI_nssuser" nu ON nu."id" = nc."nss_user_id"
+                JOIN "auth_user" au ON au."id" = nu."user_id"
+                LEFT JOIN LATERAL (
+                    SELECT s.extra_data
+                    FROM "socialaccount_socialaccount" s
+                    WHERE s.user_id = nu."user_id"
+                    ORDER BY s.id
+                    LIMIT 1
+                ) social ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT s.project_id, s.date_created
+                    FROM "LearningAPI_studentproject" s
+                    WHERE s."student_id" = nu."id"
+                    ORDER BY s.id DESC
+                    LIMIT 1
+                ) sp ON TRUE
+                LEFT JOIN "LearningAPI_project" p ON p."id" = sp."project_id"
+                LEFT JOIN "LearningAPI_book" b ON b."id" = p."book_id"
+                LEFT JOIN LATERAL (
+                    SELECT s.status_id, s.url, s.date_created
+                    FROM "LearningAPI_studentassessment" s
+                    JOIN "LearningAPI_assessment" la ON la."id" = s."assessment_id"
+                    WHERE s."student_id" = nu."id"
+                    AND la."book_id" = b."id"
+                    ORDER BY s.date_created DESC, s.id DESC
+                    LIMIT 1
+                ) sa ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT SUM(lw."weight") AS total_score
+                    FROM "LearningAPI_learningrecord" r
+                    JOIN "LearningAPI_learningweight" lw ON lw."id" = r."weight_id"
+                    WHERE r."student_id" = nu."id"
+                    AND r."achieved" = true
+                ) lr ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(
+                        json_agg(
+                            json_build_object(
+                                'note_id', sn.id,
+                                'note', sn.note,
+                                'created_on', sn.created_on,
+                                'note_type_id', sn.note_type_id,
+                                'note_label', COALESCE(snt.label, '')
+                            )
+                            ORDER BY sn.created_on DESC
+                        ),
+                        '[]'::json
+                    ) AS items
+                    FROM "LearningAPI_studentnote" sn
+                    LEFT JOIN "LearningAPI_studentnotetype" snt ON snt."id" = sn."note_type_id"
+                    WHERE sn."student_id" = nu."id"
+                ) notes ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(
+                        json_agg(
+                            json_build_object(
+                                'id', st."id",
+                                'tag', t."name"
+                            )
+                            ORDER BY st."id"
+                        ),
+                        '[]'::json
+                    ) AS items
+                    FROM "LearningAPI_studenttag" st
+                    LEFT JOIN "LearningAPI_tag" t ON t."id" = st."tag_id"
+                    WHERE st."student_id" = nu."id"
+                ) tags ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(
+                        json_agg(
+                            json_build_object(
+                                'id', cap."id",
+                                'status', ps.status,
+                                'current_status_id', ps.id,
+                                'proposal_url', cap."proposal_url",
+                                'created_on', tl.date,
+                                'course_name', cr.name
+                            )
+                            ORDER BY cap."id"
+                        ),
+                        '[]'::json
+                    ) AS items
+                    FROM "LearningAPI_capstone" cap
+                    LEFT JOIN LATERAL (
+                        SELECT ct.status_id, ct.date
+                        FROM "LearningAPI_capstonetimeline" ct
+                        WHERE ct.capstone_id = cap."id"
+                        ORDER BY ct.date DESC
+                        LIMIT 1
+                    ) tl ON TRUE
+                    LEFT JOIN "LearningAPI_proposalstatus" ps ON ps."id" = tl.status_id
+                    LEFT JOIN "LearningAPI_course" cr ON cr."id" = cap.course_id
+                    WHERE cap."student_id" = nu."id"
+                ) proposals ON TRUE
+                WHERE nc."cohort_id" = selected_cohort_id
+                AND au.is_active = TRUE
+                AND au.is_staff = FALSE
+                ORDER BY b.index ASC,
+                    p.index ASC;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            ""
+        ),
+    ]
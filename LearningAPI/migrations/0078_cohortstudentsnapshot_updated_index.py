@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0077_lateral_cohort_student_data_function'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cohortstudentsnapshot',
+            index=models.Index(fields=['cohort', 'updated_on'], name='snapshot_cohort_updated_idx'),
+        ),
+    ]
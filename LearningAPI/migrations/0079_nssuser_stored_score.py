@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0078_cohortstudentsnapshot_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nssuser',
+            name='core_skill_mean',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='nssuser',
+            name='final_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='nssuser',
+            name='technical_score',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0081_provisioningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repository', models.CharField(max_length=255)),
+                ('login', models.CharField(max_length=55)),
+                ('last_commit_on', models.DateTimeField(blank=True, null=True)),
+                ('commit_count', models.PositiveIntegerField(default=0)),
+                ('open_pull_requests', models.PositiveIntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='repository_activity', to='LearningAPI.nssuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'last_commit_on'], name='repo_activity_student_idx')],
+                'unique_together': {('repository', 'login')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0083_slackoutboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cohortinfo',
+            name='instructor_digest_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='slackoutboxmessage',
+            name='digest',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='slackoutboxmessage',
+            index=models.Index(condition=models.Q(('digest', True)), fields=['channel', 'status'], name='slack_outbox_digest_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0084_instructor_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentteam',
+            name='migration_message_id',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentteam',
+            name='migration_requested_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentteam',
+            name='migration_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('acked', 'Acknowledged'), ('failed', 'Failed')], max_length=10, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0085_team_ticket_migration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foundationsexercise',
+            index=models.Index(fields=['learner_github_id', 'slug'], name='foundations_learner_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foundationsexercise',
+            index=models.Index(fields=['last_attempt'], name='foundations_last_attempt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foundationslearnerprofile',
+            index=models.Index(fields=['learner_github_id'], name='foundations_profile_idx'),
+        ),
+    ]
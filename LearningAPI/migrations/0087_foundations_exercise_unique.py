@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:44
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def remove_duplicate_exercises(apps, schema_editor):
+    """Keep one row per learner and slug, preferring completed, then most recently attempted"""
+    FoundationsExercise = apps.get_model('LearningAPI', 'FoundationsExercise')
+
+    duplicates = FoundationsExercise.objects \
+        .values('learner_github_id', 'slug') \
+        .annotate(rows=Count('id')) \
+        .filter(rows__gt=1)
+
+    for duplicate in duplicates:
+        rows = FoundationsExercise.objects \
+            .filter(learner_github_id=duplicate['learner_github_id'], slug=duplicate['slug']) \
+            .order_by('-complete', F('last_attempt').desc(nulls_last=True), '-id')
+        keep = rows.values_list('id', flat=True)[0]
+        rows.exclude(pk=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0086_foundations_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_exercises, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='foundationsexercise',
+            name='foundations_learner_slug_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='foundationsexercise',
+            constraint=models.UniqueConstraint(fields=('learner_github_id', 'slug'), name='foundations_learner_slug_unique'),
+        ),
+    ]
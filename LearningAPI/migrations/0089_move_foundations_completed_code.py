@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:45
+
+import hashlib
+import zlib
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def move_code_to_solutions(apps, schema_editor):
+    """Store each distinct completed_code once, compressed, and point exercises at it"""
+    FoundationsExercise = apps.get_model('LearningAPI', 'FoundationsExercise')
+    FoundationsSolution = apps.get_model('LearningAPI', 'FoundationsSolution')
+
+    rows = FoundationsExercise.objects \
+        .exclude(completed_code__isnull=True) \
+        .exclude(completed_code='') \
+        .only('id', 'completed_code') \
+        .order_by('id')
+
+    batch = []
+    for exercise in rows.iterator(chunk_size=BATCH_SIZE):
+        encoded = exercise.completed_code.encode()
+        exercise.solution_id = hashlib.sha256(encoded).hexdigest()
+        exercise.compressed = zlib.compress(encoded, 6)
+        batch.append(exercise)
+
+        if len(batch) == BATCH_SIZE:
+            save_solutions(FoundationsExercise, FoundationsSolution, batch)
+            batch = []
+
+    save_solutions(FoundationsExercise, FoundationsSolution, batch)
+
+
+def save_solutions(FoundationsExercise, FoundationsSolution, exercises):
+    solutions = {
+        exercise.solution_id: FoundationsSolution(digest=exercise.solution_id, compressed_code=exercise.compressed)
+        for exercise in exercises
+    }
+    FoundationsSolution.objects.bulk_create(solutions.values(), ignore_conflicts=True)
+    FoundationsExercise.objects.bulk_update(exercises, ['solution'])
+
+
+def restore_completed_code(apps, schema_editor):
+    FoundationsExercise = apps.get_model('LearningAPI', 'FoundationsExercise')
+
+    rows = FoundationsExercise.objects \
+        .filter(solution__isnull=False) \
+        .select_related('solution') \
+        .order_by('id')
+
+    batch = []
+    for exercise in rows.iterator(chunk_size=BATCH_SIZE):
+        exercise.completed_code = zlib.decompress(bytes(exercise.solution.compressed_code)).decode()
+        batch.append(exercise)
+
+        if len(batch) == BATCH_SIZE:
+            FoundationsExercise.objects.bulk_update(batch, ['completed_code'])
+            batch = []
+
+    FoundationsExercise.objects.bulk_update(batch, ['completed_code'])
+
+
+class Migration(migrations.Migration):
+    """Runs in its own transaction, so the solution updates are committed
+    before the next migration alters the exercise table"""
+
+    dependencies = [
+        ('LearningAPI', '0088_foundations_solution'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_code_to_solutions, restore_completed_code),
+    ]
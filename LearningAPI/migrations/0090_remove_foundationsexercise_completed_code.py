@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0089_move_foundations_completed_code'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='foundationsexercise',
+            name='completed_code',
+        ),
+    ]
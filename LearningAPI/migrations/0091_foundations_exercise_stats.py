@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LearningAPI', '0090_remove_foundationsexercise_completed_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoundationsExerciseStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=75)),
+                ('title', models.CharField(max_length=75)),
+                ('cohort', models.CharField(default='all', max_length=30)),
+                ('learners', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('completion_rate', models.FloatField(default=0)),
+                ('median_attempts', models.FloatField(blank=True, null=True)),
+                ('median_minutes_to_complete', models.FloatField(blank=True, null=True)),
+                ('solution_reveal_rate', models.FloatField(default=0)),
+                ('stuck_count', models.IntegerField(default=0)),
+                ('stuck_learners', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cohort', 'slug'], name='foundations_stats_cohort_idx')],
+                'unique_together': {('slug', 'cohort')},
+            },
+        ),
+    ]
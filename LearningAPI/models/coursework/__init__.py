@@ -14,4 +14,6 @@ from .project_tag import ProjectTag
 from .lightning_tag import LightningTag
 from .cohort_course import CohortCourse
 from .foundation_exercise import FoundationsExercise
-from .foundation_learner import FoundationsLearnerProfile
\ No newline at end of file
+from .foundation_learner import FoundationsLearnerProfile
+from .foundation_solution import FoundationsSolution
+from .foundation_exercise_stats import FoundationsExerciseStats
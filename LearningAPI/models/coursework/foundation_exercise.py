@@ -1,5 +1,7 @@
 from django.db import models
 
+from .foundation_solution import FoundationsSolution
+
 
 class FoundationsExercise(models.Model):
     """Model for tracking learner progress in Foundations Course"""
@@ -12,8 +14,44 @@ class FoundationsExercise(models.Model):
     completed_on = models.DateTimeField(null=True, blank=True)
     first_attempt = models.DateTimeField(null=True, blank=True)
     last_attempt = models.DateTimeField(null=True, blank=True)
-    completed_code = models.TextField(null=True, blank=True)
+    solution = models.ForeignKey("FoundationsSolution", on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name="exercises")
     used_solution = models.BooleanField(default=False)
 
+    # Columns the client reports. Everything but the key is overwritten on upsert.
+    PROGRESS_FIELDS = ['learner_name', 'title', 'attempts', 'complete', 'completed_on',
+                       'first_attempt', 'last_attempt', 'solution', 'used_solution']
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['learner_github_id', 'slug'], name='foundations_learner_slug_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['last_attempt'], name='foundations_last_attempt_idx'),
+        ]
+
     def __str__(self) -> str: # pylint: disable=E0307
         return f'{self.learner_github_id} - {self.title} - {self.attempts} - {self.complete}'
+
+    @property
+    def completed_code(self):
+        """The learner's code, read from the solution table on first access"""
+        return self.solution.code if self.solution_id else None
+
+    @classmethod
+    def upsert(cls, exercises):
+        """Insert or overwrite many unsaved exercises in one statement
+
+        Later entries for the same learner and slug win, since the database
+        rejects a statement that updates the same row twice. Unsaved
+        solutions attached to the exercises are stored first.
+        """
+        latest = {(exercise.learner_github_id, exercise.slug): exercise for exercise in exercises}
+        FoundationsSolution.store(exercise.solution for exercise in latest.values() if exercise.solution_id)
+
+        return cls.objects.bulk_create(
+            latest.values(),
+            update_conflicts=True,
+            unique_fields=['learner_github_id', 'slug'],
+            update_fields=cls.PROGRESS_FIELDS,
+        )
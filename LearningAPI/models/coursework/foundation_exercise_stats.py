@@ -0,0 +1,118 @@
+from collections import defaultdict
+from statistics import median
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+
+from .foundation_exercise import FoundationsExercise
+from .foundation_learner import FoundationsLearnerProfile
+
+# Learners with this many attempts and no completion are reported as stuck
+STUCK_ATTEMPTS = 5
+STUCK_LIMIT = 25
+
+
+class FoundationsExerciseStats(models.Model):
+    """Pre-aggregated funnel numbers for one exercise and one cohort
+
+    Every exercise has an `all` row plus one row per cohort label, in the
+    same "type number" form the learner rollup shows, or "Unassigned".
+    Rows are rebuilt a slug at a time by `refresh_for_slugs`.
+    """
+    # Label of the row that covers every learner on an exercise
+    ALL_LEARNERS = 'all'
+
+    slug = models.SlugField(max_length=75)
+    title = models.CharField(max_length=75)
+    cohort = models.CharField(max_length=30, default='all')
+    learners = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    completion_rate = models.FloatField(default=0)
+    median_attempts = models.FloatField(null=True, blank=True)
+    median_minutes_to_complete = models.FloatField(null=True, blank=True)
+    solution_reveal_rate = models.FloatField(default=0)
+    stuck_count = models.IntegerField(default=0)
+    stuck_learners = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (('slug', 'cohort',),)
+        indexes = [
+            models.Index(fields=['cohort', 'slug'], name='foundations_stats_cohort_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.slug} ({self.cohort})'
+
+    @staticmethod
+    def summarize(rows):
+        """Funnel numbers for a list of exercise value rows"""
+        learners = len(rows)
+        completed = [row for row in rows if row['complete']]
+        minutes = [
+            (row['completed_on'] - row['first_attempt']).total_seconds() / 60
+            for row in completed
+            if row['completed_on'] and row['first_attempt'] and row['completed_on'] >= row['first_attempt']
+        ]
+        stuck = sorted(
+            (row for row in rows if not row['complete'] and row['attempts'] >= STUCK_ATTEMPTS),
+            key=lambda row: row['attempts'], reverse=True
+        )
+
+        return {
+            'learners': learners,
+            'completed': len(completed),
+            'completion_rate': len(completed) / learners if learners else 0,
+            'median_attempts': median(row['attempts'] for row in rows) if rows else None,
+            'median_minutes_to_complete': median(minutes) if minutes else None,
+            'solution_reveal_rate': sum(1 for row in rows if row['used_solution']) / learners if learners else 0,
+            'stuck_count': len(stuck),
+            'stuck_learners': [
+                {
+                    'learner_github_id': row['learner_github_id'],
+                    'learner_name': row['learner_name'],
+                    'attempts': row['attempts'],
+                    'last_attempt': row['last_attempt'],
+                }
+                for row in stuck[:STUCK_LIMIT]
+            ],
+        }
+
+    @classmethod
+    def refresh_for_slugs(cls, slugs=None):
+        """Rebuild the rows for the given exercise slugs, or for every exercise
+
+        Returns:
+            int: Number of rows written
+        """
+        exercises = FoundationsExercise.objects.all()
+        if slugs is not None:
+            exercises = exercises.filter(slug__in=list(slugs))
+
+        cohorts = {
+            profile['learner_github_id']: f"{profile['cohort_type']} {profile['cohort_number']}"
+            for profile in FoundationsLearnerProfile.objects
+                .filter(learner_github_id__in=exercises.values('learner_github_id'))
+                .values('learner_github_id', 'cohort_type', 'cohort_number')
+        }
+
+        groups = defaultdict(list)
+        titles = {}
+        for row in exercises.values('slug', 'title', 'learner_github_id', 'learner_name', 'attempts',
+                                    'complete', 'first_attempt', 'completed_on', 'last_attempt',
+                                    'used_solution').iterator(chunk_size=2000):
+            titles.setdefault(row['slug'], row['title'])
+            groups[(row['slug'], cls.ALL_LEARNERS)].append(row)
+            groups[(row['slug'], cohorts.get(row['learner_github_id'], 'Unassigned'))].append(row)
+
+        stats = [
+            cls(slug=slug, title=titles[slug], cohort=cohort, **cls.summarize(rows))
+            for (slug, cohort), rows in groups.items()
+        ]
+
+        with transaction.atomic():
+            stale = cls.objects.all() if slugs is None else cls.objects.filter(slug__in=list(slugs))
+            stale.delete()
+            cls.objects.bulk_create(stats)
+
+        return len(stats)
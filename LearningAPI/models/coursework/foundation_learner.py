@@ -8,3 +8,7 @@ class FoundationsLearnerProfile(models.Model):
     cohort_type = models.CharField(max_length=15, default="day")
     cohort_number = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['learner_github_id'], name='foundations_profile_idx'),
+        ]
@@ -0,0 +1,40 @@
+import hashlib
+import zlib
+
+from django.db import models
+
+
+class FoundationsSolution(models.Model):
+    """Code a learner submitted for a Foundations exercise
+
+    Stored once per distinct content, keyed by its SHA-256 digest, and
+    compressed with zlib. Learners who submit identical code share a row.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    compressed_code = models.BinaryField()
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.digest
+
+    @property
+    def code(self):
+        return zlib.decompress(bytes(self.compressed_code)).decode()
+
+    @classmethod
+    def for_code(cls, code):
+        """An unsaved solution for the code, or None when there is no code"""
+        if not code:
+            return None
+
+        encoded = code.encode()
+        return cls(
+            digest=hashlib.sha256(encoded).hexdigest(),
+            compressed_code=zlib.compress(encoded, 6),
+        )
+
+    @classmethod
+    def store(cls, solutions):
+        """Save solutions whose content is not stored yet, in one statement"""
+        distinct = {solution.digest: solution for solution in solutions}
+        cls.objects.bulk_create(distinct.values(), ignore_conflicts=True)
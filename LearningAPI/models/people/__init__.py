@@ -17,4 +17,8 @@ from .student_tag import StudentTag
 from .student_note_type import StudentNoteType
 from .student_team import StudentTeam
 from .nssuser_team import NSSUserTeam
-from .group_project_repo import GroupProjectRepository
\ No newline at end of file
+from .group_project_repo import GroupProjectRepository
+from .cohort_student_snapshot import CohortStudentSnapshot
+from .provisioning_job import ProvisioningJob
+from .repository_activity import RepositoryActivity
+from .slack_outbox_message import SlackOutboxMessage
@@ -9,3 +9,6 @@ class CohortInfo(models.Model):
     client_course_url = models.CharField(max_length=255, null=True, blank=True)
     server_course_url = models.CharField(max_length=255, null=True, blank=True)
     zoom_url = models.CharField(max_length=255, null=True, blank=True)
+    # Minutes instructor channel notifications are collected before being
+    # posted as one digest. 0 posts each one as it happens.
+    instructor_digest_minutes = models.PositiveIntegerField(default=0)
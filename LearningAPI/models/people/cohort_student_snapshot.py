@@ -0,0 +1,399 @@
+"""Module for the pre-aggregated cohort dashboard rows"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+# Columns rewritten every time a student's dashboard row is rebuilt
+SNAPSHOT_FIELDS = [
+    'name', 'github_handle', 'avatar', 'assessment_status_id', 'assessment_url',
+    'project_id', 'project_index', 'project_name', 'project_started_on',
+    'book_id', 'book_index', 'book_name', 'score', 'notes', 'tags', 'proposals',
+]
+
+# Rows updated this long before a sync cursor was issued are sent again, so a
+# refresh whose transaction was still in flight when the cursor was taken is
+# never skipped. Clients merge by student id, so repeats are harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class CohortStudentSnapshot(models.Model):
+    """One dashboard row per cohort member, kept current by signal handlers
+
+    The cohort student list used to be computed on every request by the
+    get_cohort_student_data database function. These rows hold the same
+    information, already aggregated, so the list is a single indexed scan.
+    """
+    student = models.ForeignKey("NssUser", on_delete=models.CASCADE, related_name="dashboard_snapshots")
+    cohort = models.ForeignKey("Cohort", on_delete=models.CASCADE, related_name="student_snapshots")
+    name = models.CharField(max_length=300, default="")
+    github_handle = models.CharField(max_length=55, null=True, blank=True)
+    avatar = models.CharField(max_length=512, null=True, blank=True)
+    assessment_status_id = models.IntegerField(default=0)
+    assessment_url = models.CharField(max_length=512, null=True, blank=True)
+    project_id = models.IntegerField(null=True, blank=True)
+    project_index = models.IntegerField(null=True, blank=True)
+    project_name = models.CharField(max_length=55, null=True, blank=True)
+    project_started_on = models.DateField(null=True, blank=True)
+    book_id = models.IntegerField(null=True, blank=True)
+    book_index = models.IntegerField(null=True, blank=True)
+    book_name = models.CharField(max_length=75, null=True, blank=True)
+    score = models.IntegerField(default=0)
+    notes = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    tags = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    proposals = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (('student', 'cohort',),)
+        indexes = [
+            models.Index(fields=['cohort', 'book_index', 'project_index'], name='snapshot_cohort_order_idx'),
+            models.Index(fields=['cohort', 'updated_on'], name='snapshot_cohort_updated_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.cohort_id})'
+
+    @property
+    def project_duration(self):
+        """Number of days the student has been on the current project or its assessment"""
+        if self.project_started_on is None:
+            return None
+        return (timezone.now().date() - self.project_started_on).days
+
+    @staticmethod
+    def sync_cursor():
+        """Opaque cursor for delta syncs of the cohort student list
+
+        Returns:
+            str: Microseconds since the epoch at the time of the call
+        """
+        return str(int(timezone.now().timestamp() * 1_000_000))
+
+    @staticmethod
+    def changed_after(cursor):
+        """Earliest `updated_on` a delta sync for the cursor must include
+
+        Args:
+            cursor (str): Value previously returned by `sync_cursor`
+
+        Raises:
+            ValueError: If the cursor is not a valid sync cursor
+
+        Returns:
+            datetime: Lower bound for `updated_on`
+        """
+        issued = datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+        return issued - SYNC_OVERLAP
+
+    def as_cohort_student(self):
+        """Dictionary in the shape returned by the cohort student list"""
+        return {
+            "id": self.student_id,
+            "github_handle": self.github_handle,
+            "name": self.name,
+            "current_cohort": {
+                "id": self.cohort_id,
+                "name": self.cohort.name
+            },
+            "avatar": self.avatar,
+            "assessment_status_id": self.assessment_status_id,
+            "assessment_url": self.assessment_url,
+            "project_id": self.project_id,
+            "project_duration": self.project_duration,
+            "project_index": self.project_index,
+            "project_name": self.project_name,
+            "book_id": self.book_id,
+            "book_index": self.book_index,
+            "book_name": self.book_name,
+            "score": self.score,
+            "notes": self.notes,
+            "proposals": self.proposals,
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def cohort_json(cls, cohort_id):
+        """JSON array of a cohort's active students, built entirely by Postgres
+
+        The result has the same shape as `as_cohort_student` for every row, so
+        it can be written to the response without parsing or re-serializing.
+
+        Args:
+            cohort_id (int): Primary key of the cohort
+
+        Returns:
+            str: JSON text of the cohort student list
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COALESCE(
+                    json_agg(
+                        json_build_object(
+                            'id', s.student_id,
+                            'github_handle', s.github_handle,
+                            'name', s.name,
+                            'current_cohort', json_build_object('id', c.id, 'name', c.name),
+                            'avatar', s.avatar,
+                            'assessment_status_id', s.assessment_status_id,
+                            'assessment_url', s.assessment_url,
+                            'project_id', s.project_id,
+                            'project_duration', CURRENT_DATE - s.project_started_on,
+                            'project_index', s.project_index,
+                            'project_name', s.project_name,
+                            'book_id', s.book_id,
+                            'book_index', s.book_index,
+                            'book_name', s.book_name,
+                            'score', s.score,
+                            'notes', s.notes,
+                            'proposals', s.proposals,
+                            'tags', s.tags
+                        )
+                        ORDER BY s.book_index ASC NULLS LAST, s.project_index ASC NULLS LAST
+                    ),
+                    '[]'::json
+                )::text
+                FROM "LearningAPI_cohortstudentsnapshot" s
+                JOIN "LearningAPI_cohort" c ON c.id = s.cohort_id
+                JOIN "LearningAPI_nssuser" nu ON nu.id = s.student_id
+                JOIN "auth_user" au ON au.id = nu.user_id
+                WHERE s.cohort_id = %s
+                AND au.is_active = TRUE
+                AND au.is_staff = FALSE
+            """, [cohort_id])
+
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def build_values(cls, student):
+        """Aggregate everything the dashboard shows about one student
+
+        Args:
+            student (NssUser): The student, with `user` already loaded
+
+        Returns:
+            dict: Field values for every snapshot row of the student
+        """
+        # pylint: disable=import-outside-toplevel
+        from allauth.socialaccount.models import SocialAccount
+        from LearningAPI.models.coursework import StudentProject, Capstone, CapstoneTimeline
+        from LearningAPI.models.people import StudentAssessment, StudentNote, StudentTag
+
+        values = {
+            "name": f'{student.user.first_name} {student.user.last_name}',
+            "github_handle": student.github_handle,
+            "avatar": None,
+            "assessment_status_id": 0,
+            "assessment_url": None,
+            "project_id": None,
+            "project_index": None,
+            "project_name": None,
+            "project_started_on": None,
+            "book_id": None,
+            "book_index": None,
+            "book_name": None,
+        }
+
+        extra_data = SocialAccount.objects.filter(user_id=student.user_id) \
+            .values_list('extra_data', flat=True).first()
+        if isinstance(extra_data, str):
+            extra_data = json.loads(extra_data)
+        if extra_data:
+            values["avatar"] = extra_data.get("avatar_url")
+
+        current = StudentProject.objects.filter(student=student) \
+            .select_related('project__book') \
+            .order_by('-id') \
+            .first()
+
+        if current is not None:
+            project = current.project
+            values.update({
+                "project_id": project.id,
+                "project_index": project.index,
+                "project_name": project.name,
+                "project_started_on": current.date_created,
+                "book_id": project.book.id,
+                "book_index": project.book.index,
+                "book_name": project.book.name,
+            })
+
+            assessment = StudentAssessment.objects \
+                .filter(student=student, assessment__book_id=project.book_id) \
+                .order_by('-date_created', '-id') \
+                .first()
+
+            if assessment is not None:
+                values["assessment_status_id"] = assessment.status_id
+                values["assessment_url"] = assessment.url
+                values["project_started_on"] = assessment.date_created
+
+        values["score"] = student.technical_score
+
+        values["notes"] = [
+            {
+                "note_id": note.id,
+                "note": note.note,
+                "created_on": note.created_on,
+                "note_type_id": note.note_type_id,
+                "note_label": note.note_type.label if note.note_type else ""
+            }
+            for note in StudentNote.objects.filter(student=student).select_related('note_type')
+        ]
+
+        values["tags"] = [
+            {"id": student_tag.id, "tag": student_tag.tag.name}
+            for student_tag in StudentTag.objects.filter(student=student).select_related('tag').order_by('id')
+        ]
+
+        latest_status = CapstoneTimeline.objects.filter(capstone=OuterRef('pk')).order_by('-date')
+        capstones = Capstone.objects.filter(student=student) \
+            .annotate(
+                status_id=Subquery(latest_status.values('status_id')[:1]),
+                status_label=Subquery(latest_status.values('status__status')[:1]),
+                status_date=Subquery(latest_status.values('date')[:1]),
+            ) \
+            .values('id', 'proposal_url', 'course__name', 'status_id', 'status_label', 'status_date') \
+            .order_by('id')
+
+        values["proposals"] = [
+            {
+                "id": capstone["id"],
+                "status": capstone["status_label"],
+                "current_status_id": capstone["status_id"],
+                "proposal_url": capstone["proposal_url"],
+                "created_on": capstone["status_date"],
+                "course_name": capstone["course__name"]
+            }
+            for capstone in capstones
+        ]
+
+        return values
+
+    @classmethod
+    def refresh_for_student(cls, student_id):
+        """Rebuild the dashboard rows of a single student in every cohort they belong to
+
+        Args:
+            student_id (int): Primary key of the NssUser
+
+        Returns:
+            list: Ids of every cohort whose dashboard rows changed
+        """
+        # pylint: disable=import-outside-toplevel
+        from LearningAPI.models.people import NssUser
+
+        student = NssUser.objects.select_related('user').filter(pk=student_id).first()
+        previous_ids = set(cls.objects.filter(student_id=student_id).values_list('cohort_id', flat=True))
+
+        if student is None:
+            cls.objects.filter(student_id=student_id).delete()
+            return list(previous_ids)
+
+        cohort_ids = list(student.assigned_cohorts.values_list('cohort_id', flat=True))
+        cls.objects.filter(student=student).exclude(cohort_id__in=cohort_ids).delete()
+
+        if not cohort_ids:
+            return list(previous_ids)
+
+        values = cls.build_values(student)
+        cls.objects.bulk_create(
+            [cls(student=student, cohort_id=cohort_id, **values) for cohort_id in cohort_ids],
+            update_conflicts=True,
+            unique_fields=['student', 'cohort'],
+            update_fields=SNAPSHOT_FIELDS + ['updated_on'],
+        )
+
+        return list(previous_ids.union(cohort_ids))
+
+    @staticmethod
+    def cohort_has_members(cohort_id):
+        """Whether `refresh_for_cohort` would build any rows for the cohort
+
+        Inactive and staff members get no dashboard row, so a cohort made up
+        only of them has nothing to rebuild.
+        """
+        # pylint: disable=import-outside-toplevel
+        from LearningAPI.models.people import NssUserCohort
+
+        return NssUserCohort.objects.filter(
+            cohort_id=cohort_id,
+            nss_user__user__is_active=True,
+            nss_user__user__is_staff=False
+        ).exists()
+
+    @classmethod
+    def refresh_for_cohort(cls, cohort_id):
+        """Rebuild the dashboard rows of every active student in a cohort
+
+        Uses the set-based get_cohort_student_data database function, so a
+        whole cohort is rebuilt with one function call and one upsert.
+
+        Args:
+            cohort_id (int): Primary key of the cohort
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    user_id,
+                    student_name,
+                    github_handle,
+                    extra_data,
+                    assessment_status_id,
+                    assessment_url,
+                    current_project_id,
+                    current_project_index,
+                    current_project_name,
+                    project_started_on,
+                    current_book_id,
+                    current_book_index,
+                    current_book_name,
+                    score,
+                    student_notes,
+                    student_tags,
+                    capstone_proposals
+                FROM
+                    get_cohort_student_data(%s)
+            """, [cohort_id])
+            columns = [col[0] for col in cursor.description]
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        snapshots = []
+        for row in results:
+            extra_data = json.loads(row['extra_data']) if row['extra_data'] else {}
+
+            snapshots.append(cls(
+                student_id=row['user_id'],
+                cohort_id=cohort_id,
+                name=row['student_name'],
+                github_handle=row['github_handle'],
+                avatar=extra_data.get('avatar_url'),
+                assessment_status_id=row['assessment_status_id'],
+                assessment_url=row['assessment_url'],
+                project_id=row['current_project_id'],
+                project_index=row['current_project_index'],
+                project_name=row['current_project_name'],
+                project_started_on=row['project_started_on'],
+                book_id=row['current_book_id'],
+                book_index=row['current_book_index'],
+                book_name=row['current_book_name'],
+                score=row['score'],
+                notes=json.loads(row['student_notes']),
+                tags=json.loads(row['student_tags']),
+                proposals=json.loads(row['capstone_proposals']),
+            ))
+
+        cls.objects.filter(cohort_id=cohort_id) \
+            .exclude(student_id__in=[snapshot.student_id for snapshot in snapshots]) \
+            .delete()
+
+        cls.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['student', 'cohort'],
+            update_fields=SNAPSHOT_FIELDS + ['updated_on'],
+        )
@@ -1,10 +1,10 @@
 """NssUser database model"""
-import statistics
 import logging
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import Sum
+from django.db.models import Avg, Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Cast, Coalesce, Round
 
 
 class NssUser(models.Model):
@@ -15,6 +15,12 @@ class NssUser(models.Model):
     slack_handle = models.CharField(max_length=55, null=True, blank=True)
     github_handle = models.CharField(max_length=55, null=True, blank=True)
 
+    # Learning score, kept current by the LearningRecord, LearningWeight and
+    # CoreSkillRecord signal handlers. See refresh_scores()
+    technical_score = models.IntegerField(default=0)
+    core_skill_mean = models.FloatField(null=True, blank=True)
+    final_score = models.IntegerField(default=0)
+
     def __repr__(self) -> str:
         return f'{self.user.first_name} {self.user.last_name}'
 
@@ -34,33 +40,66 @@ class NssUser(models.Model):
     def name(self):
         return f'{self.user.first_name} {self.user.last_name}'
 
+    def is_prefetched(self, *relations):
+        """Whether every given reverse relation was loaded by prefetch_related"""
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        return all(relation in cache for relation in relations)
+
     @property
     def score(self):
         """Return total learning score"""
+        return self.final_score
+
+    @classmethod
+    def refresh_scores(cls, student_ids=None):
+        """Recompute the stored learning scores with two set-based UPDATEs
+
+        Runs in the caller's transaction, so a score never disagrees with
+        the records it was computed from.
+
+        Args:
+            student_ids (iterable): Primary keys to recompute. Every user when None.
+
+        Returns:
+            int: Number of users updated
+        """
+        # pylint: disable=import-outside-toplevel
+        from LearningAPI.models.skill import CoreSkillRecord, LearningRecord
+
+        users = cls.objects.all()
+        if student_ids is not None:
+            users = users.filter(pk__in=list(student_ids))
+
+        technical = LearningRecord.objects \
+            .filter(student=OuterRef('pk'), achieved=True) \
+            .values('student') \
+            .annotate(total=Sum('weight__weight')) \
+            .values('total')
+        core_skill_mean = CoreSkillRecord.objects \
+            .filter(student=OuterRef('pk')) \
+            .values('student') \
+            .annotate(mean=Avg('level')) \
+            .values('mean')
+
+        with transaction.atomic():
+            updated = users.update(
+                technical_score=Coalesce(Subquery(technical), 0),
+                core_skill_mean=Subquery(core_skill_mean, output_field=models.FloatField()),
+            )
 
-        # First get the total of the student's technical objectives
-        total = 0
-        scores = self.learning_records.filter(achieved=True) \
-            .annotate(total_score=Sum("weight__weight")) \
-            .values_list('total_score', flat=True)
-        total = sum(list(scores))
-
-        # Get the average of the core skills' levels and adjust the
-        # technical score positively by the percent
-
-        core_skill_records = list(
-            self.core_skills.values_list('level', flat=True))
-
-        try:
             # Hannah and I did this on a Monday morning, so it may be the wrong
-            # approach, but it's a step in the right direction
-            mean = statistics.mean(core_skill_records)
-            total = round(total * (1 + (mean / 10)))
-
-        except statistics.StatisticsError:
-            pass
-
-        return total
+            # approach, but it's a step in the right direction. The average of
+            # the core skills' levels adjusts the technical score positively
+            # by the percent.
+            users.update(final_score=Case(
+                When(core_skill_mean__isnull=True, then=F('technical_score')),
+                default=Cast(
+                    Round(F('technical_score') * (1 + F('core_skill_mean') / 10)),
+                    models.IntegerField()
+                ),
+            ))
+
+        return updated
 
     @property
     def assessment_overview(self):
@@ -78,7 +117,11 @@ class NssUser(models.Model):
 
     @property
     def current_cohort(self):
-        assignment = self.assigned_cohorts.order_by("-id").last()
+        if self.is_prefetched('assigned_cohorts'):
+            assignment = min(self.assigned_cohorts.all(), key=lambda a: a.id, default=None)
+        else:
+            assignment = self.assigned_cohorts.order_by("-id").last()
+
         if assignment is None:
             return {
                 "name": "Unassigned"
@@ -95,7 +138,7 @@ class NssUser(models.Model):
                 "end": assignment.cohort.end_date,
                 "ic": assignment.cohort.slack_channel,
                 "github_org": assignment.cohort.info.student_organization_url,
-                "courses": assignment.cohort.courses.order_by('index').values('course__name', 'course__id', 'active'),
+                "courses": self.cohort_courses(assignment.cohort),
             }
         except Exception as ex:
             logger = logging.getLogger("LearningPlatform")
@@ -107,5 +150,20 @@ class NssUser(models.Model):
                 "start": assignment.cohort.start_date,
                 "end": assignment.cohort.end_date,
                 "ic": assignment.cohort.slack_channel,
-                "courses": assignment.cohort.courses.order_by('index').values('course__name', 'course__id', 'active'),
+                "courses": self.cohort_courses(assignment.cohort),
+            }
+
+    @staticmethod
+    def cohort_courses(cohort):
+        """Courses of a cohort in order, read from the prefetch cache when present"""
+        if 'courses' not in getattr(cohort, '_prefetched_objects_cache', {}):
+            return cohort.courses.order_by('index').values('course__name', 'course__id', 'active')
+
+        return [
+            {
+                'course__name': cohort_course.course.name,
+                'course__id': cohort_course.course_id,
+                'active': cohort_course.active,
             }
+            for cohort_course in sorted(cohort.courses.all(), key=lambda c: c.index)
+        ]
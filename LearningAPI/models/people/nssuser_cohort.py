@@ -14,4 +14,24 @@ class NssUserCohort(models.Model):
         return self.cohort.name
 
     class Meta:
-        unique_together = ("nss_user", "cohort")
\ No newline at end of file
+        unique_together = ("nss_user", "cohort")
+
+    @classmethod
+    def mark_github_members(cls, cohort_id, logins):
+        """Flag every pending assignment in a cohort whose GitHub handle is in `logins`
+
+        GitHub logins are case-insensitive, so `logins` is compared lowercased.
+
+        Returns:
+            int: Assignments updated
+        """
+        logins = {login.lower() for login in logins}
+        pending = cls.objects \
+            .filter(cohort_id=cohort_id, is_github_org_member=False) \
+            .values_list('id', 'nss_user__github_handle')
+        joined = [pk for pk, handle in pending if handle and handle.lower() in logins]
+
+        if not joined:
+            return 0
+
+        return cls.objects.filter(pk__in=joined).update(is_github_org_member=True)
\ No newline at end of file
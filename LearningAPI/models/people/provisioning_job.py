@@ -0,0 +1,60 @@
+"""Background provisioning job model"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class ProvisioningJob(models.Model):
+    """Slow GitHub and Slack setup work run by the provisioning worker
+
+    `payload` holds everything the worker needs, including any randomly
+    generated names, so a deferred job resumes with the same values.
+    `steps` records each step's progress for `GET /jobs/{id}`. A running
+    job's worker renews `lease_until` as it records each step.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    TEAM = 'team'
+    ASSESSMENT = 'assessment'
+    KINDS = (
+        (TEAM, 'Team workspace'),
+        (ASSESSMENT, 'Self-assessment repository'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    status = models.CharField(max_length=20, choices=STATUSES, default=QUEUED)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    steps = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    requested_by = models.ForeignKey("NssUser", on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name="provisioning_jobs")
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='provisioning_job_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.kind} job {self.id} ({self.status})'
+
+    def step_result(self, name):
+        """What a completed step returned, or None"""
+        for step in self.steps:
+            if step['name'] == name and step['status'] == 'done':
+                return step.get('result')
+        return None
@@ -0,0 +1,75 @@
+"""Local record of student repository activity reported by GitHub webhooks"""
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+
+
+class RepositoryActivity(models.Model):
+    """One row per repository and contributor, updated by the GitHub webhook
+
+    Lets dashboards show when a student last pushed and how many pull
+    requests they have open without calling GitHub.
+    """
+    repository = models.CharField(max_length=255)
+    login = models.CharField(max_length=55)
+    student = models.ForeignKey("NssUser", on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name="repository_activity")
+    last_commit_on = models.DateTimeField(null=True, blank=True)
+    commit_count = models.PositiveIntegerField(default=0)
+    open_pull_requests = models.PositiveIntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (('repository', 'login',),)
+        indexes = [
+            models.Index(fields=['student', 'last_commit_on'], name='repo_activity_student_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.login} on {self.repository}'
+
+    @classmethod
+    def row(cls, repository, login):
+        """The contributor's row as a queryset, created and linked to their NssUser on first sight
+
+        The insert skips a row that a concurrent delivery has just created,
+        so two deliveries for a new contributor never collide on the unique key.
+        """
+        from LearningAPI.models.people import NssUser  # pylint: disable=import-outside-toplevel
+
+        repository, login = repository.lower(), login.lower()
+        student_id = NssUser.objects.filter(github_handle__iexact=login).values_list('id', flat=True).first()
+        cls.objects.bulk_create(
+            [cls(repository=repository, login=login, student_id=student_id)],
+            ignore_conflicts=True
+        )
+
+        return cls.objects.filter(repository=repository, login=login)
+
+    @classmethod
+    def record_push(cls, repository, login, committed_on, commits):
+        cls.row(repository, login).update(
+            last_commit_on=Greatest(Coalesce(F('last_commit_on'), committed_on), committed_on),
+            commit_count=F('commit_count') + commits,
+        )
+
+    @classmethod
+    def record_pull_request(cls, repository, login, change):
+        """Adjust the contributor's open pull request count by `change`, never below zero"""
+        cls.row(repository, login).update(
+            open_pull_requests=Greatest(F('open_pull_requests') + change, 0)
+        )
+
+    @classmethod
+    def link_student(cls, student):
+        """Attach rows recorded before the student's GitHub handle was known
+
+        Returns:
+            int: Rows linked
+        """
+        if not student.github_handle:
+            return 0
+
+        return cls.objects \
+            .filter(login=student.github_handle.lower(), student__isnull=True) \
+            .update(student=student)
@@ -0,0 +1,42 @@
+"""Slack messages waiting to be delivered by the outbox dispatcher"""
+from django.db import models
+from django.utils import timezone
+
+
+class SlackOutboxMessage(models.Model):
+    """A chat.postMessage call recorded by a request and sent later
+
+    Views insert rows instead of calling Slack. The dispatch_slack_outbox
+    command sends them, retrying with backoff, and records the outcome.
+    Rows marked `digest` are held until `next_attempt_at` and then posted
+    together with every other due digest row for the same channel.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    channel = models.CharField(max_length=55)
+    text = models.TextField()
+    digest = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=255, null=True, blank=True)
+    ts = models.CharField(max_length=55, null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    sent_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='slack_outbox_due_idx'),
+            models.Index(fields=['channel', 'status'], name='slack_outbox_digest_idx',
+                         condition=models.Q(digest=True)),
+        ]
+
+    def __str__(self) -> str:
+        return f'Slack message {self.id} to {self.channel} ({self.status})'
@@ -2,8 +2,21 @@ from django.db import models
 
 class StudentTeam(models.Model):
     """ This class is used to create a student team for a cohort """
+    MIGRATION_PENDING = 'pending'
+    MIGRATION_ACKED = 'acked'
+    MIGRATION_FAILED = 'failed'
+    MIGRATION_STATUSES = (
+        (MIGRATION_PENDING, 'Pending'),
+        (MIGRATION_ACKED, 'Acknowledged'),
+        (MIGRATION_FAILED, 'Failed'),
+    )
+
     group_name = models.CharField(max_length=55)
     cohort = models.ForeignKey("Cohort", on_delete=models.CASCADE)
     sprint_team = models.BooleanField(default=False)
     slack_channel = models.CharField(max_length=55, default="")
     students = models.ManyToManyField("NSSUser", through="NSSUserTeam")
+    # Ticket migration stream entry most recently added for this team
+    migration_message_id = models.CharField(max_length=32, null=True, blank=True)
+    migration_status = models.CharField(max_length=10, choices=MIGRATION_STATUSES, null=True, blank=True)
+    migration_requested_on = models.DateTimeField(null=True, blank=True)
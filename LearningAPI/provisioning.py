@@ -0,0 +1,374 @@
+"""Valkey-backed queue and step runner for provisioning jobs
+
+Views create a ProvisioningJob and call `enqueue()`. The
+`run_provisioning_worker` management command pops job ids off the
+Valkey list and runs the matching provisioner step by step.
+"""
+from datetime import timedelta
+
+import valkey
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from LearningAPI.github_client import GithubClient, GithubRateLimited
+from LearningAPI.models.coursework import Project
+from LearningAPI.models.people import (GroupProjectRepository, ProvisioningJob,
+                                       StudentAssessment, StudentTeam)
+from LearningAPI.slack_channels import SlackChannelService
+from LearningAPI.slack_outbox import queue_instructor_message, queue_slack_message
+from LearningAPI.ticket_migration import request_ticket_migration
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("provisioning")
+
+QUEUE_KEY = 'provisioning_jobs'
+
+# Queued jobs older than this that are still not running are pushed onto the
+# list again, in case the original push was lost
+REQUEUE_AFTER = timedelta(minutes=2)
+
+# A running job's claim lapses if its worker records no progress for this
+# long, so the job is retried after the worker crashes or is redeployed
+LEASE = timedelta(minutes=10)
+
+
+class ProvisioningError(Exception):
+    """A step failed in a way that retrying will not fix"""
+
+
+def enqueue(job):
+    """Push a job onto the queue once the transaction that created it commits"""
+    job_id = job.id
+
+    def push():
+        try:
+            valkey_client.lpush(QUEUE_KEY, job_id)
+        except valkey.exceptions.ValkeyError as ex:
+            # The worker's sweep of due jobs will still find it
+            logger.warning("provisioning_enqueue_failed", job_id=job_id, error=str(ex))
+
+    transaction.on_commit(push)
+
+
+def next_job_id(timeout):
+    """Block for up to `timeout` seconds for the next queued job id"""
+    item = valkey_client.brpop(QUEUE_KEY, timeout=timeout)
+    return int(item[1]) if item else None
+
+
+def requeue_due_jobs():
+    """Push jobs whose deferral has expired, whose push was lost, or whose
+    worker stopped holding its lease, back onto the queue"""
+    now = timezone.now()
+
+    # Jobs claimed before leases existed have none and are treated as lapsed
+    abandoned = ProvisioningJob.objects.filter(
+        Q(lease_until__lt=now) | Q(lease_until__isnull=True),
+        status=ProvisioningJob.RUNNING
+    )
+    abandoned_ids = list(abandoned.values_list('id', flat=True))
+    if abandoned_ids:
+        # Filtered again so a job whose worker just renewed its lease is left alone
+        abandoned.filter(pk__in=abandoned_ids).update(status=ProvisioningJob.QUEUED, available_at=now)
+        logger.warning("provisioning_lease_expired", job_ids=abandoned_ids)
+
+    due = ProvisioningJob.objects \
+        .filter(status=ProvisioningJob.QUEUED, available_at__lte=now - REQUEUE_AFTER) \
+        .values_list('id', flat=True)
+    deferred = ProvisioningJob.objects \
+        .filter(status=ProvisioningJob.QUEUED, attempts__gt=0, available_at__lte=now) \
+        .values_list('id', flat=True)
+
+    job_ids = set(due).union(deferred, abandoned_ids)
+    if job_ids:
+        valkey_client.lpush(QUEUE_KEY, *job_ids)
+
+    return len(job_ids)
+
+
+class JobRun:
+    """Runs the steps of one job, skipping steps finished on an earlier attempt"""
+
+    def __init__(self, job):
+        self.job = job
+
+    def save(self):
+        """Write the step progress and renew the job's lease"""
+        self.job.lease_until = timezone.now() + LEASE
+        self.job.save(update_fields=['steps', 'lease_until'])
+
+    def record(self, name, status, result=None, detail=None, save=True):
+        steps = [step for step in self.job.steps if step['name'] != name]
+        steps.append({
+            'name': name,
+            'status': status,
+            'result': result,
+            'detail': detail,
+            'at': timezone.now().isoformat(),
+        })
+        self.job.steps = steps
+
+        if save:
+            self.save()
+
+    def is_done(self, name):
+        return any(step['name'] == name and step['status'] == 'done' for step in self.job.steps)
+
+    def step(self, name, func, *args, **kwargs):
+        """Run one named step once and remember what it returned"""
+        if self.is_done(name):
+            return self.job.step_result(name)
+
+        self.record(name, 'running')
+
+        try:
+            result = func(*args, **kwargs)
+        except GithubRateLimited as ex:
+            self.record(name, 'deferred', detail=f'GitHub rate limit, retrying in {ex.wait} seconds')
+            raise
+        except Exception as ex:
+            self.record(name, 'failed', detail=str(ex))
+            raise
+
+        self.record(name, 'done', result=result)
+        return result
+
+    def github_steps(self, client, calls, on_response, required=True):
+        """Run several single-request GitHub steps at once
+
+        Args:
+            client (GithubClient): Sends the requests
+            calls (dict): step name -> (method, url, data)
+            on_response (callable): Called with each response on the worker's
+                own thread. Returns the step result or raises ProvisioningError.
+            required (bool): Fail the job when any step fails. Rate limit
+                deferrals always stop the job so it can resume later.
+
+        Returns:
+            dict: step name -> result of every step that is done
+        """
+        pending = {name: call for name, call in calls.items() if not self.is_done(name)}
+        for name in pending:
+            self.record(name, 'running', save=False)
+        self.save()
+
+        waits = []
+        failures = []
+        for name, outcome in client.batch(pending.items()).items():
+            if isinstance(outcome.error, GithubRateLimited):
+                waits.append(outcome.error.wait)
+                self.record(name, 'deferred', save=False,
+                            detail=f'GitHub rate limit, retrying in {outcome.error.wait} seconds')
+                continue
+
+            try:
+                if outcome.error is not None:
+                    raise ProvisioningError(str(outcome.error))
+                self.record(name, 'done', result=on_response(outcome.response), save=False)
+            except ProvisioningError as ex:
+                failures.append(name)
+                self.record(name, 'failed', detail=str(ex), save=False)
+            except Exception as ex:
+                self.record(name, 'failed', detail=str(ex))
+                raise
+
+        self.save()
+
+        if waits:
+            raise GithubRateLimited(max(waits))
+        if failures and required:
+            raise ProvisioningError(f'{len(failures)} GitHub call(s) failed: {", ".join(failures)}')
+
+        return {name: self.job.step_result(name) for name in calls if self.is_done(name)}
+
+
+def run_job(job_id):
+    """Claim and run one job. Returns False if another worker already has it."""
+    now = timezone.now()
+    claimed = ProvisioningJob.objects \
+        .filter(pk=job_id, status=ProvisioningJob.QUEUED, available_at__lte=now) \
+        .update(status=ProvisioningJob.RUNNING, started_on=now, lease_until=now + LEASE)
+    if not claimed:
+        return False
+
+    job = ProvisioningJob.objects.get(pk=job_id)
+    job.attempts += 1
+    job.save(update_fields=['attempts'])
+
+    try:
+        PROVISIONERS[job.kind](JobRun(job), job.payload)
+    except GithubRateLimited as ex:
+        job.status = ProvisioningJob.QUEUED
+        job.available_at = timezone.now() + timedelta(seconds=ex.wait)
+        job.save(update_fields=['status', 'available_at'])
+        logger.info("provisioning_job_deferred", job_id=job.id, wait=ex.wait)
+        return True
+    except Exception as ex:  # pylint: disable=broad-except
+        job.status = ProvisioningJob.FAILED
+        job.error = str(ex)
+        job.finished_on = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_on'])
+        logger.exception("provisioning_job_failed", job_id=job.id, kind=job.kind)
+        return True
+
+    job.status = ProvisioningJob.SUCCEEDED
+    job.finished_on = timezone.now()
+    job.save(update_fields=['status', 'finished_on'])
+    logger.info("provisioning_job_succeeded", job_id=job.id, kind=job.kind)
+    return True
+
+
+def send_slack_message(channel, text):
+    """Hand a message to the Slack outbox. The step result is the outbox row id."""
+    message = queue_slack_message(channel=channel, text=text)
+    return message.id if message else None
+
+
+def send_instructor_message(cohort_id, channel, text):
+    """Like send_slack_message, but folded into the cohort's digest when it has one"""
+    message = queue_instructor_message(cohort_id=cohort_id, channel=channel, text=text)
+    return message.id if message else None
+
+
+def create_team_channel(team, channel_name, student_ids):
+    team.slack_channel = SlackChannelService().create_channel(channel_name, student_ids)
+    team.save(update_fields=['slack_channel'])
+    return team.slack_channel
+
+
+def provision_team(run, payload):
+    """Slack channel, group project repositories and ticket migration for a new team
+
+    Both template repositories are generated at once, then every
+    collaborator grant on either repository is sent at once. Only the
+    client repository is required. If the API repository cannot be
+    created, its step is marked failed and the rest of the team is set up.
+    """
+    team = StudentTeam.objects \
+        .select_related('cohort__info') \
+        .prefetch_related('students') \
+        .get(pk=payload['team_id'])
+    cohort = team.cohort
+
+    channel = run.step('slack_channel', create_team_channel,
+                       team, payload['channel_name'], payload['student_ids'])
+    team.slack_channel = channel
+
+    if payload.get('project_id') is None:
+        return
+
+    project = Project.objects.get(pk=payload['project_id'])
+    student_org_url = cohort.info.student_organization_url
+    student_org_name = student_org_url.split("/")[-1]
+    repositories = {'client': (project.client_template_url, payload['client_repo_name'])}
+
+    if project.api_template_url:
+        repositories['api'] = (project.api_template_url, payload['api_repo_name'])
+
+    gh_request = GithubClient()
+
+    def repository_created(response):
+        if response.status_code != 201:
+            raise ProvisioningError(f'Failed to create repository: {response.status_code}')
+
+        repository_url = response.json()['html_url']
+        GroupProjectRepository.objects.create(team=team, project=project, repository=repository_url)
+        return repository_url
+
+    repository_urls = run.github_steps(gh_request, {
+        f'{label}_repository': gh_request.create_repository_call(template_url, student_org_url, repo_name, project.name)
+        for label, (template_url, repo_name) in repositories.items()
+    }, repository_created, required=False)
+
+    if 'client_repository' not in repository_urls:
+        raise ProvisioningError('Failed to create the client repository')
+
+    repositories = {
+        label: repository for label, repository in repositories.items()
+        if f'{label}_repository' in repository_urls
+    }
+
+    def collaborator_added(response):
+        if response.status_code not in (201, 204):
+            raise ProvisioningError(f'Collaborator not added: {response.status_code}')
+        return response.status_code
+
+    # A failed grant is reported on its step but does not hold up the team
+    run.github_steps(gh_request, {
+        f'{label}_collaborator:{student.github_handle}':
+            gh_request.student_permissions_call(student_org_name, repo_name, student)
+        for label, (_, repo_name) in repositories.items()
+        for student in team.students.all()
+    }, collaborator_added, required=False)
+
+    for label in repositories:
+        run.step(
+            f'{label}_announcement',
+            send_slack_message,
+            text=f"🐙 Your {'client' if label == 'client' else 'API'} repository has been created. Visit the URL below and clone the project to your machine.\n\n{repository_urls[f'{label}_repository']}",
+            channel=team.slack_channel
+        )
+
+    run.step('ticket_migration', request_ticket_migration, team,
+             notification_channel=cohort.slack_channel,
+             source_repo="/".join(project.client_template_url.split('/')[-2:]),
+             target_repositories=[f"{student_org_name}/{repositories['client'][1]}"])
+
+
+def provision_assessment(run, payload):
+    """Self-assessment repository for a student who started a book assessment"""
+    student_assessment = StudentAssessment.objects \
+        .select_related('assessment__book', 'student') \
+        .get(pk=payload['student_assessment_id'])
+    student = student_assessment.student
+    assessment = student_assessment.assessment
+
+    gh_request = GithubClient()
+    ( org, repo, ) = assessment.source_url.split('/')[-2:]
+    student_org_name = payload['student_org_name']
+    repo_name = payload['repo_name']
+
+    def generate_repository():
+        response = gh_request.post(url=f'/repos/{org}/{repo}/generate', data={
+            "owner": student_org_name,
+            "name": repo_name,
+            "description": f"This is your self-assessment repository for the {assessment.book.name} book",
+            "include_all_branches": False,
+            "private": False
+        })
+        if response.status_code != 201:
+            raise ProvisioningError(f'Failed to create repository {repo_name}: {response.status_code}')
+
+    def add_collaborator():
+        response = gh_request.put(
+            url=f'/repos/{student_org_name}/{repo_name}/collaborators/{student.github_handle}',
+            data={ "permission":"write" }
+        )
+        if response.status_code != 204:
+            raise ProvisioningError('Student was not added as a collaborator to the assessment repository.')
+
+        student_assessment.url = f'https://github.com/{student_org_name}/{repo_name}'
+        student_assessment.save()
+        return student_assessment.url
+
+    run.step('repository', generate_repository)
+    created_repo_url = run.step('collaborator', add_collaborator)
+
+    run.step(
+        'student_message', send_slack_message,
+        text=f"🐙 Your self-assessment repository has been created. Visit the URL below and clone the project to your machine.\n\n{created_repo_url}",
+        channel=student.slack_handle
+    )
+    run.step(
+        'instructor_message', send_instructor_message,
+        cohort_id=payload.get('cohort_id'),
+        text=f"📝 {student.full_name} has started the self-assessment for {assessment.name}.",
+        channel=payload['instructor_channel']
+    )
+
+
+PROVISIONERS = {
+    ProvisioningJob.TEAM: provision_team,
+    ProvisioningJob.ASSESSMENT: provision_assessment,
+}
@@ -0,0 +1,56 @@
+"""Batch learning score calculation"""
+from collections import defaultdict
+
+from LearningAPI.models.skill import CoreSkillRecord, LearningRecord
+
+# Rows fetched per round trip while summing
+CHUNK_SIZE = 2000
+
+
+def score_many(student_ids):
+    """Learning scores of many students, computed fresh from two queries
+
+    Uses the same formula as `NssUser.refresh_scores()`: the sum of achieved
+    objective weights, raised by the mean core skill level as a percent
+    (a mean of 5 adds 50%), rounded half to even like Python's round().
+
+    Exports and views read the stored NssUser columns, which signal
+    handlers keep current. This independent calculation is what
+    `recompute_scores --verify` checks those columns against.
+
+    Args:
+        student_ids (iterable): NssUser primary keys
+
+    Returns:
+        dict: student id -> {'technical_score', 'core_skill_mean', 'score'}
+    """
+    ids = set(student_ids)
+    if not ids:
+        return {}
+
+    technical = defaultdict(int)
+    for student_id, weight in LearningRecord.objects \
+            .filter(student_id__in=ids, achieved=True) \
+            .values_list('student_id', 'weight__weight') \
+            .iterator(chunk_size=CHUNK_SIZE):
+        technical[student_id] += weight
+
+    level_totals = defaultdict(int)
+    level_counts = defaultdict(int)
+    for student_id, level in CoreSkillRecord.objects \
+            .filter(student_id__in=ids) \
+            .values_list('student_id', 'level') \
+            .iterator(chunk_size=CHUNK_SIZE):
+        level_totals[student_id] += level
+        level_counts[student_id] += 1
+
+    scores = {}
+    for student_id in ids:
+        mean = level_totals[student_id] / level_counts[student_id] if level_counts[student_id] else None
+        scores[student_id] = {
+            'technical_score': technical[student_id],
+            'core_skill_mean': mean,
+            'score': technical[student_id] if mean is None else round(technical[student_id] * (1 + mean / 10)),
+        }
+
+    return scores
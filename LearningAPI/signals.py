@@ -0,0 +1,205 @@
+"""Signal handlers that keep denormalized data and caches in step with the models they are built from"""
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from LearningAPI.authentication import invalidate_token, invalidate_user_tokens
+
+from LearningAPI.models import Tag
+from LearningAPI.models.coursework import StudentProject, Capstone, CapstoneTimeline
+from LearningAPI.models.people import (NssUser, NssUserCohort, StudentNote, StudentNoteType, StudentTag,
+                                       StudentAssessment, CohortStudentSnapshot, RepositoryActivity)
+from LearningAPI.models.skill import CoreSkillRecord, LearningRecord, LearningWeight
+from LearningAPI.utils import publish_cohort_event
+
+DASHBOARD_EVENT_TYPES = {
+    StudentNote: 'note',
+    StudentTag: 'tag',
+    StudentProject: 'project',
+    StudentAssessment: 'assessment',
+    Capstone: 'capstone',
+    CapstoneTimeline: 'capstone',
+    LearningRecord: 'record',
+    NssUserCohort: 'membership',
+    User: 'profile',
+    NssUser: 'profile',
+    SocialAccount: 'profile',
+    Tag: 'tag',
+    StudentNoteType: 'note',
+}
+
+
+def refresh_dashboard_snapshot(student_id, event_type):
+    """Rebuild a student's cohort dashboard rows once the current transaction commits
+
+    Every cohort whose rows changed then gets a change event on its
+    Valkey channel for the live dashboard stream.
+    """
+    if student_id is None:
+        return
+
+    def refresh():
+        cohort_ids = CohortStudentSnapshot.refresh_for_student(student_id)
+        publish_cohort_event(cohort_ids, {'type': event_type, 'student': student_id})
+
+    transaction.on_commit(refresh)
+
+
+def refresh_dashboard_snapshots(student_ids, event_type):
+    """Rebuild the cohort dashboard rows of several students once the current transaction commits"""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+
+    def refresh():
+        for student_id in student_ids:
+            cohort_ids = CohortStudentSnapshot.refresh_for_student(student_id)
+            publish_cohort_event(cohort_ids, {'type': event_type, 'student': student_id})
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=StudentNote)
+@receiver(post_delete, sender=StudentNote)
+@receiver(post_save, sender=StudentTag)
+@receiver(post_delete, sender=StudentTag)
+@receiver(post_save, sender=StudentProject)
+@receiver(post_delete, sender=StudentProject)
+@receiver(post_save, sender=StudentAssessment)
+@receiver(post_delete, sender=StudentAssessment)
+@receiver(post_save, sender=Capstone)
+@receiver(post_delete, sender=Capstone)
+@receiver(post_save, sender=LearningRecord)
+@receiver(post_delete, sender=LearningRecord)
+def student_dashboard_changed(sender, instance, **kwargs):
+    refresh_dashboard_snapshot(instance.student_id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=CapstoneTimeline)
+@receiver(post_delete, sender=CapstoneTimeline)
+def capstone_status_changed(sender, instance, **kwargs):
+    student_id = Capstone.objects.filter(pk=instance.capstone_id) \
+        .values_list('student_id', flat=True) \
+        .first()
+    refresh_dashboard_snapshot(student_id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=NssUserCohort)
+@receiver(post_delete, sender=NssUserCohort)
+def cohort_membership_changed(sender, instance, **kwargs):
+    refresh_dashboard_snapshot(instance.nss_user_id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=User)
+def user_name_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches `last_login`, which is not on the dashboard
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+
+    student_id = NssUser.objects.filter(user=instance).values_list('id', flat=True).first()
+    refresh_dashboard_snapshot(student_id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=NssUser)
+def student_profile_changed(sender, instance, **kwargs):
+    # Score columns are written with update() and never reach this handler
+    refresh_dashboard_snapshot(instance.id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=NssUser)
+def github_handle_changed(sender, instance, **kwargs):
+    # Webhook activity may have arrived before the handle was filled in
+    RepositoryActivity.link_student(instance)
+
+
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def social_account_changed(sender, instance, **kwargs):
+    # The dashboard avatar comes from the GitHub account's extra data
+    student_id = NssUser.objects.filter(user_id=instance.user_id).values_list('id', flat=True).first()
+    refresh_dashboard_snapshot(student_id, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=Tag)
+def tag_renamed(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    student_ids = StudentTag.objects.filter(tag=instance).values_list('student_id', flat=True).distinct()
+    refresh_dashboard_snapshots(student_ids, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=StudentNoteType)
+def note_type_renamed(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    student_ids = StudentNote.objects.filter(note_type=instance).values_list('student_id', flat=True).distinct()
+    refresh_dashboard_snapshots(student_ids, DASHBOARD_EVENT_TYPES[sender])
+
+
+@receiver(post_save, sender=LearningRecord)
+@receiver(post_delete, sender=LearningRecord)
+@receiver(post_save, sender=CoreSkillRecord)
+@receiver(post_delete, sender=CoreSkillRecord)
+def learning_score_changed(sender, instance, **kwargs):
+    # Runs before the on_commit snapshot refresh, which reads the new score
+    NssUser.refresh_scores([instance.student_id])
+
+
+@receiver(post_save, sender=LearningWeight)
+def learning_weight_changed(sender, instance, **kwargs):
+    student_ids = list(
+        LearningRecord.objects.filter(weight=instance, achieved=True)
+        .values_list('student_id', flat=True)
+    )
+    if not student_ids:
+        return
+
+    NssUser.refresh_scores(student_ids)
+
+    # A reweighted objective can touch hundreds of students, so their
+    # dashboard rows get the new score in one statement, not one rebuild each
+    CohortStudentSnapshot.objects.filter(student_id__in=student_ids).update(
+        score=Subquery(
+            NssUser.objects.filter(pk=OuterRef('student_id')).values('technical_score')[:1]
+        ),
+        updated_on=Now(),
+    )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Covers logout, which deletes the caller's token
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+
+    user_id = instance.id
+    transaction.on_commit(lambda: invalidate_user_tokens([user_id]))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        user_ids = [instance.id]
+    elif action == 'pre_clear':
+        # The group is being emptied and pk_set is not provided
+        user_ids = list(instance.user_set.values_list('id', flat=True))
+    else:
+        user_ids = list(pk_set)
+
+    transaction.on_commit(lambda: invalidate_user_tokens(user_ids))
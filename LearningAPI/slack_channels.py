@@ -0,0 +1,179 @@
+"""Batched Slack channel setup and teardown for student teams
+
+Member handles are resolved with one query, invitees are checked against
+a cached copy of the Slack user directory, and channels for many teams are
+created or archived concurrently. Every call waits on the shared
+`slack_limits.limiter` for its method's rate tier.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import valkey
+
+from LearningAPI.models.people import NssUser
+from LearningAPI.slack_limits import limiter
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("slack_channels")
+
+SLACK_API_URL = 'https://slack.com/api'
+
+DIRECTORY_KEY = 'slack:active_users'
+DIRECTORY_TTL = 60 * 60
+
+MAX_CONCURRENCY = 8
+
+
+class SlackError(Exception):
+    """Slack answered with ok: false"""
+
+    def __init__(self, method, body):
+        super().__init__(f'{method}: {body.get("error", "unknown_error")}')
+        self.error = body.get('error', 'unknown_error')
+        self.body = body
+
+
+class SlackChannelService:
+    """Creates, fills and archives team channels"""
+
+    def __init__(self, token=None):
+        self.token = token or os.getenv("SLACK_BOT_TOKEN")
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {self.token}'})
+
+    def call(self, method, **data):
+        """POST one Web API method, waiting for its rate tier and once on 429
+
+        Raises:
+            SlackError: Slack answered ok: false
+            requests.RequestException: The call never completed
+        """
+        for _ in range(2):
+            limiter.acquire(method)
+
+            response = self.session.post(f'{SLACK_API_URL}/{method}', data=data, timeout=10)
+
+            if response.status_code != 429:
+                break
+
+            retry_after = int(response.headers.get('Retry-After', 30))
+            logger.warning("slack_api_rate_limited", api_endpoint=method, retry_after=retry_after)
+            limiter.pause(method, retry_after)
+
+        response.raise_for_status()
+        body = response.json()
+
+        if not body.get('ok', False):
+            raise SlackError(method, body)
+
+        return body
+
+    def active_user_ids(self):
+        """Ids of every active, non-bot workspace member, cached in Valkey for an hour
+
+        Returns None when the directory cannot be read, so callers can skip
+        the check rather than invite nobody.
+        """
+        try:
+            if valkey_client.exists(DIRECTORY_KEY):
+                return {member.decode() for member in valkey_client.smembers(DIRECTORY_KEY)}
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("slack_directory_cache_unavailable", error=str(ex))
+
+        active = set()
+        cursor = ''
+
+        try:
+            while True:
+                body = self.call('users.list', limit=200, cursor=cursor)
+                active.update(
+                    member['id'] for member in body['members']
+                    if not member.get('deleted') and not member.get('is_bot')
+                )
+                cursor = body.get('response_metadata', {}).get('next_cursor')
+                if not cursor:
+                    break
+        except (SlackError, requests.RequestException) as ex:
+            logger.warning("slack_directory_unavailable", error=str(ex))
+            return None
+
+        if active:
+            try:
+                pipeline = valkey_client.pipeline()
+                pipeline.delete(DIRECTORY_KEY)
+                pipeline.sadd(DIRECTORY_KEY, *active)
+                pipeline.expire(DIRECTORY_KEY, DIRECTORY_TTL)
+                pipeline.execute()
+            except valkey.exceptions.ValkeyError as ex:
+                logger.warning("slack_directory_cache_unavailable", error=str(ex))
+
+        return active
+
+    def member_slack_ids(self, member_ids):
+        """Slack ids for the given NssUser ids, in one query
+
+        Members without a handle, or whose handle is not an active
+        workspace member, are logged and left out. Slack rejects the
+        whole invitation if any one id is invalid.
+        """
+        handles = dict(NssUser.objects.filter(pk__in=member_ids).values_list('id', 'slack_handle'))
+        directory = self.active_user_ids()
+
+        slack_ids = set()
+        skipped = []
+        for member_id in member_ids:
+            handle = handles.get(member_id)
+            if handle and (directory is None or handle in directory):
+                slack_ids.add(handle)
+            else:
+                skipped.append(member_id)
+
+        if skipped:
+            logger.warning("slack_members_skipped", member_ids=skipped)
+
+        return slack_ids
+
+    def create_channel(self, name, member_ids):
+        """Create a channel and invite the members. Returns the channel id."""
+        channel_id = self.call('conversations.create', name=name)['channel']['id']
+        logger.info("slack_channel_created_successfully", channel_name=name, channel_id=channel_id)
+
+        slack_ids = self.member_slack_ids(member_ids)
+        if slack_ids:
+            try:
+                self.call('conversations.invite', channel=channel_id, users=','.join(sorted(slack_ids)))
+                logger.info("slack_invitation_successful", channel_id=channel_id, invited_user_count=len(slack_ids))
+            except (SlackError, requests.RequestException) as ex:
+                # The channel exists, so the team can still be invited by hand
+                logger.error("slack_invitation_failed", channel_id=channel_id, error=str(ex))
+
+        return channel_id
+
+    def archive_channel(self, channel_id):
+        """Archive a channel. Returns False if Slack refused."""
+        try:
+            self.call('conversations.archive', channel=channel_id)
+        except SlackError as ex:
+            logger.error("slack_channel_deletion_failed", channel_id=channel_id, error=ex.error)
+            return False
+
+        logger.info("slack_channel_deleted_successfully", channel_id=channel_id)
+        return True
+
+    def archive_channels(self, channel_ids):
+        """Archive many channels at once. Returns channel id -> whether it was archived."""
+        channel_ids = [channel_id for channel_id in channel_ids if channel_id]
+        if not channel_ids:
+            return {}
+
+        def archive(channel_id):
+            try:
+                return self.archive_channel(channel_id)
+            except requests.RequestException as ex:
+                logger.error("slack_api_request_failed", api_endpoint="conversations.archive",
+                             channel_id=channel_id, error=str(ex))
+                return False
+
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(channel_ids))) as executor:
+            return dict(zip(channel_ids, executor.map(archive, channel_ids)))
@@ -0,0 +1,180 @@
+"""Slack Web API rate limiting shared by every process
+
+The outbox dispatcher, the provisioning worker's threads and the gunicorn
+workers all take a slot from `limiter` before each call. Slots are counted
+in Valkey, in one fixed window per method (and per channel for
+chat.postMessage), so together they stay within Slack's tier for the
+method. After a 429, every caller of that method waits out Retry-After.
+
+While Valkey is unreachable, each process falls back to a token bucket of
+its own at the same rate. Until Valkey is back, the combined rate can
+then exceed the tier by the number of processes calling the method.
+"""
+import threading
+import time
+
+import valkey
+
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("slack_limits")
+
+WINDOW_KEY_PREFIX = 'slack:rate:'
+PAUSE_KEY_PREFIX = 'slack:paused:'
+
+# Calls allowed in each window of so many seconds, by the method's Slack
+# rate tier. chat.postMessage is limited per channel to about one message
+# a second.
+METHOD_TIERS = {
+    'chat.postMessage': (1, 1),
+    'conversations.archive': (20, 60),
+    'conversations.create': (20, 60),
+    'conversations.invite': (50, 60),
+    'users.list': (20, 60),
+}
+
+# Methods whose budget applies to each channel separately
+PER_CHANNEL_METHODS = {'chat.postMessage'}
+
+
+class TokenBucket:
+    """Thread-safe limiter refilled at `per_minute`, holding at most `burst` calls"""
+
+    def __init__(self, per_minute, burst):
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def blocked_for(self):
+        """Seconds before a token is free, or 0"""
+        with self.lock:
+            self.refill()
+            return max((1 - self.tokens) / self.rate, 0)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self.refill()
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class SlackRateLimiter:
+    """Shared call windows per method, or per method and channel, with a local fallback"""
+
+    def __init__(self, tiers=None):
+        self.tiers = tiers or METHOD_TIERS
+        self.buckets = {}
+        self.paused_until = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def scope(method, channel=None):
+        return f'{method}:{channel}' if method in PER_CHANNEL_METHODS and channel else method
+
+    def bucket(self, method, channel=None):
+        """This process's fallback bucket for the method"""
+        key = self.scope(method, channel)
+        with self.lock:
+            if key not in self.buckets:
+                calls, seconds = self.tiers[method]
+                self.buckets[key] = TokenBucket(calls * 60 / seconds, calls)
+            return self.buckets[key]
+
+    def window_wait(self, method, channel=None, take=False):
+        """Seconds until the method's current window has a free call, or 0
+
+        With `take`, a free call is used up. Calls made while the window is
+        full are counted too, which only matters until the window ends.
+
+        Raises:
+            valkey.exceptions.ValkeyError: The shared windows are unavailable
+        """
+        calls, seconds = self.tiers[method]
+        now = time.time()
+        window = int(now // seconds)
+        key = f'{WINDOW_KEY_PREFIX}{self.scope(method, channel)}:{window}'
+
+        if take:
+            pipeline = valkey_client.pipeline()
+            pipeline.incr(key)
+            pipeline.expire(key, seconds * 2)
+            made = pipeline.execute()[0]
+            if made <= calls:
+                return 0
+        elif int(valkey_client.get(key) or 0) < calls:
+            return 0
+
+        return (window + 1) * seconds - now
+
+    def paused_for(self, method):
+        local = max(self.paused_until.get(method, 0) - time.monotonic(), 0)
+
+        try:
+            shared = max(valkey_client.pttl(f'{PAUSE_KEY_PREFIX}{method}'), 0) / 1000
+        except valkey.exceptions.ValkeyError:
+            shared = 0
+
+        return max(local, shared)
+
+    def blocked_for(self, method, channel=None):
+        """Seconds before `method` may be called, or 0"""
+        paused = self.paused_for(method)
+        if method not in self.tiers:
+            return paused
+
+        try:
+            wait = self.window_wait(method, channel)
+        except valkey.exceptions.ValkeyError:
+            wait = self.bucket(method, channel).blocked_for()
+
+        return max(paused, wait)
+
+    def acquire(self, method, channel=None):
+        """Wait until `method` may be called and take one of its calls"""
+        while True:
+            time.sleep(self.paused_for(method))
+
+            if method not in self.tiers:
+                return
+
+            try:
+                wait = self.window_wait(method, channel, take=True)
+            except valkey.exceptions.ValkeyError as ex:
+                logger.warning("slack_rate_limit_unavailable", api_endpoint=method, error=str(ex))
+                self.bucket(method, channel).acquire()
+                return
+
+            if not wait:
+                return
+
+            time.sleep(wait)
+
+    def pause(self, method, seconds):
+        """Hold every call to `method` for `seconds`, as Slack asked in Retry-After"""
+        with self.lock:
+            self.paused_until[method] = max(self.paused_until.get(method, 0), time.monotonic() + seconds)
+
+        try:
+            if valkey_client.pttl(f'{PAUSE_KEY_PREFIX}{method}') < seconds * 1000:
+                valkey_client.set(f'{PAUSE_KEY_PREFIX}{method}', 1, px=int(seconds * 1000))
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("slack_rate_limit_unavailable", api_endpoint=method, error=str(ex))
+
+
+# Every Slack caller in the process uses this one, and through Valkey
+# every process throttles together
+limiter = SlackRateLimiter()
@@ -0,0 +1,235 @@
+"""Durable outbox for Slack messages
+
+Request handlers call `queue_slack_message()`, which only inserts a row.
+The `dispatch_slack_outbox` management command delivers the rows over one
+pooled HTTP session, waiting on the shared `slack_limits.limiter` and
+retrying transient failures with exponential backoff.
+
+Instructor channel notifications go through `queue_instructor_message()`.
+For cohorts with a digest interval they are held and posted as one message.
+"""
+import os
+import time
+from datetime import timedelta
+
+import requests
+import valkey
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from LearningAPI.models.people import CohortInfo, SlackOutboxMessage
+from LearningAPI.slack_limits import limiter
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("slack_outbox")
+
+SLACK_API_URL = 'https://slack.com/api'
+
+# Wakes the dispatcher as soon as a message is queued. The dispatcher also
+# polls the table, so a lost push only delays delivery.
+WAKE_KEY = 'slack_outbox'
+
+# Most notifications folded into one digest post
+DIGEST_MAX_MESSAGES = 50
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 5
+BACKOFF_MAX = 15 * 60
+
+# Slack errors that will fail the same way on every retry
+PERMANENT_ERRORS = {
+    'channel_not_found', 'not_in_channel', 'is_archived', 'msg_too_long',
+    'no_text', 'invalid_auth', 'account_inactive', 'token_revoked',
+    'restricted_action', 'user_not_found',
+}
+
+
+def queue_slack_message(channel, text, digest_minutes=0):
+    """Record a message for the dispatcher and return the outbox row
+
+    With `digest_minutes`, the message waits to be posted along with the
+    channel's other digest messages. The first one starts the clock.
+
+    Messages without a channel, such as for students who never linked
+    Slack, are dropped with a warning rather than queued to fail later.
+    """
+    if not channel:
+        logger.warning("slack_message_without_channel", message_length=len(text))
+        return None
+
+    if digest_minutes:
+        flush_at = SlackOutboxMessage.objects \
+            .filter(channel=channel, status=SlackOutboxMessage.PENDING, digest=True) \
+            .aggregate(flush_at=Min('next_attempt_at'))['flush_at']
+
+        return SlackOutboxMessage.objects.create(
+            channel=channel,
+            text=text,
+            digest=True,
+            next_attempt_at=flush_at or timezone.now() + timedelta(minutes=digest_minutes)
+        )
+
+    message = SlackOutboxMessage.objects.create(channel=channel, text=text)
+
+    def wake():
+        try:
+            valkey_client.lpush(WAKE_KEY, message.id)
+        except valkey.exceptions.ValkeyError as ex:
+            logger.warning("slack_outbox_wake_failed", error=str(ex))
+
+    transaction.on_commit(wake)
+    return message
+
+
+def queue_instructor_message(cohort_id, channel, text):
+    """Notify a cohort's instructor channel, in a digest if the cohort has one configured"""
+    digest_minutes = CohortInfo.objects \
+        .filter(cohort_id=cohort_id) \
+        .values_list('instructor_digest_minutes', flat=True) \
+        .first()
+
+    return queue_slack_message(channel, text, digest_minutes=digest_minutes or 0)
+
+
+def digest_text(messages):
+    if len(messages) == 1:
+        return messages[0].text
+
+    updates = "\n\n".join(f"• {message.text}" for message in messages)
+    return f"📋 {len(messages)} updates since {timezone.localtime(messages[0].created_on):%H:%M}\n\n{updates}"
+
+
+def wait_for_messages(timeout):
+    """Block until a message is queued or `timeout` seconds pass"""
+    try:
+        if valkey_client.brpop(WAKE_KEY, timeout=timeout):
+            # Several queued messages are sent in one pass, so drop the rest
+            valkey_client.delete(WAKE_KEY)
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("slack_outbox_wake_failed", error=str(ex))
+        time.sleep(timeout)
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+class SlackRateLimited(Exception):
+    """Slack answered 429. Every call to the method waits `retry_after` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limited for {retry_after} seconds')
+        self.retry_after = retry_after
+
+
+class SlackDispatcher:
+    """Sends due outbox rows over one keep-alive session"""
+
+    def __init__(self, token=None, batch_size=100):
+        self.token = token or os.getenv("SLACK_BOT_TOKEN")
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {self.token}'})
+
+    def call(self, method, **data):
+        """POST one Slack Web API method and return its JSON body
+
+        Raises:
+            SlackRateLimited: Slack answered 429
+            requests.RequestException: The call never completed
+        """
+        response = self.session.post(f'{SLACK_API_URL}/{method}', data=data, timeout=10)
+
+        if response.status_code == 429:
+            retry_after = int(response.headers.get('Retry-After', 30))
+            limiter.pause(method, retry_after)
+            raise SlackRateLimited(retry_after)
+
+        response.raise_for_status()
+        return response.json()
+
+    def due_messages(self):
+        return list(SlackOutboxMessage.objects
+                    .filter(status=SlackOutboxMessage.PENDING, next_attempt_at__lte=timezone.now())
+                    .order_by('next_attempt_at', 'id')[:self.batch_size])
+
+    def dispatch(self):
+        """Send every due message once. Returns how many posts were attempted."""
+        messages = self.due_messages()
+        handled = set()
+        attempted = 0
+
+        for message in messages:
+            if message.id in handled:
+                continue
+
+            if limiter.blocked_for('chat.postMessage', message.channel) > 5:
+                # Another channel's message may be free to go. This one
+                # stays due and is picked up on the next pass.
+                continue
+
+            group = self.digest_group(message) if message.digest else [message]
+            handled.update(item.id for item in group)
+
+            self.deliver(group, digest_text(group))
+            attempted += 1
+
+        return attempted
+
+    def digest_group(self, message):
+        """Every due digest message for the message's channel, oldest first"""
+        return list(SlackOutboxMessage.objects
+                    .filter(channel=message.channel, digest=True,
+                            status=SlackOutboxMessage.PENDING, next_attempt_at__lte=timezone.now())
+                    .order_by('created_on', 'id')[:DIGEST_MAX_MESSAGES])
+
+    def deliver(self, messages, text):
+        """Post `text` once on behalf of every message in the group"""
+        channel = messages[0].channel
+        limiter.acquire('chat.postMessage', channel)
+        attempts = max(message.attempts for message in messages) + 1
+
+        try:
+            body = self.call('chat.postMessage', channel=channel, text=text)
+        except SlackRateLimited as ex:
+            # Not the message's fault, so the attempt is not counted
+            self.retry(messages, attempts - 1, 'ratelimited', timedelta(seconds=ex.retry_after))
+            return
+        except requests.RequestException as ex:
+            self.retry(messages, attempts, str(ex)[:255], backoff(attempts))
+            return
+
+        if body.get('ok'):
+            self.update(messages, status=SlackOutboxMessage.SENT, attempts=attempts, ts=body.get('ts'),
+                        sent_on=timezone.now(), last_error=None)
+            logger.info("slack_message_sent_successfully", outbox_ids=[message.id for message in messages],
+                        channel=channel)
+            return
+
+        error = body.get('error', 'unknown_error')
+        if error in PERMANENT_ERRORS:
+            self.fail(messages, attempts, error)
+        else:
+            self.retry(messages, attempts, error, backoff(attempts))
+
+    def update(self, messages, **fields):
+        for message in messages:
+            for field, value in fields.items():
+                setattr(message, field, value)
+
+        SlackOutboxMessage.objects.bulk_update(messages, list(fields))
+
+    def retry(self, messages, attempts, error, delay):
+        if attempts >= MAX_ATTEMPTS:
+            self.fail(messages, attempts, error)
+            return
+
+        self.update(messages, attempts=attempts, last_error=error, next_attempt_at=timezone.now() + delay)
+        logger.warning("slack_message_retry_scheduled", outbox_ids=[message.id for message in messages],
+                       error=error, attempts=attempts, delay=delay.total_seconds())
+
+    def fail(self, messages, attempts, error):
+        self.update(messages, status=SlackOutboxMessage.FAILED, attempts=attempts, last_error=error)
+        logger.error("slack_message_send_failed", outbox_ids=[message.id for message in messages],
+                     channel=messages[0].channel, error=error, attempts=attempts)
@@ -1,3 +1,1630 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
 
-# Create your tests here.
+import requests
+import valkey
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from LearningAPI.github_client import (BUDGET_KEY, ETAG_KEY_PREFIX, ETAG_STATS_KEY, SECONDARY_LIMIT_WAIT,
+                                       GithubClient, GithubRateLimited, RateLimitBudget, etag_cache_stats)
+from LearningAPI.foundations_analytics import refresh_stale
+from LearningAPI.identity import get_identity
+from LearningAPI.management.commands.reconcile_github_membership import Command as ReconcileCommand
+from LearningAPI.models import Tag
+from LearningAPI.models.coursework import (Book, Capstone, CapstoneTimeline, CohortCourse, Course,
+                                           FoundationsExercise, FoundationsExerciseStats,
+                                           FoundationsLearnerProfile, FoundationsSolution, Project,
+                                           ProposalStatus, StudentProject)
+from LearningAPI.models.people import (Assessment, Cohort, CohortInfo, CohortStudentSnapshot,
+                                       GroupProjectRepository, NSSUserTeam, NssUser, NssUserCohort,
+                                       OneOnOneNote, ProvisioningJob, RepositoryActivity, SlackOutboxMessage,
+                                       StudentAssessment, StudentAssessmentStatus, StudentNote,
+                                       StudentNoteType, StudentTag, StudentTeam)
+from LearningAPI.models.people.cohort_student_snapshot import SNAPSHOT_FIELDS
+from LearningAPI.models.skill import (CoreSkill, CoreSkillRecord, LearningRecord,
+                                      LearningRecordEntry, LearningWeight)
+from LearningAPI.provisioning import LEASE, QUEUE_KEY, requeue_due_jobs, run_job
+from LearningAPI.slack_limits import PAUSE_KEY_PREFIX, WINDOW_KEY_PREFIX, SlackRateLimiter, limiter
+from LearningAPI.slack_outbox import (BACKOFF_BASE, MAX_ATTEMPTS, SlackDispatcher, queue_instructor_message,
+                                      queue_slack_message)
+from LearningAPI.ticket_migration import (FAILURES_KEY, GROUP, STREAM_KEY, refresh_status,
+                                           request_ticket_migration)
+from LearningAPI.utils import valkey_client
+from LearningAPI.views.cohort_stream import cohort_events
+from LearningAPI.views.github_webhook import DELIVERY_KEY_PREFIX
+from LearningAPI.views.student_view import CohortStudentSerializer
+
+
+def on_test_valkey():
+    """Whether the shared client points at the test database, so clearing keys is safe"""
+    return str(valkey_client.connection_pool.connection_kwargs['db']) == str(settings.VALKEY_TEST_DB)
+
+
+def valkey_available():
+    if not on_test_valkey():
+        return False
+
+    try:
+        return valkey_client.ping()
+    except valkey.exceptions.ValkeyError:
+        return False
+
+
+# Tests of behavior that lives in Valkey run wherever a server is reachable,
+# and only against the test database that `manage.py test` selects
+requires_valkey = skipUnless(valkey_available(), 'Valkey is not running on the test database')
+
+
+def create_cohort(number):
+    """A day cohort with its own student GitHub organization"""
+    cohort = Cohort.objects.create(
+        name=f'Day Cohort {number}', slack_channel=f'C{number}',
+        start_date='2024-01-01', end_date='2024-06-01',
+        break_start_date='2024-03-01', break_end_date='2024-03-08',
+    )
+    CohortInfo.objects.create(cohort=cohort, student_organization_url=f'https://github.com/nss-{number}')
+    return cohort
+
+
+def create_student(username, cohort=None, **fields):
+    """An NssUser named after the username, assigned to `cohort` if given"""
+    user = User.objects.create(username=username, first_name=username.title(), last_name='Learner')
+    student = NssUser.objects.create(user=user, **fields)
+    if cohort is not None:
+        NssUserCohort.objects.create(nss_user=student, cohort=cohort)
+    return student
+
+
+class StudentRetrieveQueryBudgetTests(TestCase):
+    """GET /students/{id} must not issue more queries as a student's history grows"""
+
+    # One query for the student and user plus one per prefetched relation
+    QUERY_BUDGET = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = NssUser.objects.create(
+            user=User.objects.create(username='instructor', first_name='Ida', last_name='Coach', is_staff=True)
+        )
+        cls.student = NssUser.objects.create(
+            user=User.objects.create(username='student', first_name='Sam', last_name='Learner')
+        )
+        cls.course = Course.objects.create(name='Client Side')
+
+        cohort = create_cohort(99)
+        CohortCourse.objects.create(cohort=cohort, course=cls.course, index=1, active=True)
+        NssUserCohort.objects.create(nss_user=cls.student, cohort=cohort)
+
+        cls.skill = CoreSkill.objects.create(label='Communication')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=self.instructor.user,
+            token=Token.objects.create(user=self.instructor.user)
+        )
+
+    def add_history(self, start, count):
+        """Give the student `count` more of every collection the serializer reads"""
+        for i in range(start, start + count):
+            weight = LearningWeight.objects.create(label=f'Objective {i}', weight=i + 1)
+            record = LearningRecord.objects.create(student=self.student, weight=weight, achieved=i % 2 == 0)
+            LearningRecordEntry.objects.create(record=record, note=f'Entry {i}', instructor=self.instructor)
+
+            StudentNote.objects.create(student=self.student, coach=self.instructor, note=f'Note {i}')
+            OneOnOneNote.objects.create(student=self.student, coach=self.instructor, notes=f'1:1 {i}')
+            Capstone.objects.create(student=self.student, course=self.course,
+                                    proposal_url='https://example.com', description=f'Capstone {i}')
+
+        CoreSkillRecord.objects.create(student=self.student, skill=self.skill, level=start % 10 + 1)
+
+    def retrieve(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/students/{self.student.id}')
+
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_is_constant(self):
+        self.add_history(0, 1)
+        _, baseline = self.retrieve()
+
+        self.add_history(1, 20)
+        response, grown = self.retrieve()
+
+        self.assertEqual(grown, baseline)
+        self.assertLessEqual(grown, self.QUERY_BUDGET)
+        self.assertEqual(len(response.data['records']), 21)
+        self.assertEqual(len(response.data['notes']), 21)
+        self.assertEqual(len(response.data['capstones']), 21)
+
+    def test_matches_unplanned_serialization(self):
+        self.add_history(0, 3)
+        response, _ = self.retrieve()
+
+        student = NssUser.objects.get(pk=self.student.id)
+        self.assertEqual(response.data['score'], student.score)
+        self.assertEqual(response.data['current_cohort']['name'], student.current_cohort['name'])
+        self.assertEqual(
+            list(response.data['current_cohort']['courses']),
+            list(student.current_cohort['courses'])
+        )
+        self.assertEqual(response.data['notes'][0]['author'], 'Ida Coach')
+
+
+class CohortStudentSnapshotTests(TestCase):
+    """Dashboard rows are rebuilt from the models they summarize once each change commits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(91)
+        cls.coach = create_student('coach')
+        cls.student = create_student('robin', cohort=cls.cohort, github_handle='robin-codes')
+
+        book = Book.objects.create(name='Components', course=Course.objects.create(name='React'), index=2)
+        cls.project = Project.objects.create(name='Kennel', book=book, index=3,
+                                             implementation_url='https://example.com/kennel')
+
+    def snapshot(self):
+        return CohortStudentSnapshot.objects.get(student=self.student)
+
+    def test_rebuild_summarizes_the_student(self):
+        StudentProject.objects.create(student=self.student, project=self.project)
+        StudentNote.objects.create(student=self.student, coach=self.coach, note='Pairing went well')
+        StudentTag.objects.create(student=self.student, tag=Tag.objects.create(name='Mentor'))
+
+        self.assertEqual(CohortStudentSnapshot.refresh_for_student(self.student.id), [self.cohort.id])
+
+        row = self.snapshot()
+        self.assertEqual((row.name, row.github_handle), ('Robin Learner', 'robin-codes'))
+        self.assertEqual((row.book_name, row.project_name, row.project_index), ('Components', 'Kennel', 3))
+        self.assertEqual(row.project_duration, 0)
+        self.assertEqual([note['note'] for note in row.notes], ['Pairing went well'])
+        self.assertEqual([tag['tag'] for tag in row.tags], ['Mentor'])
+
+    def test_changes_refresh_rows_when_the_transaction_commits(self):
+        CohortStudentSnapshot.refresh_for_student(self.student.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            StudentNote.objects.create(student=self.student, coach=self.coach, note='Asked about hooks')
+        self.assertEqual(self.snapshot().notes, [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual([note['note'] for note in self.snapshot().notes], ['Asked about hooks'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.user.last_name = 'Hood'
+            self.student.user.save()
+        self.assertEqual(self.snapshot().name, 'Robin Hood')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NssUserCohort.objects.filter(nss_user=self.student).delete()
+        self.assertFalse(CohortStudentSnapshot.objects.filter(student=self.student).exists())
+
+    def test_profile_and_label_changes_refresh_rows(self):
+        tag = Tag.objects.create(name='Mentor')
+        note_type = StudentNoteType.objects.create(label='Pairing')
+        StudentTag.objects.create(student=self.student, tag=tag)
+        StudentNote.objects.create(student=self.student, coach=self.coach, note='Drove', note_type=note_type)
+        CohortStudentSnapshot.refresh_for_student(self.student.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.github_handle = 'robin-hood'
+            self.student.save()
+        self.assertEqual(self.snapshot().github_handle, 'robin-hood')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialAccount.objects.create(user=self.student.user, provider='github', uid='42',
+                                         extra_data={'avatar_url': 'https://avatars.example.com/42'})
+        self.assertEqual(self.snapshot().avatar, 'https://avatars.example.com/42')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Lead'
+            tag.save()
+            note_type.label = 'Driving'
+            note_type.save()
+        self.assertEqual([tag['tag'] for tag in self.snapshot().tags], ['Lead'])
+        self.assertEqual([note['note_label'] for note in self.snapshot().notes], ['Driving'])
+
+    def test_cohort_without_active_students_is_not_rebuilt_on_every_request(self):
+        cohort = create_cohort(92)
+        gone = create_student('gone', cohort=cohort)
+        User.objects.filter(pk=gone.user_id).update(is_active=False)
+        instructor = User.objects.create(username='lister', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=instructor, token=Token.objects.create(user=instructor))
+
+        with patch.object(CohortStudentSnapshot, 'cohort_json', return_value='[]'), \
+                patch.object(CohortStudentSnapshot, 'refresh_for_cohort') as rebuild:
+            response = client.get('/students', {'cohort': cohort.id})
+            self.assertEqual(response.status_code, 200)
+            rebuild.assert_not_called()
+
+            client.get('/students', {'cohort': self.cohort.id})
+            rebuild.assert_called_once_with(str(self.cohort.id))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'get_cohort_student_data is a Postgres function')
+class CohortStudentDataParityTests(TestCase):
+    """The set-based cohort rebuild writes the same rows as the per-student one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(92)
+        mentor = create_student('mentor')
+        check_in = StudentNoteType.objects.create(label='Check-in')
+        submitted = StudentAssessmentStatus.objects.create(status='Ready for review')
+        approved = ProposalStatus.objects.create(status='Approved')
+
+        course = Course.objects.create(name='Server Side')
+        book = Book.objects.create(name='Servers', course=course, index=1)
+        project = Project.objects.create(name='Bangazon', book=book, index=2,
+                                         implementation_url='https://example.com/bangazon')
+        assessment = Assessment.objects.create(name='Servers self-assessment', book=book,
+                                               source_url='https://github.com/nss/servers-assessment')
+
+        # Two students with one of everything, and one who has not started
+        for weight, username in enumerate(('ana', 'ben'), start=3):
+            student = create_student(username, cohort=cls.cohort, github_handle=f'{username}-codes')
+            StudentProject.objects.create(student=student, project=project)
+            StudentAssessment.objects.create(student=student, assessment=assessment, status=submitted,
+                                             url=f'https://github.com/nss-92/{username}-assessment')
+            StudentNote.objects.create(student=student, coach=mentor, note=f'{username} is on track',
+                                       note_type=check_in if username == 'ben' else None)
+            StudentTag.objects.create(student=student, tag=Tag.objects.create(name=f'{username} tag'))
+            capstone = Capstone.objects.create(student=student, course=course, description='Capstone',
+                                               proposal_url=f'https://example.com/{username}/proposal')
+            CapstoneTimeline.objects.create(capstone=capstone, status=approved)
+            LearningRecord.objects.create(
+                student=student, achieved=True,
+                weight=LearningWeight.objects.create(label=f'{username} objective', weight=weight)
+            )
+        create_student('cy', cohort=cls.cohort)
+
+    def rows(self):
+        """Snapshot rows by student, without timestamps the two paths format differently"""
+        rows = {}
+        for row in CohortStudentSnapshot.objects.filter(cohort=self.cohort).values('student_id', *SNAPSHOT_FIELDS):
+            for collection in ('notes', 'proposals'):
+                row[collection] = [
+                    {key: value for key, value in item.items() if key != 'created_on'}
+                    for item in row[collection]
+                ]
+            rows[row.pop('student_id')] = row
+        return rows
+
+    def test_cohort_rebuild_matches_student_rebuild(self):
+        for student_id in NssUserCohort.objects.filter(cohort=self.cohort).values_list('nss_user_id', flat=True):
+            CohortStudentSnapshot.refresh_for_student(student_id)
+        expected = self.rows()
+
+        CohortStudentSnapshot.objects.all().delete()
+        CohortStudentSnapshot.refresh_for_cohort(self.cohort.id)
+
+        self.assertEqual(len(expected), 3)
+        self.assertEqual(self.rows(), expected)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The cohort student list body is built by Postgres')
+class CohortStudentPassthroughTests(TestCase):
+    """GET /students?cohort= sends the JSON Postgres built, without parsing or re-serializing it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(93)
+        cls.instructor = User.objects.create(username='lead', is_staff=True)
+
+        course = Course.objects.create(name='Client Side')
+        for index, username in enumerate(('dee', 'eli')):
+            book = Book.objects.create(name=f'Book {index}', course=course, index=index)
+            project = Project.objects.create(name=f'Project {index}', book=book, index=1,
+                                             implementation_url='https://example.com/project')
+            StudentProject.objects.create(student=create_student(username, cohort=cls.cohort), project=project)
+
+        departed = create_student('fay', cohort=cls.cohort).user
+        departed.is_active = False
+        departed.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=Token.objects.create(user=self.instructor))
+
+    def test_body_matches_the_serialized_rows(self):
+        # The cohort was never snapshotted, so this request builds its rows
+        response = self.client.get(f'/students?cohort={self.cohort.id}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertTrue(response['X-Sync-Cursor'].isdigit())
+
+        rows = CohortStudentSnapshot.objects \
+            .filter(cohort=self.cohort, student__user__is_active=True) \
+            .select_related('cohort') \
+            .order_by('book_index')
+        serialized = CohortStudentSerializer([row.as_cohort_student() for row in rows], many=True).data
+
+        body = json.loads(response.content)
+        self.assertEqual([student['name'] for student in body], ['Dee Learner', 'Eli Learner'])
+        self.assertEqual(body, json.loads(json.dumps(serialized, cls=DjangoJSONEncoder)))
+
+    def test_cohort_without_students_is_an_empty_array(self):
+        response = self.client.get(f'/students?cohort={create_cohort(94).id}')
+
+        self.assertEqual(response.content, b'[]')
+
+
+class CohortStudentDeltaSyncTests(TestCase):
+    """?since= sends only the rows changed after a cursor, plus the ids of every current member"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(95)
+        cls.instructor = User.objects.create(username='syncer', is_staff=True)
+        cls.steady, cls.busy, cls.leaving = (create_student(username, cohort=cls.cohort)
+                                             for username in ('gus', 'hal', 'ivy'))
+
+        for student in (cls.steady, cls.busy, cls.leaving):
+            CohortStudentSnapshot.refresh_for_student(student.id)
+
+        # Last changed well before any cursor the tests are issued
+        CohortStudentSnapshot.objects.update(updated_on=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=Token.objects.create(user=self.instructor))
+
+    def sync(self, since):
+        response = self.client.get('/students', {'cohort': self.cohort.id, 'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_only_changed_students_are_sent(self):
+        first = self.sync(CohortStudentSnapshot.sync_cursor())
+        self.assertEqual(first['students'], [])
+        self.assertEqual(set(first['student_ids']), {self.steady.id, self.busy.id, self.leaving.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentNote.objects.create(student=self.busy, coach=self.steady, note='Finished early')
+            self.leaving.user.is_active = False
+            self.leaving.user.save()
+
+        delta = self.sync(first['cursor'])
+        self.assertEqual([student['id'] for student in delta['students']], [self.busy.id])
+        self.assertEqual(delta['students'][0]['notes'][0]['note'], 'Finished early')
+        self.assertEqual(set(delta['student_ids']), {self.steady.id, self.busy.id})
+        self.assertGreaterEqual(int(delta['cursor']), int(first['cursor']))
+
+    def test_unusable_cursor_is_rejected(self):
+        for since in ('yesterday', '9' * 30, '-' + '9' * 20):
+            response = self.client.get('/students', {'cohort': self.cohort.id, 'since': since})
+            self.assertEqual(response.status_code, 400, since)
+
+
+class LearningScoreTests(TestCase):
+    """Stored learning scores follow every change to the records they are computed from"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = create_student('lee', cohort=create_cohort(89))
+        cls.closures = LearningWeight.objects.create(label='Closures', weight=10)
+        cls.recursion = LearningWeight.objects.create(label='Recursion', weight=4)
+
+    def scores(self):
+        self.student.refresh_from_db()
+        return self.student.technical_score, self.student.core_skill_mean, self.student.final_score
+
+    def verify(self):
+        output = StringIO()
+        call_command('recompute_scores', '--verify', stdout=output)
+        return output.getvalue()
+
+    def test_scores_follow_records_weights_and_core_skills(self):
+        record = LearningRecord.objects.create(student=self.student, weight=self.closures, achieved=True)
+        LearningRecord.objects.create(student=self.student, weight=self.recursion, achieved=False)
+        self.assertEqual(self.scores(), (10, None, 10))
+
+        CoreSkillRecord.objects.create(student=self.student, skill=CoreSkill.objects.create(label='Teamwork'), level=5)
+        self.assertEqual(self.scores(), (10, 5, 15))
+
+        CohortStudentSnapshot.refresh_for_student(self.student.id)
+        self.closures.weight = 20
+        self.closures.save()
+        self.assertEqual(self.scores(), (20, 5, 30))
+        self.assertEqual(CohortStudentSnapshot.objects.get(student=self.student).score, 20)
+
+        record.delete()
+        self.assertEqual(self.scores(), (0, 5, 0))
+
+    def test_verify_reports_scores_written_around_the_signals(self):
+        LearningRecord.objects.create(student=self.student, weight=self.recursion, achieved=True)
+        self.assertIn('All 1 stored scores are current', self.verify())
+
+        NssUser.objects.filter(pk=self.student.pk).update(final_score=99)
+        self.assertIn(f'NssUser {self.student.id}: stored 99, expected 4', self.verify())
+
+        call_command('recompute_scores', stdout=StringIO())
+        self.assertIn('All 1 stored scores are current', self.verify())
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """A cached token stops working as soon as the change that revokes it commits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='mia')
+
+    def setUp(self):
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def status_code(self):
+        # Any authenticated caller gets a 404 for a job that does not exist
+        return self.client.get('/jobs/0').status_code
+
+    def test_repeat_requests_skip_the_token_table(self):
+        self.assertEqual(self.status_code(), 404)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.status_code(), 404)
+
+        self.assertFalse([query for query in queries if 'authtoken_token' in query['sql']])
+
+    def test_deleted_token_is_refused(self):
+        self.assertEqual(self.status_code(), 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        self.assertEqual(self.status_code(), 401)
+
+    def test_deactivated_user_is_refused(self):
+        self.assertEqual(self.status_code(), 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.status_code(), 401)
+
+
+class IdentityTests(TestCase):
+    """The caller's NssUser and groups are looked up once per request and decide the role checks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(88)
+        cls.student = create_student('noor', cohort=cls.cohort)
+        cls.instructor = create_student('imani')
+        cls.instructor.user.groups.add(Group.objects.create(name='Instructors'))
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_lookups_are_made_once_per_request(self):
+        request = self.request(self.student.user)
+        identity = get_identity(request)
+        self.assertEqual(identity.nss_user, self.student)
+        self.assertFalse(identity.is_instructor)
+
+        drf_request = Request(request)
+        drf_request.user = self.student.user
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_identity(drf_request), identity)
+            self.assertEqual(identity.current_cohort['id'], self.cohort.id)
+            self.assertTrue(identity.owns(self.student))
+            self.assertFalse(identity.is_staff)
+
+        request.user = self.instructor.user
+        self.assertIsNot(get_identity(request), identity)
+        self.assertTrue(get_identity(request).is_instructor)
+
+    def test_group_names_from_the_token_cache_are_used(self):
+        user = User.objects.get(pk=self.student.user_id)
+        user.group_names = frozenset({'Staff'})
+
+        with self.assertNumQueries(0):
+            self.assertTrue(get_identity(self.request(user)).is_staff)
+
+    def test_role_decorators_check_the_callers_groups(self):
+        client = APIClient()
+
+        client.force_authenticate(user=self.student.user, token=Token.objects.create(user=self.student.user))
+        self.assertEqual(client.post(f'/students/{self.student.id}/note', {'note': 'Hi'}).status_code, 401)
+
+        client.force_authenticate(user=self.instructor.user, token=Token.objects.create(user=self.instructor.user))
+        self.assertEqual(client.post(f'/students/{self.student.id}/note', {'note': 'Hi'}).status_code, 201)
+        self.assertEqual(StudentNote.objects.get(student=self.student).coach, self.instructor)
+
+        # Instructors are not in the Staff group
+        self.assertEqual(client.get('/exports/rosters.csv').status_code, 401)
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """Answers with whatever the test queued on the server, in order"""
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.server.received.append((self.command, self.path, self.rfile.read(length)))
+        self.server.request_headers.append(dict(self.headers))
+
+        status_code, headers, body = self.server.responses.pop(0)
+        payload = json.dumps(body).encode()
+
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_PUT = do_POST = do_DELETE = respond
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class FakeGithub(ThreadingHTTPServer):
+    """Local stand-in for api.github.com"""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeGithubHandler)
+        self.responses = []
+        self.received = []
+        self.request_headers = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def queue(self, status_code, headers=None, body=None):
+        self.responses.append((status_code, headers or {}, body or {}))
+
+
+def clear_github_budget():
+    """Forget every rate limit GitHub has reported, in this process and in Valkey"""
+    RateLimitBudget.local.clear()
+    if not on_test_valkey():
+        return
+
+    try:
+        valkey_client.delete(BUDGET_KEY)
+    except valkey.exceptions.ValkeyError:
+        pass
+
+
+class GithubClientRateLimitTests(SimpleTestCase):
+    """The GitHub client must never sleep in-request when GitHub pushes back"""
+
+    def setUp(self):
+        self.github = FakeGithub()
+        self.github.thread.start()
+        self.github_client = GithubClient(base_url=self.github.url, token='test')
+
+        clear_github_budget()
+
+    def tearDown(self):
+        self.github.shutdown()
+        self.github.server_close()
+
+    def test_public_urls_go_to_configured_host(self):
+        self.github.queue(200, {'X-RateLimit-Remaining': 4000}, {'login': 'octocat'})
+
+        response = self.github_client.get('https://api.github.com/users/octocat')
+
+        self.assertEqual(response.json(), {'login': 'octocat'})
+        self.assertEqual(self.github.received[0][1], '/users/octocat')
+
+    def test_secondary_limit_fails_fast_for_every_later_call(self):
+        self.github.queue(403, {'Retry-After': 1800}, {'message': 'secondary rate limit'})
+
+        started = time.monotonic()
+        with self.assertRaises(GithubRateLimited) as raised:
+            self.github_client.post('/repos/nss/template/generate', {'name': 'repo'})
+
+        self.assertEqual(raised.exception.wait, 1800)
+        self.assertLess(time.monotonic() - started, 5)
+
+        with self.assertRaises(GithubRateLimited):
+            GithubClient(base_url=self.github.url, token='test').get('/users/octocat')
+
+        self.assertEqual(len(self.github.received), 1)
+
+    def test_secondary_limit_without_retry_after_backs_off(self):
+        self.github.queue(403, {'X-RateLimit-Remaining': 4000},
+                          {'message': 'You have exceeded a secondary rate limit. Please wait a few minutes.'})
+
+        with self.assertRaises(GithubRateLimited) as raised:
+            self.github_client.post('/repos/nss/template/generate', {'name': 'repo'})
+
+        self.assertEqual(raised.exception.wait, SECONDARY_LIMIT_WAIT)
+
+        with self.assertRaises(GithubRateLimited):
+            self.github_client.get('/users/octocat')
+
+        self.assertEqual(len(self.github.received), 1)
+
+    def test_exhausted_quota_waits_for_reset(self):
+        reset = int(time.time()) + 600
+        self.github.queue(200, {'X-RateLimit-Remaining': 3, 'X-RateLimit-Reset': reset})
+        self.github_client.get('/users/octocat')
+
+        with self.assertRaises(GithubRateLimited) as raised:
+            self.github_client.get('/users/octocat')
+
+        self.assertGreater(raised.exception.wait, 590)
+        self.assertEqual(len(self.github.received), 1)
+
+    def test_permission_errors_are_returned(self):
+        self.github.queue(403, {'X-RateLimit-Remaining': 4000}, {'message': 'Must have admin rights'})
+
+        response = self.github_client.put('/repos/nss/repo/collaborators/octocat', {'permission': 'write'})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_batch_reports_every_call(self):
+        handles = ['ada', 'grace', 'linus', 'margaret', 'ken', 'barbara']
+        for _ in handles:
+            self.github.queue(204, {'X-RateLimit-Remaining': 4000})
+
+        outcomes = self.github_client.batch(
+            ((handle, ('PUT', f'/repos/nss/repo/collaborators/{handle}', {'permission': 'write'}))
+             for handle in handles),
+            max_workers=3
+        )
+
+        self.assertEqual(list(outcomes), handles)
+        self.assertEqual({outcome.status_code for outcome in outcomes.values()}, {204})
+        self.assertEqual(
+            sorted(path for _, path, _ in self.github.received),
+            sorted(f'/repos/nss/repo/collaborators/{handle}' for handle in handles)
+        )
+
+
+@requires_valkey
+class GithubConditionalGetTests(TestCase):
+    """Repeat GETs are sent with If-None-Match and a 304 is answered with the cached body"""
+
+    def setUp(self):
+        self.github = FakeGithub()
+        self.github.thread.start()
+        self.addCleanup(self.github.server_close)
+        self.addCleanup(self.github.shutdown)
+        self.github_client = GithubClient(base_url=self.github.url, token='test')
+
+        clear_github_budget()
+        self.addCleanup(clear_github_budget)
+        self.clear_cache()
+        self.addCleanup(self.clear_cache)
+
+    def clear_cache(self):
+        valkey_client.delete(ETAG_STATS_KEY, *valkey_client.keys(f'{ETAG_KEY_PREFIX}*'))
+
+    def test_not_modified_is_answered_from_cache(self):
+        self.github.queue(200, {'ETag': '"v1"', 'X-RateLimit-Remaining': 4000}, {'login': 'octocat'})
+        self.github.queue(304, {'ETag': '"v1"', 'X-RateLimit-Remaining': 4000})
+
+        first = self.github_client.get('/users/octocat')
+        second = self.github_client.get('/users/octocat')
+
+        self.assertNotIn('If-None-Match', self.github.request_headers[0])
+        self.assertEqual(self.github.request_headers[1]['If-None-Match'], '"v1"')
+        self.assertEqual((second.status_code, second.json()), (200, first.json()))
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.headers['X-RateLimit-Remaining'], '4000')
+        self.assertEqual(etag_cache_stats(), {'hit': 1, 'miss': 1, 'stale': 0})
+
+    def test_cached_body_is_served_while_rate_limited(self):
+        self.github.queue(200, {'ETag': '"v1"', 'X-RateLimit-Remaining': 4000}, {'login': 'octocat'})
+        self.github.queue(403, {'Retry-After': 600}, {'message': 'secondary rate limit'})
+        self.github_client.get('/users/octocat')
+
+        with self.assertRaises(GithubRateLimited):
+            self.github_client.post('/repos/nss/template/generate', {'name': 'repo'})
+
+        self.assertEqual(self.github_client.get('/users/octocat').json(), {'login': 'octocat'})
+        with self.assertRaises(GithubRateLimited):
+            self.github_client.get('/users/hubot')
+
+        self.assertEqual(len(self.github.received), 2)
+        self.assertEqual(etag_cache_stats(), {'hit': 0, 'miss': 1, 'stale': 1})
+
+    def test_expired_entries_are_fetched_again(self):
+        with override_settings(GITHUB_CONFIG={**settings.GITHUB_CONFIG, 'ETAG_TTL': 1}):
+            github_client = GithubClient(base_url=self.github.url, token='test')
+
+        self.github.queue(200, {'ETag': '"v1"', 'X-RateLimit-Remaining': 4000}, {'login': 'octocat'})
+        self.github.queue(200, {'ETag': '"v2"', 'X-RateLimit-Remaining': 4000}, {'login': 'octocat', 'id': 1})
+        github_client.get('/users/octocat')
+
+        time.sleep(1.1)
+        self.assertEqual(github_client.get('/users/octocat').json(), {'login': 'octocat', 'id': 1})
+        self.assertNotIn('If-None-Match', self.github.request_headers[1])
+        self.assertEqual(etag_cache_stats()['miss'], 2)
+
+    def test_counters_are_reported_to_staff(self):
+        self.github.queue(200, {'ETag': '"v1"', 'X-RateLimit-Remaining': 4000}, {'login': 'octocat'})
+        self.github.queue(304, {'ETag': '"v1"', 'X-RateLimit-Remaining': 3999})
+        self.github_client.get('/users/octocat')
+        self.github_client.get('/users/octocat')
+
+        staff = User.objects.create(username='monitor')
+        staff.groups.add(Group.objects.create(name='Staff'))
+        client = APIClient()
+        client.force_authenticate(user=staff, token=Token.objects.create(user=staff))
+
+        response = client.get('/github/status')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['etag_cache'], {'hit': 1, 'miss': 1, 'stale': 0})
+        self.assertEqual(response.data['rate_limit']['remaining'], 3999)
+
+
+class GithubMembershipTests(TestCase):
+    """Students are flagged once they appear in their cohort's GitHub organization"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(86)
+        Cohort.objects.filter(pk=cls.cohort.pk).update(active=True)
+        cls.other_cohort = create_cohort(85)
+
+        cls.ada = create_student('ada', cohort=cls.cohort, github_handle='Ada-Codes')
+        cls.bob = create_student('bob', cohort=cls.cohort, github_handle='bob-dev')
+        cls.unlinked = create_student('cy', cohort=cls.cohort)
+        cls.elsewhere = create_student('dee', cohort=cls.other_cohort, github_handle='dee-dev')
+
+    def setUp(self):
+        self.github = FakeGithub()
+        self.github.thread.start()
+        self.addCleanup(self.github.server_close)
+        self.addCleanup(self.github.shutdown)
+
+        github_host = override_settings(GITHUB_CONFIG={**settings.GITHUB_CONFIG, 'API_URL': self.github.url})
+        github_host.enable()
+        self.addCleanup(github_host.disable)
+
+        clear_github_budget()
+        self.addCleanup(clear_github_budget)
+
+    def members(self):
+        return set(NssUserCohort.objects.filter(is_github_org_member=True).values_list('nss_user_id', flat=True))
+
+    def test_only_pending_members_of_the_cohort_are_flagged(self):
+        self.assertEqual(NssUserCohort.mark_github_members(self.cohort.id, ['ada-codes', 'dee-dev']), 1)
+        self.assertEqual(self.members(), {self.ada.id})
+
+        self.assertEqual(NssUserCohort.mark_github_members(self.cohort.id, ['ADA-CODES']), 0)
+
+    def test_every_page_of_the_organization_is_read(self):
+        next_page = f'{self.github.url}/orgs/nss-86/members?per_page=100&page=2'
+        self.github.queue(200, {'Link': f'<{next_page}>; rel="next"'}, [{'login': 'ada-codes'}])
+        self.github.queue(200, {}, [{'login': 'BOB-DEV'}, {'login': 'dee-dev'}])
+
+        call_command('reconcile_github_membership', stdout=StringIO())
+
+        self.assertEqual(self.members(), {self.ada.id, self.bob.id})
+        self.assertEqual([path for _, path, _ in self.github.received],
+                         ['/orgs/nss-86/members?per_page=100', '/orgs/nss-86/members?per_page=100&page=2'])
+
+    def test_interval_loop_outlives_failed_passes(self):
+        passes = [RuntimeError('database went away'), None, KeyboardInterrupt()]
+
+        with patch.object(ReconcileCommand, 'reconcile', side_effect=passes) as reconcile, \
+                patch('LearningAPI.management.commands.reconcile_github_membership.time.sleep'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('reconcile_github_membership', interval=300, stdout=StringIO())
+
+        self.assertEqual(reconcile.call_count, 3)
+
+
+class ProvisioningJobTests(TestCase):
+    """A job resumes where it stopped after a rate limit, and stops for good on a real error"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = create_student('nia', github_handle='nia-dev', slack_handle='U0NIA')
+        book = Book.objects.create(name='Python', course=Course.objects.create(name='Server Side'), index=1)
+        assessment = Assessment.objects.create(name='Python self-assessment', book=book,
+                                               source_url='https://github.com/nss/python-assessment')
+        cls.student_assessment = StudentAssessment.objects.create(
+            student=cls.student, assessment=assessment,
+            status=StudentAssessmentStatus.objects.create(status='In progress')
+        )
+
+    def setUp(self):
+        self.github = FakeGithub()
+        self.github.thread.start()
+        self.addCleanup(self.github.server_close)
+        self.addCleanup(self.github.shutdown)
+
+        github_host = override_settings(GITHUB_CONFIG={**settings.GITHUB_CONFIG, 'API_URL': self.github.url})
+        github_host.enable()
+        self.addCleanup(github_host.disable)
+
+        clear_github_budget()
+        self.addCleanup(clear_github_budget)
+
+        self.job = ProvisioningJob.objects.create(kind=ProvisioningJob.ASSESSMENT, requested_by=self.student, payload={
+            'student_assessment_id': self.student_assessment.id,
+            'student_org_name': 'nss-88',
+            'repo_name': 'nia-python-assessment',
+            'instructor_channel': 'C88',
+            'cohort_id': None,
+        })
+
+    def run_job(self):
+        """Run the job once and return each step's status"""
+        run_job(self.job.id)
+        self.job.refresh_from_db()
+        return {step['name']: step['status'] for step in self.job.steps}
+
+    def test_rate_limited_job_resumes_without_repeating_steps(self):
+        self.github.queue(201, {'X-RateLimit-Remaining': 4000})
+        self.github.queue(403, {'Retry-After': 600}, {'message': 'secondary rate limit'})
+
+        self.assertEqual(self.run_job(), {'repository': 'done', 'collaborator': 'deferred'})
+        self.assertEqual((self.job.status, self.job.attempts), (ProvisioningJob.QUEUED, 1))
+        self.assertGreater(self.job.available_at, timezone.now() + timedelta(minutes=9))
+        self.assertFalse(run_job(self.job.id))
+
+        # Ten minutes on, GitHub takes calls again and the worker picks the job back up
+        clear_github_budget()
+        ProvisioningJob.objects.filter(pk=self.job.pk).update(available_at=timezone.now())
+        self.github.queue(204, {'X-RateLimit-Remaining': 4000})
+
+        self.assertEqual(set(self.run_job().values()), {'done'})
+        self.assertEqual((self.job.status, self.job.attempts), (ProvisioningJob.SUCCEEDED, 2))
+        self.assertEqual([path for _, path, _ in self.github.received], [
+            '/repos/nss/python-assessment/generate',
+            '/repos/nss-88/nia-python-assessment/collaborators/nia-dev',
+            '/repos/nss-88/nia-python-assessment/collaborators/nia-dev',
+        ])
+
+        self.student_assessment.refresh_from_db()
+        self.assertEqual(self.student_assessment.url, 'https://github.com/nss-88/nia-python-assessment')
+        self.assertEqual(sorted(SlackOutboxMessage.objects.values_list('channel', flat=True)), ['C88', 'U0NIA'])
+
+    def test_refused_repository_fails_the_job(self):
+        self.github.queue(422, {'X-RateLimit-Remaining': 4000}, {'message': 'Repository name already exists'})
+
+        self.assertEqual(self.run_job(), {'repository': 'failed'})
+        self.assertEqual(self.job.status, ProvisioningJob.FAILED)
+        self.assertIn('Failed to create repository', self.job.error)
+        self.assertFalse(run_job(self.job.id))
+
+        client = APIClient()
+        client.force_authenticate(user=self.student.user, token=Token.objects.create(user=self.student.user))
+        self.assertEqual(client.get(f'/jobs/{self.job.id}').data['status'], ProvisioningJob.FAILED)
+
+        bystander = create_student('oz').user
+        client.force_authenticate(user=bystander, token=Token.objects.create(user=bystander))
+        self.assertEqual(client.get(f'/jobs/{self.job.id}').status_code, 403)
+
+
+    def test_job_whose_worker_stopped_is_retried_after_its_lease(self):
+        crashed = ProvisioningJob.objects.create(kind=ProvisioningJob.ASSESSMENT, status=ProvisioningJob.RUNNING,
+                                                 payload=self.job.payload, lease_until=timezone.now())
+        ProvisioningJob.objects.filter(pk=self.job.pk).update(
+            status=ProvisioningJob.RUNNING, lease_until=timezone.now() + LEASE
+        )
+
+        with patch('LearningAPI.provisioning.valkey_client') as queue:
+            self.assertEqual(requeue_due_jobs(), 1)
+        queue.lpush.assert_called_once_with(QUEUE_KEY, crashed.id)
+
+        crashed.refresh_from_db()
+        self.assertEqual(crashed.status, ProvisioningJob.QUEUED)
+        self.assertEqual(ProvisioningJob.objects.get(pk=self.job.pk).status, ProvisioningJob.RUNNING)
+
+        self.github.queue(201, {'X-RateLimit-Remaining': 4000})
+        self.github.queue(204, {'X-RateLimit-Remaining': 4000})
+        self.assertTrue(run_job(crashed.id))
+
+        crashed.refresh_from_db()
+        self.assertEqual((crashed.status, crashed.attempts), (ProvisioningJob.SUCCEEDED, 1))
+        self.assertGreater(crashed.lease_until, timezone.now())
+
+    def test_failed_api_repository_does_not_hold_up_the_team(self):
+        cohort = create_cohort(87)
+        team = StudentTeam.objects.create(group_name='Pups', cohort=cohort)
+        NSSUserTeam.objects.create(student=self.student, team=team)
+        project = Project.objects.create(
+            name='Kennel', book=self.student_assessment.assessment.book, index=1, implementation_url='',
+            is_group_project=True,
+            client_template_url='https://github.com/nss/kennel-client',
+            api_template_url='https://github.com/nss/kennel-api',
+        )
+        job = ProvisioningJob.objects.create(kind=ProvisioningJob.TEAM, payload={
+            'team_id': team.id, 'channel_name': 'pups', 'student_ids': [self.student.id],
+            'project_id': project.id, 'client_repo_name': 'Kennel-client', 'api_repo_name': 'Kennel-api',
+        }, steps=[{'name': 'slack_channel', 'status': 'done', 'result': 'C0PUPS'}])
+
+        self.github.queue(201, {'X-RateLimit-Remaining': 4000},
+                          {'html_url': 'https://github.com/nss-87/Kennel-client'})
+        self.github.queue(422, {'X-RateLimit-Remaining': 4000}, {'message': 'Repository name already exists'})
+        self.github.queue(204, {'X-RateLimit-Remaining': 4000})
+
+        # One request at a time, so the queued answers meet the calls in order
+        with override_settings(GITHUB_CONFIG={**settings.GITHUB_CONFIG, 'CONCURRENCY': 1}), \
+                patch('LearningAPI.provisioning.request_ticket_migration', return_value='1-0') as migration:
+            run_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.SUCCEEDED)
+        self.assertEqual({step['name']: step['status'] for step in job.steps}, {
+            'slack_channel': 'done',
+            'client_repository': 'done',
+            'api_repository': 'failed',
+            'client_collaborator:nia-dev': 'done',
+            'client_announcement': 'done',
+            'ticket_migration': 'done',
+        })
+        self.assertEqual(list(GroupProjectRepository.objects.values_list('repository', flat=True)),
+                         ['https://github.com/nss-87/Kennel-client'])
+        self.assertEqual(migration.call_args.kwargs['target_repositories'], ['nss-87/Kennel-client'])
+
+
+class FakeSlackSession:
+    """Stands in for the dispatcher's HTTP session, answering with queued Web API responses"""
+
+    def __init__(self):
+        self.responses = []
+        self.posted = []
+
+    def queue(self, status_code=200, headers=None, body=None):
+        self.responses.append((status_code, headers or {}, body or {}))
+
+    def post(self, url, data=None, timeout=None):
+        self.posted.append((url.rsplit('/', 1)[-1], data))
+        status_code, headers, body = self.responses.pop(0)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = json.dumps(body).encode()
+        return response
+
+
+def reset_slack_limiter():
+    limiter.buckets.clear()
+    limiter.paused_until.clear()
+    if not on_test_valkey():
+        return
+
+    try:
+        keys = valkey_client.keys(f'{WINDOW_KEY_PREFIX}*') + valkey_client.keys(f'{PAUSE_KEY_PREFIX}*')
+        if keys:
+            valkey_client.delete(*keys)
+    except valkey.exceptions.ValkeyError:
+        pass
+
+
+@requires_valkey
+class SlackRateLimiterTests(SimpleTestCase):
+    """Every process counts its Slack calls against the same windows in Valkey"""
+
+    def setUp(self):
+        reset_slack_limiter()
+        self.addCleanup(reset_slack_limiter)
+
+    def test_calls_from_another_process_use_up_the_window(self):
+        other_process = SlackRateLimiter()
+
+        for _ in range(20):
+            other_process.acquire('conversations.create')
+
+        self.assertGreater(limiter.blocked_for('conversations.create'), 0)
+        self.assertEqual(limiter.blocked_for('conversations.invite'), 0)
+
+        other_process.acquire('chat.postMessage', 'C1')
+        self.assertGreater(limiter.blocked_for('chat.postMessage', 'C1'), 0)
+        self.assertEqual(limiter.blocked_for('chat.postMessage', 'C2'), 0)
+
+    def test_retry_after_holds_every_process(self):
+        SlackRateLimiter().pause('users.list', 30)
+
+        self.assertGreater(limiter.blocked_for('users.list'), 25)
+
+
+class SlackOutboxDispatchTests(TestCase):
+    """Queued messages are posted once, retried with backoff, and held while Slack rate limits"""
+
+    def setUp(self):
+        reset_slack_limiter()
+        self.addCleanup(reset_slack_limiter)
+
+        self.slack = FakeSlackSession()
+        self.dispatcher = SlackDispatcher(token='xoxb-test')
+        self.dispatcher.session = self.slack
+
+    def test_due_messages_are_posted_once(self):
+        standup = queue_slack_message('C1', 'Standup in five minutes')
+        queue_slack_message('C2', 'Demo day is Friday')
+        self.assertIsNone(queue_slack_message(None, 'Nobody linked Slack'))
+
+        self.slack.queue(body={'ok': True, 'ts': '1700000000.0001'})
+        self.slack.queue(body={'ok': True, 'ts': '1700000000.0002'})
+
+        self.assertEqual(self.dispatcher.dispatch(), 2)
+        self.assertEqual(self.dispatcher.dispatch(), 0)
+        self.assertEqual([(method, data['channel']) for method, data in self.slack.posted],
+                         [('chat.postMessage', 'C1'), ('chat.postMessage', 'C2')])
+
+        standup.refresh_from_db()
+        self.assertEqual((standup.status, standup.ts, standup.attempts), (SlackOutboxMessage.SENT, '1700000000.0001', 1))
+
+    def test_errors_back_off_until_attempts_run_out(self):
+        retro = queue_slack_message('C3', 'Retro notes are posted')
+        archived = queue_slack_message('C4', 'Welcome back')
+        self.slack.queue(body={'ok': False, 'error': 'internal_error'})
+        self.slack.queue(body={'ok': False, 'error': 'is_archived'})
+
+        self.dispatcher.dispatch()
+
+        retro.refresh_from_db()
+        self.assertEqual((retro.status, retro.attempts, retro.last_error),
+                         (SlackOutboxMessage.PENDING, 1, 'internal_error'))
+        self.assertAlmostEqual((retro.next_attempt_at - timezone.now()).total_seconds(), BACKOFF_BASE, delta=2)
+
+        archived.refresh_from_db()
+        self.assertEqual((archived.status, archived.attempts), (SlackOutboxMessage.FAILED, 1))
+
+        # Nothing is due until the backoff passes
+        self.assertEqual(self.dispatcher.dispatch(), 0)
+
+        SlackOutboxMessage.objects.filter(pk=retro.pk).update(attempts=MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+        reset_slack_limiter()
+        self.slack.queue(502)
+        self.dispatcher.dispatch()
+
+        retro.refresh_from_db()
+        self.assertEqual((retro.status, retro.attempts), (SlackOutboxMessage.FAILED, MAX_ATTEMPTS))
+
+    def test_rate_limit_holds_every_channel_without_counting_an_attempt(self):
+        limited = queue_slack_message('C5', 'Office hours moved')
+        waiting = queue_slack_message('C6', 'Lunch and learn')
+        self.slack.queue(429, {'Retry-After': '30'})
+
+        self.assertEqual(self.dispatcher.dispatch(), 1)
+        self.assertEqual(len(self.slack.posted), 1)
+
+        limited.refresh_from_db()
+        self.assertEqual((limited.status, limited.attempts, limited.last_error),
+                         (SlackOutboxMessage.PENDING, 0, 'ratelimited'))
+        self.assertGreater(limited.next_attempt_at, timezone.now() + timedelta(seconds=25))
+
+        waiting.refresh_from_db()
+        self.assertEqual((waiting.status, waiting.attempts), (SlackOutboxMessage.PENDING, 0))
+        self.assertGreater(limiter.blocked_for('chat.postMessage', 'C6'), 25)
+
+    def test_dispatcher_loop_outlives_failed_passes(self):
+        command = 'LearningAPI.management.commands.dispatch_slack_outbox'
+        with patch.object(SlackDispatcher, 'dispatch', side_effect=[RuntimeError('database went away'), 0,
+                                                                     KeyboardInterrupt()]) as dispatch, \
+                patch(f'{command}.wait_for_messages'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('dispatch_slack_outbox', stdout=StringIO())
+
+        self.assertEqual(dispatch.call_count, 3)
+
+
+class InstructorDigestTests(TestCase):
+    """A cohort's instructor notifications are held and posted together once its digest interval passes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(87)
+        CohortInfo.objects.filter(cohort=cls.cohort).update(instructor_digest_minutes=15)
+
+    def setUp(self):
+        reset_slack_limiter()
+        self.addCleanup(reset_slack_limiter)
+
+        self.slack = FakeSlackSession()
+        self.dispatcher = SlackDispatcher(token='xoxb-test')
+        self.dispatcher.session = self.slack
+
+    def test_notifications_are_posted_as_one_digest(self):
+        for name in ('Ada', 'Bo', 'Cy'):
+            queue_instructor_message(self.cohort.id, 'C87', f'{name} started the self-assessment')
+
+        # The first notification starts the clock for the rest
+        (flush_at,) = set(SlackOutboxMessage.objects.values_list('next_attempt_at', flat=True))
+        self.assertAlmostEqual((flush_at - timezone.now()).total_seconds(), 15 * 60, delta=5)
+        self.assertEqual(self.dispatcher.dispatch(), 0)
+
+        SlackOutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.slack.queue(body={'ok': True, 'ts': '1700000000.0087'})
+
+        self.assertEqual(self.dispatcher.dispatch(), 1)
+        (_, posted), = self.slack.posted
+        self.assertTrue(posted['text'].startswith('📋 3 updates since'))
+        for name in ('Ada', 'Bo', 'Cy'):
+            self.assertIn(f'• {name} started the self-assessment', posted['text'])
+        self.assertEqual(set(SlackOutboxMessage.objects.values_list('status', 'ts')),
+                         {(SlackOutboxMessage.SENT, '1700000000.0087')})
+
+    def test_cohort_without_a_digest_is_notified_right_away(self):
+        message = queue_instructor_message(create_cohort(86).id, 'C86', 'Tess started the self-assessment')
+        self.assertFalse(message.digest)
+
+        self.slack.queue(body={'ok': True, 'ts': '1700000000.0086'})
+        self.assertEqual(self.dispatcher.dispatch(), 1)
+        self.assertEqual(self.slack.posted[0][1]['text'], 'Tess started the self-assessment')
+
+
+class CohortInfoDigestTests(TestCase):
+    """Only a whole number of minutes, 0 or more, is accepted as a cohort's digest interval"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.info = CohortInfo.objects.get(cohort=create_cohort(88))
+        cls.instructor = User.objects.create(username='digester', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=Token.objects.create(user=self.instructor))
+
+    def put(self, minutes):
+        return self.client.put(f'/cohortinfo/{self.info.id}', {'instructor_digest_minutes': minutes}, format='json')
+
+    def test_invalid_intervals_are_refused(self):
+        for minutes in ('soon', None, -5, True, 1.5, [15]):
+            with self.subTest(minutes=minutes):
+                self.assertEqual(self.put(minutes).status_code, 400)
+
+        self.info.refresh_from_db()
+        self.assertEqual(self.info.instructor_digest_minutes, 0)
+
+    def test_interval_is_saved(self):
+        self.assertEqual(self.put('30').status_code, 204)
+
+        self.info.refresh_from_db()
+        self.assertEqual(self.info.instructor_digest_minutes, 30)
+
+
+class CohortStreamTicketTests(TestCase):
+    """The event stream is opened with a single-use ticket, never the API token"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create(username='streamer', is_staff=True)
+        cls.token = Token.objects.create(user=cls.instructor)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=self.token)
+
+    def test_api_token_in_query_string_is_refused(self):
+        response = self.client.get(f'/cohorts/7/stream?token={self.token.key}')
+        self.assertEqual(response.status_code, 401)
+
+    @requires_valkey
+    def test_ticket_opens_one_stream_for_its_cohort(self):
+        ticket = self.client.post('/cohorts/7/stream/ticket').data['ticket']
+        self.assertEqual(self.client.get(f'/cohorts/8/stream?ticket={ticket}').status_code, 401)
+
+        ticket = self.client.post('/cohorts/7/stream/ticket').data['ticket']
+        response = self.client.get(f'/cohorts/7/stream?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(self.client.get(f'/cohorts/7/stream?ticket={ticket}').status_code, 401)
+
+    def test_only_staff_get_tickets(self):
+        learner = User.objects.create(username='learner')
+        self.client.force_authenticate(user=learner, token=Token.objects.create(user=learner))
+
+        self.assertEqual(self.client.post('/cohorts/7/stream/ticket').status_code, 403)
+
+
+@requires_valkey
+class CohortEventStreamTests(TestCase):
+    """Committed dashboard changes are relayed to the cohort's open streams"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def next_frame(self, events):
+        """The next frame that is not a keepalive comment, which clients ignore"""
+        while True:
+            frame = self.loop.run_until_complete(asyncio.wait_for(anext(events), timeout=5))
+            if not frame.startswith(':'):
+                return frame
+
+    def test_note_reaches_an_open_stream_after_commit(self):
+        cohort = create_cohort(96)
+        student = create_student('jo', cohort=cohort)
+        events = cohort_events(cohort.id)
+        self.addCleanup(lambda: self.loop.run_until_complete(events.aclose()))
+
+        # The first frame is sent once the stream is subscribed
+        self.assertEqual(self.next_frame(events), 'retry: 5000\n\n')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentNote.objects.create(student=student, coach=create_student('kai'), note='Demoed the capstone')
+
+        frame = self.next_frame(events)
+        self.assertTrue(frame.startswith('event: student\ndata: '))
+        self.assertEqual(json.loads(frame.split('data: ')[1]), {'type': 'note', 'student': student.id})
+
+
+@requires_valkey
+class TicketMigrationStreamTests(TestCase):
+    """Ticket migrations are stream entries whose progress is read back from the consumer group"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohort = create_cohort(97)
+        cls.team = StudentTeam.objects.create(group_name='Team Rocket', cohort=cls.cohort, sprint_team=True)
+        cls.instructor = User.objects.create(username='migrator', is_staff=True)
+
+    def setUp(self):
+        valkey_client.delete(STREAM_KEY, FAILURES_KEY)
+        self.addCleanup(valkey_client.delete, STREAM_KEY, FAILURES_KEY)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=Token.objects.create(user=self.instructor))
+
+    def request_migration(self, team=None, force=False):
+        return request_ticket_migration(team or self.team, notification_channel='C97', source_repo='nss/template',
+                                        target_repositories=['nss-97/client'], force=force)
+
+    def consume(self, ack=True):
+        """Read one entry the way Monarch does"""
+        ((_, [(message_id, _)]),) = valkey_client.xreadgroup(GROUP, 'monarch-1', {STREAM_KEY: '>'}, count=1)
+        if ack:
+            valkey_client.xack(STREAM_KEY, GROUP, message_id)
+        return message_id.decode()
+
+    def status(self):
+        response = self.client.get(f'/teams/{self.team.id}/migration')
+        self.assertEqual(response.status_code, 200)
+        return response.data['status']
+
+    def test_repeat_requests_are_skipped_until_forced(self):
+        self.assertEqual(self.client.get(f'/teams/{self.team.id}/migration').status_code, 404)
+
+        self.assertTrue(self.request_migration())
+        self.assertFalse(self.request_migration())
+        self.assertEqual(valkey_client.xlen(STREAM_KEY), 1)
+        self.assertEqual(self.status(), 'pending')
+
+        self.assertEqual(self.consume(), self.team.migration_message_id)
+        self.assertEqual(self.status(), 'acked')
+
+        self.team.refresh_from_db()
+        self.assertFalse(self.request_migration())
+        self.assertTrue(self.request_migration(force=True))
+        self.assertEqual(self.status(), 'pending')
+
+    def test_request_from_a_stale_team_is_skipped(self):
+        # Loaded by a second request before the first added its entry
+        stale = StudentTeam.objects.get(pk=self.team.pk)
+
+        self.assertTrue(self.request_migration())
+        self.assertFalse(self.request_migration(team=stale))
+        self.assertEqual(valkey_client.xlen(STREAM_KEY), 1)
+        self.assertEqual(stale.migration_message_id, self.team.migration_message_id)
+
+    def test_failure_reported_by_consumer(self):
+        self.request_migration()
+        message_id = self.consume()
+        valkey_client.hset(FAILURES_KEY, message_id, 'repository not found')
+
+        self.assertEqual(self.status(), 'failed')
+
+    def test_entry_trimmed_before_delivery_is_failed(self):
+        self.request_migration()
+        valkey_client.xtrim(STREAM_KEY, maxlen=0)
+
+        self.assertEqual(self.status(), 'failed')
+
+    def test_trimming_keeps_entries_monarch_has_not_acknowledged(self):
+        waiting = StudentTeam.objects.create(group_name='Team Aqua', cohort=self.cohort)
+        self.request_migration()
+        self.request_migration(team=waiting)
+        self.consume(ack=False)
+
+        # Each request trims what the group has finished with
+        self.request_migration(team=StudentTeam.objects.create(group_name='Team Magma', cohort=self.cohort))
+
+        self.assertEqual(valkey_client.xlen(STREAM_KEY), 3)
+        self.assertEqual(self.status(), 'pending')
+        self.assertEqual(refresh_status(waiting), 'pending')
+
+
+@override_settings(GITHUB_CONFIG={**settings.GITHUB_CONFIG, 'WEBHOOK_SECRET': 'webhook-secret'})
+class GithubWebhookTests(TestCase):
+    """POST /github/webhook keeps repository activity current without calling GitHub"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cohort = create_cohort(98)
+        cls.student = NssUser.objects.create(user=User.objects.create(username='octo'), github_handle='OctoCat')
+        cls.assignment = NssUserCohort.objects.create(nss_user=cls.student, cohort=cohort)
+
+    def deliver(self, event, payload, secret='webhook-secret', delivery=None):
+        body = json.dumps(payload).encode()
+        signature = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+        return self.client.post(
+            '/github/webhook', body, content_type='application/json',
+            HTTP_X_GITHUB_EVENT=event, HTTP_X_HUB_SIGNATURE_256=signature,
+            HTTP_X_GITHUB_DELIVERY=delivery or str(uuid.uuid4())
+        )
+
+    def push(self, timestamp):
+        return {
+            'repository': {'full_name': 'nss-98/rare-client', 'owner': {'login': 'nss-98'}},
+            'organization': {'login': 'nss-98'},
+            'sender': {'login': 'octocat'},
+            'head_commit': {'timestamp': timestamp},
+            'commits': [{}, {}],
+        }
+
+    def test_unsigned_delivery_is_rejected(self):
+        response = self.deliver('push', self.push('2024-02-01T10:00:00Z'), secret='wrong')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(RepositoryActivity.objects.exists())
+
+    def test_push_and_pull_requests_are_recorded(self):
+        self.deliver('push', self.push('2024-02-02T10:00:00Z'))
+        self.deliver('push', self.push('2024-02-01T10:00:00Z'))
+
+        pull_request = {
+            'action': 'opened',
+            'repository': {'full_name': 'nss-98/rare-client', 'owner': {'login': 'nss-98'}},
+            'organization': {'login': 'nss-98'},
+            'pull_request': {'user': {'login': 'octocat'}},
+        }
+        self.deliver('pull_request', pull_request)
+        self.deliver('pull_request', {**pull_request, 'action': 'closed'})
+        self.deliver('pull_request', {**pull_request, 'action': 'closed'})
+        self.deliver('pull_request', pull_request)
+
+        activity = RepositoryActivity.objects.get()
+        self.assertEqual(activity.student, self.student)
+        self.assertEqual(activity.last_commit_on.isoformat(), '2024-02-02T10:00:00+00:00')
+        self.assertEqual(activity.commit_count, 4)
+        self.assertEqual(activity.open_pull_requests, 1)
+
+    @requires_valkey
+    def test_redelivery_is_recorded_once(self):
+        delivery = str(uuid.uuid4())
+        self.addCleanup(valkey_client.delete, f'{DELIVERY_KEY_PREFIX}{delivery}')
+
+        for _ in range(2):
+            response = self.deliver('push', self.push('2024-02-02T10:00:00Z'), delivery=delivery)
+            self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(RepositoryActivity.objects.get().commit_count, 2)
+
+    def test_activity_is_linked_once_the_handle_is_known(self):
+        payload = {**self.push('2024-02-02T10:00:00Z'), 'sender': {'login': 'NewHire'}}
+        self.deliver('push', payload)
+        self.assertIsNone(RepositoryActivity.objects.get(login='newhire').student)
+
+        newcomer = create_student('newcomer')
+        newcomer.github_handle = 'newhire'
+        newcomer.save()
+
+        self.assertEqual(RepositoryActivity.objects.get(login='newhire').student, newcomer)
+
+    def test_member_added_marks_cohort_membership(self):
+        self.deliver('organization', {
+            'action': 'member_added',
+            'organization': {'login': 'nss-98'},
+            'membership': {'user': {'login': 'octocat'}},
+        })
+
+        self.assignment.refresh_from_db()
+        self.assertTrue(self.assignment.is_github_org_member)
+
+
+class FoundationsRollupTests(TestCase):
+    """GET /foundations groups every learner's exercises in a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create(username='coach', is_staff=True)
+        FoundationsLearnerProfile.objects.create(learner_github_id='1', learner_name='ada',
+                                                 cohort_type='evening', cohort_number=12)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.instructor, token=Token.objects.create(user=self.instructor))
+
+    def add_learners(self, start, count):
+        for learner in range(start, start + count):
+            for slug in ('variables', 'functions', 'loops'):
+                FoundationsExercise.objects.create(
+                    learner_github_id=str(learner), learner_name=f'learner{learner}',
+                    title=slug.title(), slug=slug, attempts=2, last_attempt=timezone.now()
+                )
+
+    def rollup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/foundations')
+
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_query_count_is_constant(self):
+        self.add_learners(1, 2)
+        _, baseline = self.rollup()
+
+        self.add_learners(3, 20)
+        learners, grown = self.rollup()
+
+        self.assertEqual(grown, baseline)
+        self.assertEqual(len(learners), 22)
+        self.assertEqual(learners[0]['cohort'], 'evening 12')
+        self.assertEqual(learners[0]['learner_name'], 'learner1')
+        self.assertEqual([exercise['slug'] for exercise in learners[0]['exercises']],
+                         ['variables', 'functions', 'loops'])
+        self.assertEqual(learners[1]['cohort'], 'Unassigned')
+        self.assertEqual(learners[1]['learner_github_id'], '10')
+
+    def test_analytics_are_served_per_cohort(self):
+        start = timezone.now()
+        for learner, (attempts, complete) in enumerate([(1, True), (3, True), (7, False)], start=1):
+            FoundationsExercise.objects.create(
+                learner_github_id=str(learner), learner_name=f'learner{learner}', title='Loops', slug='loops',
+                attempts=attempts, complete=complete, used_solution=learner == 2, first_attempt=start,
+                completed_on=start + timedelta(minutes=10 * learner) if complete else None,
+            )
+        FoundationsExerciseStats.refresh_for_slugs(['loops'])
+
+        response = self.client.get('/foundations/analytics')
+        self.assertEqual(response.status_code, 200)
+
+        loops = response.data[0]
+        self.assertEqual(loops['learners'], 3)
+        self.assertAlmostEqual(loops['completion_rate'], 2 / 3)
+        self.assertEqual(loops['median_attempts'], 3)
+        self.assertEqual(loops['median_minutes_to_complete'], 15)
+        self.assertAlmostEqual(loops['solution_reveal_rate'], 1 / 3)
+        self.assertEqual([learner['learner_github_id'] for learner in loops['stuck_learners']], ['3'])
+        self.assertEqual(sorted(cohort['cohort'] for cohort in loops['cohorts']), ['Unassigned', 'evening 12'])
+
+        response = self.client.get('/foundations/analytics?cohortType=evening&cohortNumber=12')
+        self.assertEqual([(row['cohort'], row['learners']) for row in response.data], [('evening 12', 1)])
+
+
+class FoundationsAnalyticsRefreshTests(TestCase):
+    """The analytics loop skips passes while Valkey is down and survives failed ones"""
+
+    def setUp(self):
+        FoundationsExercise.objects.create(learner_github_id='1', learner_name='ada', title='Loops', slug='loops')
+
+    def test_valkey_outage_is_followed_by_one_full_rebuild(self):
+        stale_set = MagicMock()
+        stale_set.spop.side_effect = [valkey.exceptions.ConnectionError('down'), set(), set()]
+
+        with patch('LearningAPI.foundations_analytics.valkey_client', stale_set), \
+                patch('LearningAPI.foundations_analytics._marks_missed', False):
+            self.assertEqual(refresh_stale(), 0)
+            self.assertFalse(FoundationsExerciseStats.objects.exists())
+
+            # Marks sent during the outage were dropped, so every exercise is rebuilt
+            self.assertEqual(refresh_stale(), 2)
+            self.assertEqual(refresh_stale(), 0)
+
+    def test_loop_outlives_failed_passes(self):
+        command = 'LearningAPI.management.commands.refresh_foundations_analytics'
+        with patch(f'{command}.refresh_stale', side_effect=[RuntimeError('database went away'), 0,
+                                                            KeyboardInterrupt()]) as refresh, \
+                patch(f'{command}.time.sleep'):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('refresh_foundations_analytics', interval=60, stdout=StringIO())
+
+        self.assertEqual(refresh.call_count, 3)
+
+
+class FoundationsSyncTests(TestCase):
+    """POST /foundations/sync writes a session's progress with one upsert"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.learner = User.objects.create(username='learner')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learner, token=Token.objects.create(user=self.learner))
+
+    def test_repeated_updates_keep_one_row_per_exercise(self):
+        response = self.client.post('/foundations/sync', {
+            'userId': '42',
+            'username': 'grace',
+            'exercises': [
+                {'slug': 'loops', 'title': 'Loops', 'attempts': 1, 'lastAttempt': '2024-05-01T10:00:00Z'},
+                {'slug': 'arrays', 'title': 'Arrays', 'attempts': 2},
+                {'slug': 'loops', 'title': 'Loops', 'attempts': 3, 'completed': True,
+                 'completedAt': '2024-05-01T11:00:00Z'},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['saved'], 2)
+
+        response = self.client.put('/foundations/arrays', {
+            'userId': '42', 'username': 'grace', 'title': 'Arrays', 'attempts': 5,
+        }, format='json')
+        self.assertEqual(response.status_code, 204)
+
+        attempts = dict(FoundationsExercise.objects.values_list('slug', 'attempts'))
+        self.assertEqual(attempts, {'loops': 3, 'arrays': 5})
+        self.assertTrue(FoundationsExercise.objects.get(slug='loops').complete)
+        self.assertEqual(FoundationsLearnerProfile.objects.filter(learner_github_id='42').count(), 1)
+
+    def test_identical_code_is_stored_once(self):
+        code = 'for (const item of items) {\n    console.log(item)\n}\n'
+        for user_id in ('42', '43'):
+            self.client.put('/foundations/loops', {
+                'userId': user_id, 'title': 'Loops', 'completed': True, 'completedCode': code,
+            }, format='json')
+
+        self.assertEqual(FoundationsSolution.objects.count(), 1)
+
+        response = self.client.get('/foundations/43/exercises')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['completed_code'], code)
+
+    def test_exports_stream_ndjson_and_csv(self):
+        self.client.post('/foundations/sync', {
+            'userId': '42', 'username': 'grace',
+            'exercises': [{'slug': 'loops', 'title': 'Loops, part 1', 'lastAttempt': '2024-05-01T10:00:00Z'}],
+        }, format='json')
+        staff = User.objects.create(username='exporter', is_staff=True)
+        staff.groups.add(Group.objects.create(name='Staff'))
+        self.client.force_authenticate(user=staff, token=Token.objects.create(user=staff))
+
+        response = self.client.get('/exports/foundations.ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual((rows[0]['slug'], rows[0]['last_attempt']), ('loops', '2024-05-01T10:00:00Z'))
+
+        response = self.client.get('/exports/foundations.csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'learner_github_id', 'learner_name', 'slug'])
+        self.assertIn('"Loops, part 1"', lines[1])
+
+        self.assertEqual(self.client.get('/exports/foundations.xml').status_code, 404)
+
+    def test_invalid_timestamp_is_rejected(self):
+        response = self.client.post('/foundations/sync', {
+            'userId': '42',
+            'exercises': [{'slug': 'loops', 'lastAttempt': 'yesterday'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FoundationsExercise.objects.exists())
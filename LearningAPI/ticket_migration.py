@@ -0,0 +1,167 @@
+"""Issue ticket migration requests for the Monarch service
+
+Each request is an entry on a Valkey Stream, read by Monarch through a
+consumer group at whatever pace it chooses. Entries survive a Monarch
+restart, and the entry id is stored on the team so its progress can be
+reported and repeat requests skipped.
+
+Consumer contract:
+    XREADGROUP GROUP monarch <consumer> COUNT 1 STREAMS ticket_migrations >
+    The entry's `payload` field is the JSON message Monarch used to receive
+    on the channel_migrate_issue_tickets pub/sub channel.
+    XACK once the tickets are migrated. To report a failure, HSET the entry
+    id with a reason in `ticket_migrations:failures`, then XACK.
+
+Only `trim_consumed()` may trim the stream. It removes entries the group
+has received and acknowledged, never ones still waiting, so an entry that
+is missing and was never delivered can only have been lost.
+"""
+import json
+
+import valkey
+from django.db import transaction
+from django.utils import timezone
+
+from LearningAPI.models.people import StudentTeam
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("ticket_migration")
+
+STREAM_KEY = 'ticket_migrations'
+GROUP = 'monarch'
+FAILURES_KEY = 'ticket_migrations:failures'
+
+# An entry delivered this many times without an ack is treated as failed
+MAX_DELIVERIES = 3
+
+
+def stream_id(value):
+    """Sortable form of a stream entry id such as '1700000000000-0'"""
+    value = value.decode() if isinstance(value, bytes) else value
+    milliseconds, sequence = value.split('-')
+    return (int(milliseconds), int(sequence))
+
+
+def ensure_group():
+    try:
+        valkey_client.xgroup_create(STREAM_KEY, GROUP, id='0', mkstream=True)
+    except valkey.exceptions.ResponseError as ex:
+        if 'BUSYGROUP' not in str(ex):
+            raise
+
+
+def consumer_group():
+    """The group's XINFO GROUPS entry, or None if it does not exist yet"""
+    groups = valkey_client.xinfo_groups(STREAM_KEY)
+    return next((group for group in groups if group['name'] in (GROUP, GROUP.encode())), None)
+
+
+def trim_consumed():
+    """Drop entries the group has acknowledged, keeping every entry still waiting"""
+    group = consumer_group()
+    if group is None:
+        return
+
+    # Everything from the oldest unacknowledged entry on must stay, as must
+    # anything not yet delivered
+    floor = group['last-delivered-id']
+    pending = valkey_client.xpending(STREAM_KEY, GROUP)
+    if pending['pending']:
+        floor = min(floor, pending['min'], key=stream_id)
+
+    valkey_client.xtrim(STREAM_KEY, minid=floor, approximate=True)
+
+
+def entry_status(message_id):
+    """Where a stream entry is in the consumer group: pending, acked or failed"""
+    if valkey_client.hexists(FAILURES_KEY, message_id):
+        return StudentTeam.MIGRATION_FAILED
+
+    try:
+        group = consumer_group()
+    except valkey.exceptions.ResponseError:
+        # The stream itself is gone, so the entry can never be consumed
+        return StudentTeam.MIGRATION_FAILED
+
+    if group is None:
+        return StudentTeam.MIGRATION_PENDING
+
+    delivered = valkey_client.xpending_range(STREAM_KEY, GROUP, min=message_id, max=message_id, count=1)
+    if delivered:
+        if delivered[0]['times_delivered'] >= MAX_DELIVERIES:
+            return StudentTeam.MIGRATION_FAILED
+        return StudentTeam.MIGRATION_PENDING
+
+    if stream_id(message_id) <= stream_id(group['last-delivered-id']):
+        # Delivered and no longer pending. Trimmed or not, it was acknowledged.
+        return StudentTeam.MIGRATION_ACKED
+
+    if not valkey_client.xrange(STREAM_KEY, min=message_id, max=message_id, count=1):
+        # Trimmed before Monarch ever read it
+        return StudentTeam.MIGRATION_FAILED
+
+    return StudentTeam.MIGRATION_PENDING
+
+
+def refresh_status(team):
+    """Update the team's stored migration status from the stream. Acked and failed are final."""
+    if team.migration_message_id is None or team.migration_status != StudentTeam.MIGRATION_PENDING:
+        return team.migration_status
+
+    try:
+        current = entry_status(team.migration_message_id)
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("ticket_migration_status_unavailable", team_id=team.id, error=str(ex))
+        return team.migration_status
+
+    if current != team.migration_status:
+        team.migration_status = current
+        team.save(update_fields=['migration_status'])
+
+    return current
+
+
+def request_ticket_migration(team, notification_channel, source_repo, target_repositories, force=False):
+    """Add a migration entry for the team unless one is pending or already done
+
+    Args:
+        force (bool): Add a new entry even if the last one was acknowledged
+
+    Returns:
+        bool: Whether a new entry was added
+    """
+    fields = ['migration_message_id', 'migration_status', 'migration_requested_on']
+
+    with transaction.atomic():
+        # Concurrent requests for the team wait on the row lock, then see
+        # the entry the request before them added
+        locked = StudentTeam.objects.select_for_update().only(*fields).get(pk=team.pk)
+        for field in fields:
+            setattr(team, field, getattr(locked, field))
+
+        current = refresh_status(team)
+        if current == StudentTeam.MIGRATION_PENDING or (current == StudentTeam.MIGRATION_ACKED and not force):
+            return False
+
+        ensure_group()
+        message_id = valkey_client.xadd(STREAM_KEY, {
+            'team_id': team.id,
+            'payload': json.dumps({
+                'notification_channel': notification_channel,
+                'source_repo': source_repo,
+                'all_target_repositories': target_repositories
+            })
+        })
+
+        team.migration_message_id = message_id.decode() if isinstance(message_id, bytes) else message_id
+        team.migration_status = StudentTeam.MIGRATION_PENDING
+        team.migration_requested_on = timezone.now()
+        team.save(update_fields=fields)
+
+    try:
+        trim_consumed()
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("ticket_migration_trim_failed", error=str(ex))
+
+    logger.info("ticket_migration_requested", team_id=team.id, message_id=team.migration_message_id)
+    return True
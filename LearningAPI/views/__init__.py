@@ -2,6 +2,7 @@ from .cohort_view import CohortViewSet
 from .cohort_info import CohortInfoViewSet
 from .cohort_date_view import CohortEventsViewSet
 from .cohort_event_type import CohortEventTypeViewSet
+from .cohort_stream import cohort_event_stream, stream_ticket
 from .capstone_view import CapstoneViewSet
 from .student_view import StudentViewSet
 from .auth import register_user
@@ -29,6 +30,10 @@ from .student_note_view import StudentNoteViewSet
 from .personality_view import PersonalityView
 from .book_assessment import BookAssessmentView
 from .popular_query import popular_queries
+from .github_status import github_status
+from .github_webhook import github_webhook
+from .exports import export_dataset
 from .student_note_type_view import StudentNoteTypeViewSet
 from .team_maker_view import TeamMakerView
 from .foundations import FoundationsViewSet
+from .provisioning_job_view import ProvisioningJobViewSet
@@ -1,5 +1,3 @@
-import os
-import requests
 import logging
 
 from rest_framework import serializers
@@ -9,6 +7,8 @@ from rest_framework.response import Response
 
 from ..models.coursework import Capstone, Course, CapstoneTimeline
 from ..models.people import NssUser, Cohort
+from ..identity import get_identity
+from ..slack_outbox import queue_instructor_message, queue_slack_message
 
 
 class CapstonePermission(permissions.BasePermission):
@@ -32,7 +32,7 @@ class CapstoneViewSet(ViewSet):
         Returns:
             Response -- JSON serialized instance
         """
-        student = NssUser.objects.get(user=request.auth.user)
+        student = get_identity(request).nss_user
 
         try:
             course = Course.objects.get(pk=request.data.get('course', None))
@@ -57,38 +57,19 @@ class CapstoneViewSet(ViewSet):
 
         # Send message to instructors
         try:
-            slack_channel = student.assigned_cohorts.order_by("-id").first().cohort.slack_channel
-
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
+            cohort = student.assigned_cohorts.order_by("-id").first().cohort
 
             # Send message to instructor channel
-            channel_payload = {
-                "text": f"{student} has submitted their {course} capstone proposal",
-                "token": os.getenv("SLACK_BOT_TOKEN"),
-                "channel": slack_channel
-            }
-
-            requests.post(
-                "https://slack.com/api/chat.postMessage",
-                data=channel_payload,
-                headers=headers,
-                timeout=10
+            queue_instructor_message(
+                cohort_id=cohort.id,
+                text=f"{student} has submitted their {course} capstone proposal",
+                channel=cohort.slack_channel
             )
 
             # Send message to student
-            channel_payload = {
-                "text": f":mortar_board: Your {course} capstone proposal was successfully submitted.\n\n\nIf you make changes to anything in your proposal, you do not need to submit again.",
-                "token": os.getenv("SLACK_BOT_TOKEN"),
-                "channel": student.slack_handle
-            }
-
-            requests.post(
-                "https://slack.com/api/chat.postMessage",
-                data=channel_payload,
-                headers=headers,
-                timeout=10
+            queue_slack_message(
+                text=f":mortar_board: Your {course} capstone proposal was successfully submitted.\n\n\nIf you make changes to anything in your proposal, you do not need to submit again.",
+                channel=student.slack_handle
             )
         except Exception as ex:
             logger = logging.getLogger("LearningPlatform")
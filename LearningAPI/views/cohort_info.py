@@ -63,6 +63,17 @@ class CohortInfoViewSet(ViewSet):
         Returns:
             Response -- Empty body with 204 status code
         """
+        digest_minutes = request.data.get('instructor_digest_minutes', None)
+        if 'instructor_digest_minutes' in request.data:
+            try:
+                # Through str() so that null, true and 1.5 are refused, not coerced
+                digest_minutes = int(str(digest_minutes))
+            except ValueError:
+                digest_minutes = -1
+
+            if digest_minutes < 0:
+                return Response({"reason": "instructor_digest_minutes must be a whole number of minutes, 0 or more."}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             info = CohortInfo.objects.get(pk=pk)
             info.attendance_sheet_url = request.data.get('attendance_sheet_url', None)
@@ -71,6 +82,8 @@ class CohortInfoViewSet(ViewSet):
             info.server_course_url = request.data.get('server_course_url', None)
             info.client_course_url = request.data.get('client_course_url', None)
             info.zoom_url = request.data.get('zoom_url', None)
+            if digest_minutes is not None:
+                info.instructor_digest_minutes = digest_minutes
             info.save()
 
         except CohortInfo.DoesNotExist:
@@ -110,6 +123,6 @@ class CohortInfoSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'cohort', 'attendance_sheet_url', 'github_classroom_url',
             'student_organization_url', 'client_course_url', 'zoom_url',
-            'server_course_url'
+            'server_course_url', 'instructor_digest_minutes'
         )
 
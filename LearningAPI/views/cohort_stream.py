@@ -0,0 +1,158 @@
+"""Server-sent event stream of cohort dashboard changes"""
+import secrets
+
+import valkey.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from LearningAPI.utils import cohort_event_channel, get_logger, valkey_client
+
+logger = get_logger("cohort_stream")
+
+# Seconds between keepalive comments. Proxies drop idle connections after 60.
+KEEPALIVE_INTERVAL = 20
+
+
+# Seconds a stream ticket can be redeemed for. Tickets are single use.
+TICKET_TTL = 60
+
+
+def stream_ticket_key(ticket):
+    return f'stream_ticket:{ticket}'
+
+
+@api_view(['POST'])
+def stream_ticket(request, cohort_id):
+    """Issue a single-use ticket for opening one cohort's event stream
+
+    The browser EventSource API cannot send an Authorization header, so the
+    dashboard requests a ticket with its API token and opens
+    `/cohorts/{id}/stream?ticket=<ticket>` within a minute. Request a new
+    ticket before every reconnect. The API token never appears in a URL.
+    """
+    if not request.auth.user.is_staff:
+        return Response({'message': 'You must be NSS staff'}, status=status.HTTP_403_FORBIDDEN)
+
+    ticket = secrets.token_urlsafe(32)
+    try:
+        valkey_client.set(stream_ticket_key(ticket), f'{request.auth.user.id}:{cohort_id}', ex=TICKET_TTL)
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("stream_ticket_unavailable", cohort_id=cohort_id, error=str(ex))
+        return Response({'message': 'Live updates are unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return Response({'ticket': ticket, 'expires_in': TICKET_TTL}, status=status.HTTP_201_CREATED)
+
+
+@sync_to_async
+def staff_user(user_id=None, key=None):
+    """The active staff user with the given id or owning the API token, or None"""
+    if key is not None:
+        token = Token.objects.select_related('user').filter(key=key).first()
+        user = token.user if token else None
+    else:
+        user = User.objects.filter(pk=user_id).first()
+
+    if user is None or not user.is_active or not user.is_staff:
+        return None
+
+    return user
+
+
+async def redeem_ticket(ticket, cohort_id):
+    """Id of the user a ticket was issued to, if it is unused and for this cohort"""
+    client = valkey.asyncio.Valkey(
+        host=settings.VALKEY_CONFIG['HOST'],
+        port=settings.VALKEY_CONFIG['PORT'],
+        db=settings.VALKEY_CONFIG['DB'],
+    )
+
+    try:
+        value = await client.getdel(stream_ticket_key(ticket))
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("stream_ticket_unavailable", cohort_id=cohort_id, error=str(ex))
+        return None
+    finally:
+        await client.aclose()
+
+    if value is None:
+        return None
+
+    user_id, ticket_cohort_id = value.decode().split(':')
+    return int(user_id) if int(ticket_cohort_id) == cohort_id else None
+
+
+async def stream_user(request, cohort_id):
+    """The staff user opening a stream, from an Authorization header or a stream ticket"""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        return await staff_user(key=header[len('Token '):].strip())
+
+    ticket = request.GET.get('ticket')
+    if ticket:
+        user_id = await redeem_ticket(ticket, cohort_id)
+        if user_id is not None:
+            return await staff_user(user_id=user_id)
+
+    return None
+
+
+async def cohort_events(cohort_id):
+    """Relay every event published for a cohort as SSE frames until the client goes away"""
+    client = valkey.asyncio.Valkey(
+        host=settings.VALKEY_CONFIG['HOST'],
+        port=settings.VALKEY_CONFIG['PORT'],
+        db=settings.VALKEY_CONFIG['DB'],
+    )
+    pubsub = client.pubsub()
+
+    try:
+        await pubsub.subscribe(cohort_event_channel(cohort_id))
+        yield 'retry: 5000\n\n'
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=KEEPALIVE_INTERVAL
+            )
+
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+
+            data = message['data']
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+
+            yield f'event: student\ndata: {data}\n\n'
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("cohort_stream_failed", cohort_id=cohort_id, error=str(ex))
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+async def cohort_event_stream(request, cohort_id):
+    """Stream change events for one cohort's students to an instructor dashboard
+
+    Served on the ASGI stream host so a long-lived connection costs one
+    coroutine instead of pinning one of the sync gunicorn workers.
+
+    Each event is a small JSON body such as `{"type": "note", "student": 42}`.
+    Clients re-fetch that student with `GET /students?cohort=<id>&since=<cursor>`.
+    """
+    user = await stream_user(request, cohort_id)
+
+    if user is None:
+        return HttpResponse(status=401)
+
+    response = StreamingHttpResponse(cohort_events(cohort_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
@@ -1,13 +1,14 @@
-from django.db.models import Count, Q
+from django.db.models import Count, Max, Q, Sum
 from django.db import IntegrityError
 from django.http import HttpResponseServerError
 from rest_framework import serializers, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from LearningAPI.models.people import Cohort, NssUser, NssUserCohort, CohortInfo
+from LearningAPI.models.people import Cohort, NssUser, NssUserCohort, CohortInfo, RepositoryActivity
 from LearningAPI.models.coursework import CohortCourse, Course, Project, StudentProject
 from LearningAPI.utils import get_logger, bind_request_context, log_action
+from LearningAPI.identity import get_identity
 
 logger = get_logger("LearningAPI.cohort")
 
@@ -15,7 +16,7 @@ class CohortPermission(permissions.BasePermission):
     """Cohort permissions"""
 
     def has_permission(self, request, view):
-        if view.action in ['create', 'update', 'destroy', 'assign', 'migrate', 'active']:
+        if view.action in ['create', 'update', 'destroy', 'assign', 'migrate', 'active', 'activity']:
             return request.auth.user.is_staff
         elif view.action in ['retrieve', 'list']:
             return True
@@ -203,6 +204,22 @@ class CohortViewSet(ViewSet):
 
             return Response(None, status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=['get', ], detail=True)
+    def activity(self, request, pk):
+        """Repository activity of each student in the cohort, as reported by the GitHub webhook"""
+        activity = RepositoryActivity.objects \
+            .filter(student__assigned_cohorts__cohort_id=pk) \
+            .values('student_id') \
+            .annotate(
+                last_commit_on=Max('last_commit_on'),
+                commits=Sum('commit_count'),
+                open_pull_requests=Sum('open_pull_requests'),
+                repositories=Count('repository', distinct=True),
+            ) \
+            .order_by('student_id')
+
+        return Response(list(activity), status=status.HTTP_200_OK)
+
     @log_action("cohort_migration")
     @action(methods=['put', ], detail=True)
     def migrate(self, request, pk):
@@ -308,7 +325,7 @@ class CohortViewSet(ViewSet):
                 if user_type is not None and user_type == "instructor":
                     req_logger.info("instructor_assignment_attempt")
                     try:
-                        member = NssUser.objects.get(user=request.auth.user)
+                        member = get_identity(request).nss_user
                         req_logger.debug("instructor_found", instructor_id=member.id)
 
                         membership = NssUserCohort.objects.get(nss_user=member)
@@ -439,7 +456,7 @@ class CohortViewSet(ViewSet):
             user_type = request.query_params.get("userType", None)
 
             if user_type is not None and user_type == "instructor":
-                member = NssUser.objects.get(user=request.auth.user)
+                member = get_identity(request).nss_user
                 req_logger.info(
                     "instructor_removal_attempt",
                     instructor_id=member.id,
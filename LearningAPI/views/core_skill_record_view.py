@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from LearningAPI.models.skill import CoreSkill, CoreSkillRecord, CoreSkillRecordEntry
 from LearningAPI.models.people import NssUser
+from LearningAPI.identity import get_identity
 
 
 class CoreSkillRecordViewSet(ModelViewSet):
@@ -47,7 +48,7 @@ class CoreSkillRecordViewSet(ModelViewSet):
             record.save()
             entry = CoreSkillRecordEntry()
             entry.record = record
-            entry.instructor = NssUser.objects.get(user=request.auth.user)
+            entry.instructor = get_identity(request).nss_user
             note = request.data["note"]
             if note == "":
                 entry.note = "Record initiated"
@@ -112,7 +113,7 @@ class CoreSkillRecordViewSet(ModelViewSet):
             try:
                 entry = CoreSkillRecordEntry()
                 entry.record = record
-                entry.instructor = NssUser.objects.get(user=request.auth.user)
+                entry.instructor = get_identity(request).nss_user
                 entry.note = request.data["note"]
                 entry.save()
 
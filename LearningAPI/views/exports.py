@@ -0,0 +1,145 @@
+"""Streaming NDJSON and CSV exports of Foundations, learning record and roster data"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from LearningAPI.decorators import is_staff
+from LearningAPI.models.coursework import FoundationsExercise
+from LearningAPI.models.people import NssUserCohort
+from LearningAPI.models.skill import LearningRecord
+
+# Rows fetched from the server-side cursor at a time
+CHUNK_SIZE = 2000
+
+# Each dataset is (column name, ORM lookup) pairs
+FOUNDATIONS_COLUMNS = (
+    ('id', 'id'),
+    ('learner_github_id', 'learner_github_id'),
+    ('learner_name', 'learner_name'),
+    ('slug', 'slug'),
+    ('title', 'title'),
+    ('attempts', 'attempts'),
+    ('complete', 'complete'),
+    ('used_solution', 'used_solution'),
+    ('first_attempt', 'first_attempt'),
+    ('last_attempt', 'last_attempt'),
+    ('completed_on', 'completed_on'),
+)
+
+RECORD_COLUMNS = (
+    ('id', 'id'),
+    ('student_id', 'student_id'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('github_handle', 'student__github_handle'),
+    ('objective', 'weight__label'),
+    ('weight', 'weight__weight'),
+    ('achieved', 'achieved'),
+    ('created_on', 'created_on'),
+)
+
+ROSTER_COLUMNS = (
+    ('cohort_id', 'cohort_id'),
+    ('cohort', 'cohort__name'),
+    ('student_id', 'nss_user_id'),
+    ('first_name', 'nss_user__user__first_name'),
+    ('last_name', 'nss_user__user__last_name'),
+    ('email', 'nss_user__user__email'),
+    ('github_handle', 'nss_user__github_handle'),
+    ('slack_handle', 'nss_user__slack_handle'),
+    ('is_github_org_member', 'is_github_org_member'),
+    ('technical_score', 'nss_user__technical_score'),
+    ('core_skill_mean', 'nss_user__core_skill_mean'),
+    ('score', 'nss_user__final_score'),
+)
+
+
+def foundations_rows(request):
+    return FoundationsExercise.objects.order_by('pk'), FOUNDATIONS_COLUMNS
+
+
+def learning_record_rows(request):
+    records = LearningRecord.objects.order_by('pk')
+
+    cohort = request.query_params.get('cohort', None)
+    if cohort is not None:
+        records = records.filter(student__assigned_cohorts__cohort_id=cohort)
+
+    return records, RECORD_COLUMNS
+
+
+def roster_rows(request):
+    members = NssUserCohort.objects \
+        .filter(nss_user__user__is_staff=False) \
+        .order_by('cohort_id', 'nss_user__user__last_name', 'pk')
+
+    cohort = request.query_params.get('cohort', None)
+    if cohort is not None:
+        members = members.filter(cohort_id=cohort)
+
+    return members, ROSTER_COLUMNS
+
+
+DATASETS = {
+    'foundations': foundations_rows,
+    'records': learning_record_rows,
+    'rosters': roster_rows,
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back for streaming"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(names, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_lines(names, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+@api_view(['GET'])
+@is_staff()
+def export_dataset(request, dataset, file_format):
+    """Stream every row of a dataset as NDJSON or CSV
+
+    Rows are read through a server-side cursor and written as they arrive,
+    so the worker's memory use does not grow with the size of the export.
+    `records` and `rosters` accept `?cohort=<id>`.
+    """
+    if dataset not in DATASETS or file_format not in FORMATS:
+        return Response({'message': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        queryset, columns = DATASETS[dataset](request)
+    except ValueError:
+        return Response({'message': 'cohort must be a cohort id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    names = [name for name, _ in columns]
+    rows = queryset.values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=CHUNK_SIZE)
+
+    render, content_type = FORMATS[file_format]
+    response = StreamingHttpResponse(render(names, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{file_format}"'
+    response['X-Accel-Buffering'] = 'no'
+
+    return response
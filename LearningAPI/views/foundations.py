@@ -1,70 +1,105 @@
 """Foundations Course tracking view set module"""
 from datetime import datetime, timedelta
+from itertools import groupby
 from django.utils.dateparse import parse_datetime
-from django.db import IntegrityError
-from django.http import HttpResponseServerError
+from django.db import transaction
 from rest_framework import serializers, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
-from LearningAPI.models.coursework import FoundationsExercise, FoundationsLearnerProfile
+from LearningAPI.foundations_analytics import mark_learner_stale, mark_stale
+from LearningAPI.models.coursework import (FoundationsExercise, FoundationsExerciseStats,
+                                           FoundationsLearnerProfile, FoundationsSolution)
 
 
 class FoundationsPermission(permissions.BasePermission):
     """Foundations permissions"""
 
     def has_permission(self, request, view):
-        if view.action in ['list',]:
+        if view.action in ['list', 'analytics']:
             return request.auth.user.is_staff
-        if view.action in ['update', 'exercises']:
+        if view.action in ['update', 'sync', 'exercises']:
             return True
 
         return False
 
-def create_entry(pk, exercise, request, user_id):
-    """Create or update a FoundationsExercise entry
-    Args:
-        exercise (FoundationsExercise): The FoundationsExercise instance to update or create
-        request (Request): The request object containing data for the exercise
+# Most exercises accepted by one sync request
+SYNC_MAX_EXERCISES = 500
+
+
+def parse_timestamp(value):
+    """ISO 8601 string from the client to a datetime, or None if blank
+
+    Raises:
+        ValueError: The value is not a valid timestamp
+    """
+    if not value:
+        return None
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp: {value}')
+    return parsed
+
+
+def exercise_from_payload(slug, data, user_id, username):
+    """Build an unsaved FoundationsExercise from the client's progress data
+
+    Raises:
+        ValueError: One of the timestamps is invalid
+    """
+    return FoundationsExercise(
+        learner_github_id=user_id,
+        learner_name=username,
+        slug=slug,
+        title=data.get('title', "Undefined"),
+        attempts=data.get('attempts', 0),
+        complete=data.get('completed', False),
+        completed_on=parse_timestamp(data.get('completedAt', None)),
+        first_attempt=parse_timestamp(data.get('firstAttempt', None)),
+        last_attempt=parse_timestamp(data.get('lastAttempt', None)),
+        solution=FoundationsSolution.for_code(data.get('completedCode', None)),
+        used_solution=data.get('solutionShown', False) or False,
+    )
+
+
+def ensure_profile(user_id, username):
+    """Create the learner's profile on their first recorded exercise"""
+    if not FoundationsLearnerProfile.objects.filter(learner_github_id=user_id).exists():
+        FoundationsLearnerProfile.objects.create(learner_github_id=user_id, learner_name=username)
+
+
+def learner_rollup(exercises):
+    """Group exercises by learner with each learner's assigned cohort
+
+    Runs two queries however many learners there are: one for the
+    exercises and one for the profiles of the learners among them.
+
+    Returns:
+        list: {learner_name, cohort, exercises, learner_github_id} per learner
     """
-    exercise.cohort = "Unassigned"
-    exercise.slug = pk
-    exercise.attempts = request.data.get('attempts', 0)
-    exercise.learner_name = request.data.get('username', "")
-    exercise.complete = request.data.get('completed', False)
-    exercise.title = request.data.get('title', "Undefined")
-
-    # Parse ISO 8601 timestamp for completed_on
-    completed_at = request.data.get('completedAt', None)
-    if completed_at:
-        dt_object = parse_datetime(completed_at)
-        django_date_string = dt_object.strftime('%Y-%m-%d %H:%M:%S.%f%z')
-        exercise.completed_on = django_date_string
-    else:
-        exercise.completed_on = None
-
-    # Parse ISO 8601 timestamp for first_attempt
-    first_attempt = request.data.get('firstAttempt', None)
-    if first_attempt:
-        dt_object = parse_datetime(first_attempt)
-        django_date_string = dt_object.strftime('%Y-%m-%d %H:%M:%S.%f%z')
-        exercise.first_attempt = django_date_string
-    else:
-        exercise.first_attempt = None
-
-    # Parse ISO 8601 timestamp for last_attempt
-    last_attempt = request.data.get('lastAttempt', None)
-    if last_attempt:
-        dt_object = parse_datetime(last_attempt)
-        django_date_string = dt_object.strftime('%Y-%m-%d %H:%M:%S.%f%z')
-        exercise.last_attempt = django_date_string
-    else:
-        exercise.last_attempt = None
-
-    exercise.completed_code = request.data.get('completedCode', None)
-    exercise.used_solution = request.data.get('solutionShown', None)
-    exercise.learner_github_id = user_id
-    exercise.save()
+    exercises = exercises.order_by('learner_github_id', 'pk')
+    profiles = {
+        profile.learner_github_id: f'{profile.cohort_type} {profile.cohort_number}'
+        for profile in FoundationsLearnerProfile.objects
+            .filter(learner_github_id__in=exercises.values('learner_github_id'))
+            .only('learner_github_id', 'cohort_type', 'cohort_number')
+    }
+
+    # One serializer pass over every row, then split into learners
+    learners = []
+    for learner_github_id, rows in groupby(FoundationsSerializer(exercises, many=True).data,
+                                           key=lambda row: row['learner_github_id']):
+        rows = list(rows)
+        learners.append({
+            'learner_name': rows[0]['learner_name'],
+            'cohort': profiles.get(learner_github_id, 'Unassigned'),
+            'exercises': rows,
+            'learner_github_id': learner_github_id,
+        })
+
+    return learners
+
 
 class FoundationsViewSet(ViewSet):
     """Foundations view set"""
@@ -78,31 +113,59 @@ class FoundationsViewSet(ViewSet):
             Response -- Empty body with 204 status code
         """
         user_id = request.data.get('userId', None)
-        if user_id is not None:
-            try:
-                existing_profile = FoundationsLearnerProfile.objects.get(learner_github_id=user_id)
-            except FoundationsLearnerProfile.DoesNotExist:
-                # If the learner profile does not exist, create it
-                existing_profile = FoundationsLearnerProfile()
-                existing_profile.learner_github_id = user_id
-                existing_profile.learner_name = request.data.get('username', "")
-                existing_profile.save()
-
-            try:
-                exercise = FoundationsExercise.objects.get(slug=pk, learner_github_id=user_id)
-            except FoundationsExercise.DoesNotExist:
-                # If the foundations exercise entry does not exist, create it
-                exercise = FoundationsExercise()
-            except IntegrityError:
-                return Response(None, status=status.HTTP_404_NOT_FOUND)
-            except Exception as ex:
-                return HttpResponseServerError(ex)
-
-            create_entry(pk, exercise, request, user_id)
-            return Response(None, status=status.HTTP_204_NO_CONTENT)
-        else:
+        if user_id is None:
             return Response({'message': 'You must provide a \'userId\' in the request body'}, status=status.HTTP_400_BAD_REQUEST)
 
+        username = request.data.get('username', "")
+        try:
+            exercise = exercise_from_payload(pk, request.data, user_id, username)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            ensure_profile(user_id, username)
+            FoundationsExercise.upsert([exercise])
+
+        mark_stale([exercise.slug])
+        return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """Record many exercise updates for one learner in a single statement
+
+        Expects `userId`, `username` and an `exercises` list, each entry holding
+        a `slug` and the same fields as the body of PUT /foundations/{slug}.
+
+        Returns:
+            Response -- JSON with the number of exercises saved
+        """
+        user_id = request.data.get('userId', None)
+        entries = request.data.get('exercises', None)
+        if user_id is None or not isinstance(entries, list):
+            return Response({'message': 'You must provide a \'userId\' and an \'exercises\' list in the request body'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if len(entries) > SYNC_MAX_EXERCISES:
+            return Response({'message': f'Send at most {SYNC_MAX_EXERCISES} exercises per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        username = request.data.get('username', "")
+        try:
+            exercises = [
+                exercise_from_payload(entry['slug'], entry, user_id, username)
+                for entry in entries
+            ]
+        except (KeyError, TypeError):
+            return Response({'message': 'Every exercise must have a \'slug\''}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            ensure_profile(user_id, username)
+            saved = FoundationsExercise.upsert(exercises)
+
+        mark_stale(exercise.slug for exercise in saved)
+        return Response({'saved': len(saved)}, status=status.HTTP_200_OK)
 
     def list(self, request):
         """Handle GET requests to get all foundations exercises
@@ -114,8 +177,7 @@ class FoundationsViewSet(ViewSet):
         learner_name = request.query_params.get('learnerName', None)
         last_attempt_param = request.query_params.get('lastAttempt', None)
 
-        # Get all exercises ordered by learner_github_id, and grouped by learner_name
-        exercises = FoundationsExercise.objects.all().order_by('learner_github_id')
+        exercises = FoundationsExercise.objects.all()
 
         # Filter by learner_name if provided
         if learner_name is not None:
@@ -136,39 +198,46 @@ class FoundationsViewSet(ViewSet):
             ninety_days_ago = datetime.now().date() - timedelta(days=90)
             exercises = exercises.filter(last_attempt__gte=ninety_days_ago)
 
-        # Create hashmap to store unique learners. Github ID is the key and a list of exercises is the value
-        # This will help in filtering out duplicate learners
-        unique_learners = {}
-        for exercise in exercises:
-            if exercise.learner_github_id not in unique_learners:
-                unique_learners[exercise.learner_github_id] = {
-                    'learner_name': exercise.learner_name,
-                    'exercises': []
-                }
-            unique_learners[exercise.learner_github_id]['exercises'].append(exercise)
-            try:
-                profile = FoundationsLearnerProfile.objects.get(learner_github_id=exercise.learner_github_id)
-            except FoundationsLearnerProfile.DoesNotExist:
-                profile = None
+        return Response(learner_rollup(exercises))
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Completion funnel and stuck learners for every exercise
+
+        `cohortType` and `cohortNumber` limit the numbers to one cohort.
+        Without them, each exercise's overall numbers include a `cohorts`
+        breakdown. Served from rows kept by refresh_foundations_analytics.
 
-            assigned_cohort = f'{profile.cohort_type} {profile.cohort_number}' if profile else 'Unassigned'
-            unique_learners[exercise.learner_github_id]['cohort'] = assigned_cohort
+        Returns:
+            Response -- JSON serialized list of exercise analytics
+        """
+        cohort_type = request.query_params.get('cohortType', None)
+        cohort_number = request.query_params.get('cohortNumber', None)
 
+        if cohort_type is not None and cohort_number is not None:
+            stats = FoundationsExerciseStats.objects \
+                .filter(cohort=f'{cohort_type} {cohort_number}') \
+                .order_by('slug')
+            return Response(FoundationsExerciseStatsSerializer(stats, many=True).data)
 
-        # Serialize the unique learners with UniqueLearnerSerializer
-        unique_learners_list = []
-        for learner_id, learner_data in unique_learners.items():
-            unique_learners_list.append(UniqueLearnerSerializer(data=learner_data).create(learner_data))
+        rows = FoundationsExerciseStatsSerializer(
+            FoundationsExerciseStats.objects.order_by('slug', 'cohort'), many=True
+        ).data
 
+        exercises = []
+        for _, group in groupby(rows, key=lambda row: row['slug']):
+            group = list(group)
+            overall = next(row for row in group if row['cohort'] == FoundationsExerciseStats.ALL_LEARNERS)
+            exercises.append({**overall, 'cohorts': [row for row in group if row is not overall]})
 
-        return Response(unique_learners_list)
+        return Response(exercises)
 
     # Custom action to update the cohort type and number for a specific learner
     @action(detail=True, methods=['get'])
     def exercises(self, request, pk=None):
         # Get all exercises for a specific learner
         if pk is not None:
-            exercises = FoundationsExercise.objects.filter(learner_github_id=pk).order_by('pk')
+            exercises = FoundationsExercise.objects.filter(learner_github_id=pk).select_related('solution').order_by('pk')
             serializer = LearnerProgressSerializer(exercises, many=True)
             return Response(serializer.data)
         else:
@@ -193,6 +262,7 @@ class FoundationsViewSet(ViewSet):
             profile.cohort_type = cohort_type
             profile.cohort_number = cohort_number
             profile.save()
+            mark_learner_stale(user_id)
             return Response(None, status=status.HTTP_204_NO_CONTENT)
         else:
             return Response({'message': 'You must provide a \'userId\', \'cohortType\', and \'cohortNumber\' in the request body'}, status=status.HTTP_400_BAD_REQUEST)
@@ -219,19 +289,11 @@ class FoundationsSerializer(serializers.ModelSerializer):
                   'last_attempt', 'used_solution', )
 
 
-# Create a serializer that converts the `unique_learners` structure to JSON
-class UniqueLearnerSerializer(serializers.Serializer):
-    """JSON serializer for unique learners"""
-    learner_name = serializers.CharField()
-    cohort = serializers.CharField()
-    exercises = FoundationsSerializer(many=True)
-
-    def create(self, validated_data):
-        """Create a new unique learner"""
-        exercises = FoundationsSerializer(validated_data.get('exercises', []), many=True)
-        return {
-            'learner_name': validated_data.get('learner_name'),
-            'cohort': validated_data.get('cohort'),
-            'exercises': exercises.data,
-            'learner_github_id': exercises.data[0].get('learner_github_id'),
-        }
+class FoundationsExerciseStatsSerializer(serializers.ModelSerializer):
+    """JSON serializer for pre-aggregated Foundations exercise analytics"""
+
+    class Meta:
+        model = FoundationsExerciseStats
+        fields = ('slug', 'title', 'cohort', 'learners', 'completed',
+                  'completion_rate', 'median_attempts', 'median_minutes_to_complete',
+                  'solution_reveal_rate', 'stuck_count', 'stuck_learners', 'updated_on')
@@ -0,0 +1,17 @@
+from django.conf import settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+
+from LearningAPI.decorators import is_staff
+from LearningAPI.github_client import RateLimitBudget, etag_cache_stats
+
+
+@api_view(['GET'])
+@is_staff()
+def github_status(request):
+    """Shared GitHub rate limit budget and conditional GET cache counters, for monitoring"""
+    return Response({
+        'rate_limit': RateLimitBudget(settings.GITHUB_CONFIG['RESERVE']).state(),
+        'etag_cache': etag_cache_stats(),
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,160 @@
+"""Receiver for GitHub organization webhooks"""
+import hashlib
+import hmac
+import json
+
+import valkey
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from LearningAPI.models.people import CohortInfo, NssUserCohort, RepositoryActivity
+from LearningAPI.utils import get_logger, valkey_client
+
+logger = get_logger("github_webhook")
+
+DELIVERY_KEY_PREFIX = 'github:delivery:'
+
+# GitHub retries failed deliveries and allows manual redelivery for a few
+# days, so delivery ids are remembered for a week
+DELIVERY_TTL = 7 * 24 * 60 * 60
+
+# Pull request actions and how each changes the author's open count
+PULL_REQUEST_CHANGES = {'opened': 1, 'reopened': 1, 'closed': -1}
+
+
+def valid_signature(body, signature):
+    """Whether X-Hub-Signature-256 is the HMAC of the body with our webhook secret"""
+    secret = settings.GITHUB_CONFIG['WEBHOOK_SECRET']
+    if not secret or not signature:
+        return False
+
+    expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def cohort_ids_for_org(org_login):
+    """Cohorts whose student organization is `org_login`"""
+    return list(CohortInfo.objects
+                .filter(student_organization_url__iendswith=f'/{org_login}')
+                .values_list('cohort_id', flat=True))
+
+
+def claim_delivery(delivery_id):
+    """Whether this is the first time the delivery has been seen
+
+    Deliveries without an id, and every delivery while Valkey is
+    unreachable, are processed rather than dropped.
+    """
+    if not delivery_id:
+        return True
+
+    try:
+        return bool(valkey_client.set(f'{DELIVERY_KEY_PREFIX}{delivery_id}', 1, nx=True, ex=DELIVERY_TTL))
+    except valkey.exceptions.ValkeyError as ex:
+        logger.warning("github_delivery_check_unavailable", delivery=delivery_id, error=str(ex))
+        return True
+
+
+def release_delivery(delivery_id):
+    """Forget a delivery that failed, so GitHub's retry of it is processed"""
+    if not delivery_id:
+        return
+
+    try:
+        valkey_client.delete(f'{DELIVERY_KEY_PREFIX}{delivery_id}')
+    except valkey.exceptions.ValkeyError:
+        pass
+
+
+def handle_push(payload):
+    head_commit = payload.get('head_commit')
+    if not head_commit:
+        # Branch deletions carry no commits
+        return
+
+    RepositoryActivity.record_push(
+        repository=payload['repository']['full_name'],
+        login=payload['sender']['login'],
+        committed_on=parse_datetime(head_commit['timestamp']),
+        commits=len(payload.get('commits', [])),
+    )
+
+
+def handle_pull_request(payload):
+    change = PULL_REQUEST_CHANGES.get(payload['action'])
+    if change is None:
+        return
+
+    RepositoryActivity.record_pull_request(
+        repository=payload['repository']['full_name'],
+        login=payload['pull_request']['user']['login'],
+        change=change,
+    )
+
+
+def handle_membership(payload):
+    """`organization` member_added and `membership` added both mean an invitation was accepted"""
+    if payload['action'] not in ('member_added', 'added'):
+        return
+
+    member = payload.get('membership', {}).get('user') or payload.get('member')
+    if not member:
+        return
+
+    for cohort_id in cohort_ids_for_org(payload['organization']['login']):
+        NssUserCohort.mark_github_members(cohort_id, [member['login']])
+
+
+HANDLERS = {
+    'push': handle_push,
+    'pull_request': handle_pull_request,
+    'organization': handle_membership,
+    'membership': handle_membership,
+}
+
+
+@csrf_exempt
+@require_POST
+def github_webhook(request):
+    """Ingest push, pull request and membership events from the cohort organizations
+
+    Deliveries from organizations that no cohort uses are acknowledged and
+    ignored, as are event types without a handler. A delivery GitHub sends
+    again under the same X-GitHub-Delivery id is acknowledged and skipped,
+    so redeliveries never count the same commits or pull requests twice.
+    """
+    if not valid_signature(request.body, request.headers.get('X-Hub-Signature-256')):
+        logger.warning("github_webhook_bad_signature", delivery=request.headers.get('X-GitHub-Delivery'))
+        return HttpResponseForbidden()
+
+    event = request.headers.get('X-GitHub-Event')
+    handler = HANDLERS.get(event)
+    if handler is None:
+        return HttpResponse(status=204)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    org_login = (payload.get('organization') or payload.get('repository', {}).get('owner') or {}).get('login')
+    if not org_login or not cohort_ids_for_org(org_login):
+        return HttpResponse(status=204)
+
+    delivery_id = request.headers.get('X-GitHub-Delivery')
+    if not claim_delivery(delivery_id):
+        logger.info("github_webhook_redelivery_skipped", github_event=event, delivery=delivery_id)
+        return HttpResponse(status=204)
+
+    try:
+        handler(payload)
+    except Exception:
+        release_delivery(delivery_id)
+        raise
+
+    logger.info("github_webhook_ingested", github_event=event, org=org_login, delivery=delivery_id)
+
+    return HttpResponse(status=204)
@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 from LearningAPI.models.coursework import LearningObjective, TaxonomyLevel
-from LearningAPI.models.people import NssUser
+from LearningAPI.identity import get_identity
 
 
 class LearningObjectiveViewSet(ViewSet):
@@ -19,7 +19,7 @@ class LearningObjectiveViewSet(ViewSet):
             Response -- JSON serialized instance
         """
         objective = LearningObjective()
-        objective.user = NssUser.objects.get(user=request.auth.user)
+        objective.user = get_identity(request).nss_user
         objective.swbat = request.data["swbat"]
 
         tax_level = TaxonomyLevel.objects.get(pk=int(request.data["taxonomy_id"]))
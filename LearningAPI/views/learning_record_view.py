@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from LearningAPI.models.skill import LearningRecord, LearningRecordEntry, LearningWeight
 from LearningAPI.models.people import NssUser
+from LearningAPI.identity import get_identity
 
 
 class NssUserSerializer(serializers.ModelSerializer):
@@ -116,7 +117,7 @@ class LearningRecordViewSet(ModelViewSet):
             record.save()
             entry = LearningRecordEntry()
             entry.record = record
-            entry.instructor = NssUser.objects.get(user=request.auth.user)
+            entry.instructor = get_identity(request).nss_user
             entry.note = request.data["note"]
             entry.save()
 
@@ -169,8 +170,7 @@ class LearningRecordViewSet(ModelViewSet):
                 entry = LearningRecordEntry()
                 entry.record = record
                 entry.weight = weight
-                entry.instructor = NssUser.objects.get(
-                    user=request.auth.user)
+                entry.instructor = get_identity(request).nss_user
                 entry.note = request.data["note"]
                 entry.save()
 
@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from LearningAPI.models.people import NssUser
-from LearningAPI.utils import SlackAPI
+from LearningAPI.slack_outbox import queue_slack_message
+from LearningAPI.identity import get_identity
 
 @api_view(['POST'])
 def notify(request):
@@ -29,14 +29,14 @@ def notify(request):
 
     if instructors:
         # Get the cohort's instrutor Slack channel
-        target_user = NssUser.objects.get(user=request.auth.user)
+        target_user = get_identity(request).nss_user
         slack_channel = target_user.assigned_cohorts.order_by("-id").first().cohort.slack_channel
-        SlackAPI().send_message( text=message, channel=slack_channel )
+        queue_slack_message( text=message, channel=slack_channel )
         return Response({ 'message': 'Notification sent to instructor channel'}, status=200)
 
     elif student_channel is not None:
         slack_channel = target_user.assigned_cohorts.order_by("-id").first().cohort.slack_channel
-        SlackAPI().send_message( text=message, channel=student_channel )
+        queue_slack_message( text=message, channel=student_channel )
         return Response({ 'message': 'Notification sent to student'}, status=200)
 
     return Response({ 'message': 'Invalid request'}, status=400)
@@ -1,17 +1,10 @@
 import json
-import valkey
-
-from django.conf import settings
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-valkey_client = valkey.Valkey(
-    host=settings.VALKEY_CONFIG['HOST'],
-    port=settings.VALKEY_CONFIG['PORT'],
-    db=settings.VALKEY_CONFIG['DB'],
-)
+from LearningAPI.utils import valkey_client
 
 @api_view(['GET'])
 def popular_queries(request):
@@ -7,10 +7,11 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from allauth.socialaccount.models import SocialAccount
 
-from LearningAPI.utils import GithubRequest
+from LearningAPI.github_client import GithubClient
 from LearningAPI.models.people import Cohort, NssUserCohort, NssUser
 from LearningAPI.models.coursework import StudentProject, Project
 from LearningAPI.utils import get_logger, bind_request_context, log_action
+from LearningAPI.identity import get_identity
 
 logger = get_logger("LearningAPI.profile")
 
@@ -31,7 +32,7 @@ class Profile(ViewSet):
             request.auth.user.first_name = first
             request.auth.user.last_name = last
 
-            request.auth.user.save()
+            request.auth.user.save(update_fields=['first_name', 'last_name'])
 
             return Response(None, status=status.HTTP_204_NO_CONTENT)
 
@@ -61,7 +62,7 @@ class Profile(ViewSet):
             raise ex
 
         try:
-            nss_user = NssUser.objects.get(user=request.auth.user)
+            nss_user = get_identity(request).nss_user
 
         except NssUser.DoesNotExist:
             # User has authorized with Github, but NSSUser hasn't been made yet
@@ -70,6 +71,7 @@ class Profile(ViewSet):
                 user=request.auth.user
             )
             nss_user.save()
+            get_identity(request).nss_user = nss_user
             req_logger.info("NssUser created", user=nss_user.user.username)
 
             # If role is not None, then this user is a staff member and gets the Staff group added to them
@@ -95,7 +97,7 @@ class Profile(ViewSet):
                 req_logger.info("NssUserCohort created", nss_user=nss_user.user.username, cohort=cohort_assignment.name)
 
                 # Add student's github account as a member of the cohort Github organization
-                gh_request = GithubRequest()
+                gh_request = GithubClient()
                 student_org_name = cohort_assignment.info.student_organization_url.split("/")[-1]
                 request_url = f'https://api.github.com/orgs/{student_org_name}/memberships/{person.extra_data["login"]}'
                 data = {"role": "member"}
@@ -133,20 +135,8 @@ class Profile(ViewSet):
             student_cohort = nss_user.assigned_cohorts.first()
             req_logger.info("Assigned cohort found", cohort=student_cohort.cohort.name if student_cohort else "None")
 
-            if not student_cohort.is_github_org_member:
-                # Send a request to the Github API to check the membership status of the user for the cohort Github organization
-                gh_request = GithubRequest()
-                student_org_name = student_cohort.cohort.info.student_organization_url.split("/")[-1]
-                request_url = f'https://api.github.com/orgs/{student_org_name}/memberships/{person.extra_data["login"]}'
-                response = gh_request.get(request_url).json()
-                github_org_membership_status = response.get("state", None)
-
-                if github_org_membership_status == "active":
-                    student_cohort.is_github_org_member = True
-                    student_cohort.save()
-                    req_logger.info("Github organization membership status updated", user=nss_user.user.username, status=github_org_membership_status)
-            else:
-                github_org_membership_status = "active"
+            # The reconcile_github_membership command marks accepted invitations
+            github_org_membership_status = "active" if student_cohort.is_github_org_member else "pending"
 
 
             serializer = ProfileSerializer(
@@ -167,10 +157,10 @@ class Profile(ViewSet):
             profile["person"]["github"]["login"] = person.extra_data["login"]
             profile["person"]["github"]["repos"] = person.extra_data["repos_url"]
             profile["staff"] = request.auth.user.is_staff
-            profile["instructor"] = nss_user.is_instructor
+            profile["instructor"] = get_identity(request).is_instructor
             req_logger.info("Instructor profile requested", user=request.auth.user.username)
 
-            instructor_active_cohort = NssUserCohort.objects.filter(nss_user__user=request.auth.user).first()
+            instructor_active_cohort = nss_user.assigned_cohorts.first()
             req_logger.info("Instructor active cohort found", cohort=instructor_active_cohort.cohort.name if instructor_active_cohort else "None")
 
             if instructor_active_cohort is not None:
@@ -200,8 +190,11 @@ class ProfileSerializer(serializers.ModelSerializer):
         return obj.user.is_staff
 
     def get_instructor(self, obj):
-        user = NssUser.objects.get(user=obj.user)
-        return user.is_instructor
+        identity = get_identity(self.context['request'])
+        if identity.owns(obj):
+            return identity.is_instructor
+
+        return obj.is_instructor
 
     def get_project(self, obj):
         project = StudentProject.objects.filter(student=obj).last()
@@ -233,9 +226,8 @@ class ProfileSerializer(serializers.ModelSerializer):
         return obj.user.email
 
     def get_capstones(self, obj):
-        student = NssUser.objects.get(user=obj.user)
         capstones = []
-        for capstone in student.capstones.all():
+        for capstone in obj.capstones.all():
             capstones.append({
                 "course": capstone.course.name,
                 "proposal": capstone.proposal_url,
@@ -1,10 +1,8 @@
-import os
-import requests
-
 from rest_framework import serializers, permissions, status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from LearningAPI.models.coursework import CapstoneTimeline, Capstone, ProposalStatus
+from LearningAPI.slack_outbox import queue_slack_message
 
 
 class TimelineSerializer(serializers.ModelSerializer):
@@ -50,22 +48,10 @@ class TimelineView(ModelViewSet):
             timeline.status = proposal_status
             timeline.save()
 
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-
             # Send message to student
-            channel_payload = {
-                "text": f":hi: Hello, {capstone.student}!\n\n\n:mortar_board: Your capstone proposal was marked as {proposal_status.status}.",
-                "token": os.getenv("SLACK_BOT_TOKEN"),
-                "channel": capstone.student.slack_handle
-            }
-
-            requests.post(
-                "https://slack.com/api/chat.postMessage",
-                data=channel_payload,
-                headers=headers,
-                timeout=10
+            queue_slack_message(
+                text=f":hi: Hello, {capstone.student}!\n\n\n:mortar_board: Your capstone proposal was marked as {proposal_status.status}.",
+                channel=capstone.student.slack_handle
             )
 
             serialized = TimelineSerializer(timeline).data
@@ -0,0 +1,44 @@
+"""View module for reporting the progress of provisioning jobs"""
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from LearningAPI.identity import get_identity
+from LearningAPI.models.people import ProvisioningJob
+
+
+class ProvisioningJobViewSet(ViewSet):
+    """Provisioning jobs queued by team creation and self-assessment starts"""
+
+    def retrieve(self, request, pk=None):
+        """Handle GET requests for a single job
+
+        Returns:
+            Response -- JSON serialized job with per-step progress
+        """
+        try:
+            job = ProvisioningJob.objects.get(pk=pk)
+        except ProvisioningJob.DoesNotExist:
+            return Response({'message': 'That job does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not request.auth.user.is_staff and job.requested_by_id != get_identity(request).nss_user.id:
+            return Response({'message': 'You are not authorized to view this job.'}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(ProvisioningJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ProvisioningJobSerializer(serializers.ModelSerializer):
+    """JSON serializer for provisioning jobs"""
+
+    class Meta:
+        model = ProvisioningJob
+        fields = ('id', 'kind', 'status', 'steps', 'error', 'attempts',
+                  'available_at', 'created_on', 'started_on', 'finished_on')
+
+
+def accepted(request, job, **extra):
+    """202 response pointing the client at the job's status URL"""
+    job_url = request.build_absolute_uri(f'/jobs/{job.id}')
+    body = {'job': {'id': job.id, 'status': job.status, 'url': job_url}, **extra}
+
+    return Response(body, status=status.HTTP_202_ACCEPTED, headers={'Location': job_url})
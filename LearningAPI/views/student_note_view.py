@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from LearningAPI.models.people import NssUser
 from LearningAPI.models.people import StudentNote, StudentNoteType
+from LearningAPI.identity import get_identity
 
 
 class StudentNoteViewSet(ModelViewSet):
@@ -33,7 +34,7 @@ class StudentNoteViewSet(ModelViewSet):
             Response -- JSON serialized instance
         """
         student = NssUser.objects.get(pk=request.data['studentId'])
-        coach = NssUser.objects.get(user=request.auth.user)
+        coach = get_identity(request).nss_user
 
         note_text = request.data.get('note', None)
         note_type = request.data.get('type', None)
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from LearningAPI.models.people import NssUser
 from LearningAPI.models.people.student_personality import StudentPersonality
+from LearningAPI.identity import get_identity
 
 
 class StudentPersonalityViewSet(ModelViewSet):
@@ -17,7 +18,7 @@ class StudentPersonalityViewSet(ModelViewSet):
             Response -- Empty body with 204 status code
         """
         try:
-            student = NssUser.objects.get(user=request.auth.user)
+            student = get_identity(request).nss_user
 
             # Get value of `testresult` query parameter
             testresult = request.query_params.get('testresult', None)
@@ -1,12 +1,9 @@
 """Student view module"""
-import os
-import json
 import logging
-import requests
 from django.contrib.auth.models import User
-from django.db import connection
 from django.db import IntegrityError
-from django.http import HttpResponseServerError
+from django.db.models import F, Prefetch
+from django.http import HttpResponse, HttpResponseServerError
 from django.utils.decorators import method_decorator
 from rest_framework import serializers, status
 from rest_framework.decorators import action
@@ -14,16 +11,20 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from LearningAPI.utils import GithubRequest, SlackAPI
 from LearningAPI.decorators import is_instructor
 from LearningAPI.models import Tag
 from LearningAPI.models.coursework import StudentProject, Project, Capstone, CapstoneTimeline
 from LearningAPI.models.people import (StudentNote, NssUser, StudentAssessment,
                                        OneOnOneNote, StudentPersonality, Assessment,
-                                       StudentAssessmentStatus, StudentTag)
+                                       StudentAssessmentStatus, StudentTag,
+                                       CohortStudentSnapshot, ProvisioningJob)
 from LearningAPI.models.skill import (CoreSkillRecord, LearningRecord,
                                       LearningRecordEntry)
+from LearningAPI.identity import cohort_assignments_prefetch, get_identity
+from LearningAPI.provisioning import enqueue
+from LearningAPI.slack_outbox import queue_instructor_message, queue_slack_message
 from .personality import myers_briggs_persona
+from .provisioning_job_view import accepted
 
 
 class StudentPagination(PageNumberPagination):
@@ -42,6 +43,27 @@ class StudentViewSet(ModelViewSet):
         """Handle POST operations"""
         return Response(None, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @staticmethod
+    def detail_queryset():
+        """Students with everything `StudentSerializer` reads loaded up front
+
+        The number of queries is fixed no matter how many records, notes or
+        capstones a student has accumulated.
+        """
+        return NssUser.objects.select_related('user').prefetch_related(
+            Prefetch('feedback', queryset=OneOnOneNote.objects.select_related('coach__user')),
+            Prefetch('notes', queryset=StudentNote.objects.select_related('coach__user')),
+            Prefetch('learning_records', queryset=LearningRecord.objects
+                .select_related('weight')
+                .prefetch_related(
+                    Prefetch('entries', queryset=LearningRecordEntry.objects.select_related('instructor__user'))
+                )),
+            Prefetch('core_skills', queryset=CoreSkillRecord.objects.select_related('skill')),
+            Prefetch('projects', queryset=StudentProject.objects.select_related('project')),
+            cohort_assignments_prefetch(),
+            'capstones',
+        )
+
     def retrieve(self, request, pk=None):
         """Handle GET requests for single item
 
@@ -52,10 +74,10 @@ class StudentViewSet(ModelViewSet):
 
         try:
             try:
-                student = NssUser.objects.get(pk=pk)
+                student = self.detail_queryset().get(pk=pk)
 
             except ValueError:
-                student = NssUser.objects.get(slack_handle=pk)
+                student = self.detail_queryset().get(slack_handle=pk)
 
             if request.auth.user == student.user or request.auth.user.is_staff:
                 serializer = StudentSerializer(student, context={'request': request})
@@ -167,6 +189,7 @@ class StudentViewSet(ModelViewSet):
         """
         cohort = self.request.query_params.get('cohort', None)
         lastname = self.request.query_params.get('lastname_like', None)
+        since = self.request.query_params.get('since', None)
 
         if lastname is not None:
             # Get students by last name and are not assigned to a cohort
@@ -179,67 +202,74 @@ class StudentViewSet(ModelViewSet):
                 'message': 'Student lists can only be requested by cohort'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        else:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT
-                        user_id AS id,
-                        github_handle,
-                        extra_data,
-                        student_name AS name,
-                        current_cohort AS cohort_name,
-                        current_cohort_id AS cohort_id,
-                        assessment_status_id,
-                        assessment_url,
-                        current_project_id AS project_id,
-                        current_project_index AS project_index,
-                        current_project_name AS project_name,
-                        current_book_id AS book_id,
-                        current_book_index AS book_index,
-                        current_book_name AS book_name,
-                        score,
-                        student_notes,
-                        student_tags,
-                        capstone_proposals,
-                        project_duration
-                    FROM
-                        get_cohort_student_data(%s)
-                """, [cohort])
-                columns = [col[0] for col in cursor.description]
-                results = cursor.fetchall()
-
-                logger = logging.getLogger("LearningPlatform")
-                logger.debug("Number of student records retrieved for cohort %s is %s", cohort, len(results))
-
-                students = []
-                for row in results:
-                    student = dict(zip(columns, row))
-                    student['current_cohort'] = {
-                        'id': student['cohort_id'],
-                        'name': student['cohort_name']
-                    }
-                    student['tags'] = json.loads(student['student_tags'])
-                    student['avatar'] = json.loads(student['extra_data'])["avatar_url"]
-                    student['notes'] = json.loads(student['student_notes'])
-                    student['proposals'] = json.loads(student['capstone_proposals'])
-                    students.append(student)
-
-                serializer = CohortStudentSerializer(data=students, many=True)
-
-                if serializer.is_valid():
-                    logger.debug("Serializer for students by cohort succeeded")
-                    return Response(serializer.data, status=status.HTTP_200_OK)
-                else:
-                    logger.debug("Serializer for students by cohort failed")
-                    logger.debug(serializer.errors)
-                    return Response(serializer.data, status=status.HTTP_200_OK)
-                    # return Response({'message': serializer.error_messages}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        logger = logging.getLogger("LearningPlatform")
+        cursor = CohortStudentSnapshot.sync_cursor()
+
+        if since is not None:
+            # Delta sync: only the students whose dashboard rows changed
+            try:
+                changed_after = CohortStudentSnapshot.changed_after(since)
+            except (ValueError, OverflowError):
+                return Response({
+                    'message': 'The `since` parameter must be a cursor returned by this resource'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            active_rows = CohortStudentSnapshot.objects.filter(
+                cohort_id=cohort,
+                student__user__is_active=True,
+                student__user__is_staff=False
+            )
+            changed_rows = active_rows \
+                .filter(updated_on__gt=changed_after) \
+                .select_related('cohort')
+
+            serializer = CohortStudentSerializer([row.as_cohort_student() for row in changed_rows], many=True)
+            return Response({
+                'cursor': cursor,
+                'students': serializer.data,
+                'student_ids': list(active_rows.values_list('student_id', flat=True)),
+            }, status=status.HTTP_200_OK)
+
+        if request.accepted_renderer.format == 'json':
+            # Passthrough mode: Postgres builds the response body, which is
+            # sent as-is without being parsed or serialized in Python
+            payload = CohortStudentSnapshot.cohort_json(cohort)
+
+            if payload == '[]' and CohortStudentSnapshot.cohort_has_members(cohort):
+                # Cohort has never been snapshotted, so build its rows now
+                logger.debug("Building dashboard snapshot for cohort %s", cohort)
+                CohortStudentSnapshot.refresh_for_cohort(cohort)
+                payload = CohortStudentSnapshot.cohort_json(cohort)
+
+            response = HttpResponse(payload, content_type='application/json', status=status.HTTP_200_OK)
+            response['X-Sync-Cursor'] = cursor
+            return response
+
+        snapshots = CohortStudentSnapshot.objects \
+            .filter(
+                cohort_id=cohort,
+                student__user__is_active=True,
+                student__user__is_staff=False
+            ) \
+            .select_related('cohort') \
+            .order_by(F('book_index').asc(nulls_last=True), F('project_index').asc(nulls_last=True))
+
+        rows = list(snapshots)
+
+        if not rows and CohortStudentSnapshot.cohort_has_members(cohort):
+            logger.debug("Building dashboard snapshot for cohort %s", cohort)
+            CohortStudentSnapshot.refresh_for_cohort(cohort)
+            rows = list(snapshots.all())
+
+        logger.debug("Number of student records retrieved for cohort %s is %s", cohort, len(rows))
+
+        serializer = CohortStudentSerializer([row.as_cohort_student() for row in rows], many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK, headers={'X-Sync-Cursor': cursor})
 
     @action(methods=['post', 'put'], detail=True)
     def assess(self, request, pk):
         """POST when a student starts working on book assessment. PUT to change status."""
 
-        slack = SlackAPI()
         logger = logging.getLogger("LearningPlatform")
 
         if request.method == "PUT":
@@ -253,18 +283,20 @@ class StudentViewSet(ModelViewSet):
 
                 try:
                     if latest_assessment.status.status == 'Ready for Review':
-                        slack.send_message(
+                        queue_slack_message(
                             text="🎉 Congratulations! You've completed your self-assessment. Your coaching team will review your work and provide feedback soon.",
                             channel=student.slack_handle
                         )
 
-                        slack.send_message(
-                            text=f'{student.full_name} in {student.current_cohort["name"]} has completed their self-assessment for {latest_assessment.assessment.name}.\n\nReview it at {latest_assessment.url}',
-                            channel=student.current_cohort["ic"]
+                        current_cohort = student.current_cohort
+                        queue_instructor_message(
+                            cohort_id=current_cohort["id"],
+                            text=f'{student.full_name} in {current_cohort["name"]} has completed their self-assessment for {latest_assessment.assessment.name}.\n\nReview it at {latest_assessment.url}',
+                            channel=current_cohort["ic"]
                         )
 
                     if latest_assessment.status.status == 'Reviewed and Complete':
-                        slack.send_message(
+                        queue_slack_message(
                             text=f':fox-yay-woo-hoo: Self-Assessment Review Complete\n\n\n:white_check_mark: Your coaching team just marked {latest_assessment.assessment.name} as completed.\n\nVisit https://learning.nss.team to view your latest messages and statuses.',
                             channel=latest_assessment.student.slack_handle
                         )
@@ -281,7 +313,7 @@ class StudentViewSet(ModelViewSet):
                                 LearningRecordEntry.objects.create(
                                     record=achieved_record,
                                     note=request.data.get("instructorNotes", ""),
-                                    instructor=NssUser.objects.get(user=request.auth.user)
+                                    instructor=get_identity(request).nss_user
                                 )
                             except IntegrityError as ex:
                                 logger.exception(getattr(ex, 'message', repr(ex)))
@@ -317,76 +349,35 @@ class StudentViewSet(ModelViewSet):
                 # Create the student assessment record
                 student_assessment = StudentAssessment()
                 student_assessment.student = student
-                student_assessment.instructor = NssUser.objects.get(user=request.auth.user)
+                student_assessment.instructor = get_identity(request).nss_user
                 student_assessment.status = StudentAssessmentStatus.objects.get(status="In Progress")
                 student_assessment.assessment = assessment
                 student_assessment.save()
 
-                gh_request = GithubRequest()
-                full_url = assessment.source_url
-
-                # Split the full URL on '/' and get the last two items
-                ( org, repo, ) = full_url.split('/')[-2:]
-
-                # Construct request body for creating the repository
+                # The repository and Slack messages are created by the provisioning worker
                 student_org_name = student.current_cohort["github_org"].split("/")[-1]
 
                 # Replace all spaces in the assessment name with hyphens
                 hyphenated_assessment_name = assessment.name.replace(" ", "-")
-                repo_name = f"{hyphenated_assessment_name}-{student.github_handle}"
-
-                request_body = {
-                    "owner": student_org_name,
-                    "name": repo_name,
-                    "description": f"This is your self-assessment repository for the {assessment.book.name} book",
-                    "include_all_branches": False,
-                    "private": False
-                }
-
-                # Create the repository
-                logger.debug("Generating repository for student assessment")
-                response = gh_request.post(url=f'https://api.github.com/repos/{org}/{repo}/generate',data=request_body)
-                logger.debug(response.json())
-
-                # Assign the student write permissions to the repository
-                logger.debug("Adding student as a collaborator to the repository")
-                request_body = { "permission":"write" }
-                response = gh_request.put(
-                    url=f'https://api.github.com/repos/{student_org_name}/{repo_name}/collaborators/{student.github_handle}',
-                    data=request_body
-                )
-
-                if response.status_code != 204:
-                    logger.debug("Error: Student was not added as a collaborator to the assessment repository")
-                    return Response(
-                        {
-                            'message': 'Error: Student was not added as a collaborator to the assessment repository.'
-                        },
-                        status=status.HTTP_502_BAD_GATEWAY
-                    )
 
-                # Send message to student
-                created_repo_url = f'https://github.com/{student_org_name}/{repo_name}'
-                slack.send_message(
-                    text=f"🐙 Your self-assessment repository has been created. Visit the URL below and clone the project to your machine.\n\n{created_repo_url}",
-                    channel=student.slack_handle
-                )
-
-                # Send message to instructors
-                slack_channel = student.assigned_cohorts.order_by("-id").first().cohort.slack_channel
-                slack.send_message(
-                    text=f"📝 {student.full_name} has started the self-assessment for {assessment.name}.",
-                    channel=slack_channel
+                instructor_cohort = student.assigned_cohorts.order_by("-id").first().cohort
+                job = ProvisioningJob.objects.create(
+                    kind=ProvisioningJob.ASSESSMENT,
+                    requested_by=student_assessment.instructor,
+                    payload={
+                        'student_assessment_id': student_assessment.id,
+                        'student_org_name': student_org_name,
+                        'repo_name': f"{hyphenated_assessment_name}-{student.github_handle}",
+                        'cohort_id': instructor_cohort.id,
+                        'instructor_channel': instructor_cohort.slack_channel,
+                    }
                 )
-
-                # Update the student assessment record with the Github repo URL
-                student_assessment.url = created_repo_url
-                student_assessment.save()
+                enqueue(job)
 
             except Exception as ex:
                 return Response({'message': ex.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            return Response({'message': 'Success'}, status=status.HTTP_201_CREATED)
+            return accepted(request, job)
 
     @method_decorator(is_instructor())
     @action(methods=['post'], detail=True)
@@ -432,8 +423,7 @@ class StudentViewSet(ModelViewSet):
         if request.method == "POST":
             try:
                 instructor_note = StudentNote()
-                instructor_note.coach = NssUser.objects.get(
-                    user=request.auth.user)
+                instructor_note.coach = get_identity(request).nss_user
                 instructor_note.student = NssUser.objects.get(pk=pk)
                 instructor_note.status = request.data["note"]
                 instructor_note.save()
@@ -462,30 +452,16 @@ class StudentViewSet(ModelViewSet):
             try:
                 student = NssUser.objects.get(pk=pk)
                 note = OneOnOneNote()
-                note.coach = NssUser.objects.get(user=request.auth.user)
+                note.coach = get_identity(request).nss_user
                 note.student = student
                 note.notes = request.data["notes"]
                 note.save()
 
                 # Send message to student
-                try:
-                    headers = {
-                        "Content-Type": "application/x-www-form-urlencoded"
-                    }
-                    channel_payload = {
-                        "text": request.data.get("text", "You just received feedback from one of your coaches.\n\nVisit https://learning.nss.team to view your messages."),
-                        "token": os.getenv("SLACK_BOT_TOKEN"),
-                        "channel": student.slack_handle
-                    }
-
-                    requests.post(
-                        "https://slack.com/api/chat.postMessage",
-                        data=channel_payload,
-                        headers=headers,
-                        timeout=1000
-                    )
-                except Exception:
-                    pass
+                queue_slack_message(
+                    text=request.data.get("text", "You just received feedback from one of your coaches.\n\nVisit https://learning.nss.team to view your messages."),
+                    channel=student.slack_handle
+                )
 
             except NssUser.DoesNotExist as ex:
                 return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
@@ -600,7 +576,11 @@ class CohortStudentSerializer(serializers.Serializer):
 
 
 class StudentSerializer(serializers.ModelSerializer):
-    """JSON serializer"""
+    """JSON serializer
+
+    Reads every relation through `.all()` so that a student loaded with
+    `StudentViewSet.detail_queryset()` serializes without further queries.
+    """
     feedback = StudentNoteSerializer(many=True)
     notes = InstructorNoteSerializer(many=True)
     name = serializers.SerializerMethodField()
@@ -610,7 +590,7 @@ class StudentSerializer(serializers.ModelSerializer):
     core_skill_records = serializers.SerializerMethodField()
 
     def get_project(self, obj):
-        project = StudentProject.objects.filter(student=obj).last()
+        project = max(obj.projects.all(), key=lambda p: p.id, default=None)
         if project is not None:
             return {
                 "id": project.project.id,
@@ -623,12 +603,11 @@ class StudentSerializer(serializers.ModelSerializer):
             }
 
     def get_records(self, obj):
-        records = LearningRecord.objects.filter(
-            student=obj).order_by("achieved")
+        records = sorted(obj.learning_records.all(), key=lambda r: r.achieved)
         return LearningRecordSerializer(records, many=True).data
 
     def get_core_skill_records(self, obj):
-        records = CoreSkillRecord.objects.filter(student=obj).order_by("pk")
+        records = sorted(obj.core_skills.all(), key=lambda r: r.pk)
         return CoreSkillRecordSerializer(records, many=True).data
 
     def get_name(self, obj):
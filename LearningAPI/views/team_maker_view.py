@@ -1,22 +1,19 @@
-import random, string, json, valkey
-
-from django.conf import settings
+import random, string
 
 from rest_framework import serializers, status
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from LearningAPI.models.people import StudentTeam, GroupProjectRepository, NSSUserTeam, Cohort
+from LearningAPI.identity import get_identity
+from LearningAPI.models.people import (StudentTeam, GroupProjectRepository, NSSUserTeam, Cohort,
+                                       ProvisioningJob)
 from LearningAPI.models.coursework import Project
-from LearningAPI.utils import GithubRequest, SlackAPI
-
+from LearningAPI.provisioning import enqueue
+from LearningAPI.slack_channels import SlackChannelService
+from LearningAPI.ticket_migration import refresh_status, request_ticket_migration
+from .provisioning_job_view import accepted
 
-valkey_client = valkey.Valkey(
-    host=settings.VALKEY_CONFIG['HOST'],
-    port=settings.VALKEY_CONFIG['PORT'],
-    db=settings.VALKEY_CONFIG['DB'],
-)
 
 class TeamRepoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,7 +30,7 @@ class StudentTeamSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudentTeam
-        fields = ( 'id', 'group_name', 'cohort', 'sprint_team', 'students', 'repositories' )
+        fields = ( 'id', 'group_name', 'cohort', 'sprint_team', 'students', 'repositories', 'migration_status' )
 
 
 class TeamMakerView(ViewSet):
@@ -54,135 +51,57 @@ class TeamMakerView(ViewSet):
         """Handle POST operations
 
         Returns:
-            Response -- JSON serialized instance
+            Response -- 202 with the provisioning job and the new team
         """
         cohort_id = request.data.get('cohort', None)
         student_list = request.data.get('students', None)
         group_project_id = request.data.get('groupProject', None)
         team_prefix = request.data.get('weeklyPrefix', None)
 
-        issue_target_repos = []
-
         # Create the student team in the database
         cohort = Cohort.objects.get(pk=cohort_id)
         team = StudentTeam()
         team.group_name = ""
         team.cohort = cohort
         team.sprint_team = group_project_id is not None
+        team.save()
 
-        # Create the Slack channel and add students to it and store the channel ID in the team
-        # The cohort name will always end in a number. Split on the space and get the last item
-        slack = SlackAPI()
+        # Assign the students to the team
+        NSSUserTeam.objects.bulk_create([
+            NSSUserTeam(student_id=student, team=team) for student in student_list
+        ])
+
+        # The Slack channel, repositories and announcements are created by the
+        # provisioning worker. The cohort name will always end in a number.
+        # Split on the space and get the last item
         random_team_suffix = ''.join(random.choice(string.ascii_lowercase) for i in range(6))
         channel_name = f"{team_prefix}-{cohort.name.split(' ')[-1]}-{random_team_suffix}"
-        # Lowercase the channel name
-        channel_name = channel_name.lower()
-        try:
-            team.slack_channel = slack.create_channel(channel_name, student_list)
-        except Exception as ex:
-            return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        team.save()
 
-        # Assign the students to the team. Use a for loop with enumerate to get the index of the student
-        for student in student_list:
-            student_team = NSSUserTeam()
-            student_team.student_id = student
-            student_team.team = team
-            student_team.save()
+        payload = {
+            'team_id': team.id,
+            'channel_name': channel_name.lower(),
+            'student_ids': student_list,
+            'project_id': group_project_id,
+        }
 
-        # Create group project repository if group project is not None
         if group_project_id is not None:
             project = Project.objects.get(pk=group_project_id)
 
-            # Get student Github organization name
-            student_org_name = cohort.info.student_organization_url.split("/")[-1]
-
-            # Replace all spaces in the assessment name with hyphens
+            # Replace all spaces in the project name with hyphens
             random_suffix = ''.join(random.choice(string.ascii_lowercase) for i in range(6))
-            repo_name = f'{project.name.replace(" ", "-")}-client-{random_suffix}'
-
-            # Create the client repository for the group project
-            gh_request = GithubRequest()
-
-            response = gh_request.create_repository(
-                source_url=project.client_template_url,
-                student_org_url=cohort.info.student_organization_url,
-                repo_name=repo_name,
-                project_name=project.name
-            )
-
-            if response.status_code != 201:
-                return Response({'message': 'Failed to create repository'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            # Grant write permissions to the students
-            for student in team.students.all(): # pylint: disable=E1101
-                gh_request.assign_student_permissions(
-                    student_org_name=student_org_name,
-                    repo_name=repo_name,
-                    student=student
-                )
-
-            # Save the team's client-side repository URL to the database
-            group_project_repo = GroupProjectRepository()
-            group_project_repo.team_id = team.id
-            group_project_repo.project = project
-            group_project_repo.repository = f'https://github.com/{student_org_name}/{repo_name}'
-            group_project_repo.save()
-
-            issue_target_repos.append(f'{student_org_name}/{repo_name}')
-
-            # Send message to project team's Slack channel with the repository URL
-            created_repo_url = f'https://github.com/{student_org_name}/{repo_name}'
-            slack.send_message(
-                text=f"🐙 Your client repository has been created. Visit the URL below and clone the project to your machine.\n\n{created_repo_url}",
-                channel=team.slack_channel
-            )
-
-            # Create the API repository for the group project if it exists
-            if project.api_template_url:
-                api_repo_name = f'{project.name.replace(" ", "-")}-api-{random_suffix}'
-
-                gh_request.create_repository(
-                    source_url=project.api_template_url,
-                    student_org_url=cohort.info.student_organization_url,
-                    repo_name=api_repo_name,
-                    project_name=project.name
-                )
-
-                # Grant write permissions to the students
-                for student in team.students.all():
-                    gh_request.assign_student_permissions(
-                        student_org_name=student_org_name,
-                        repo_name=api_repo_name,
-                        student=student
-                    )
-
-                # Save the team's API repository URL to the database
-                group_project_repo = GroupProjectRepository()
-                group_project_repo.team_id = team.id
-                group_project_repo.project = project
-                group_project_repo.repository = f'https://github.com/{student_org_name}/{api_repo_name}'
-                group_project_repo.save()
-
-                # Send message to project team's Slack channel with the repository URL
-                created_repo_url = f'https://github.com/{student_org_name}/{api_repo_name}'
-                slack.send_message(
-                    text=f"🐙 Your API repository has been created. Visit the URL below and clone the project to your machine.\n\n{created_repo_url}",
-                    channel=team.slack_channel
-                )
+            payload['client_repo_name'] = f'{project.name.replace(" ", "-")}-client-{random_suffix}'
+            payload['api_repo_name'] = f'{project.name.replace(" ", "-")}-api-{random_suffix}'
 
-            # Publish message to Valkey for ticket migration
-            self.publish_ticket_migration_message(
-                notification_channel=cohort.slack_channel,
-                source_repo="/".join(project.client_template_url.split('/')[-2:]),
-                target_repositories=issue_target_repos
-            )
+        job = ProvisioningJob.objects.create(
+            kind=ProvisioningJob.TEAM,
+            payload=payload,
+            requested_by=get_identity(request).nss_user
+        )
+        enqueue(job)
 
         serialized_team = StudentTeamSerializer(team, many=False).data
 
-        # Publish a message to the channel_migrate_issue_tickets channel on redis to start migrating tickets
-
-        return Response(serialized_team, status=status.HTTP_201_CREATED)
+        return accepted(request, job, team=serialized_team)
 
     @action(detail=False, methods=['delete'])
     def reset(self, request):
@@ -207,42 +126,14 @@ class TeamMakerView(ViewSet):
         StudentTeam.objects.filter(cohort=cohort).delete()
 
     def _delete_slack_channels(self, cohort):
-        current_teams = StudentTeam.objects.filter(cohort=cohort)
-
-        for team in current_teams:
-            slack = SlackAPI()
-            slack.delete_channel(team.slack_channel)
-
-    def publish_ticket_migration_message(self, notification_channel, source_repo, target_repositories):
-        """
-        Publish a message to Valkey for ticket migration.
-
-        Args:
-            notification_channel (str): The Slack channel to notify about the migration
-            source_repo (str): The source repository in format 'owner/repo'
-            target_repositories (list): List of target repositories in format 'owner/repo'
-
-        Returns:
-            bool: True if successful, False otherwise
-        """
-        try:
-            message = json.dumps({
-                'notification_channel': notification_channel,
-                'source_repo': source_repo,
-                'all_target_repositories': target_repositories
-            })
-            valkey_client.publish('channel_migrate_issue_tickets', message)
-            return True
-        except Exception as ex:
-            # Log the error
-            print(f"Error publishing to Valkey: {str(ex)}")
-            return False
+        channels = StudentTeam.objects.filter(cohort=cohort).values_list('slack_channel', flat=True)
+        SlackChannelService().archive_channels(channels)
 
     @action(detail=True, methods=['post'])
     def migrate(self, request, pk=None):
         """
         Endpoint to trigger ticket migration for an existing team.
-        This only publishes the message to Valkey and doesn't create any new resources.
+        This adds an entry to the ticket migration stream and doesn't create any new resources.
 
         Args:
             request: The HTTP request
@@ -278,22 +169,25 @@ class TeamMakerView(ViewSet):
             # Get the source repository
             source_repo = "/".join(project.client_template_url.split('/')[-2:])
 
-            # Publish the message to Valkey
-            success = self.publish_ticket_migration_message(
+            # Add the request to the ticket migration stream, unless one is already
+            # pending or done. ?force=true migrates a team again.
+            requested = request_ticket_migration(
+                team,
                 notification_channel=cohort.slack_channel,
                 source_repo=source_repo,
-                target_repositories=issue_target_repos
+                target_repositories=issue_target_repos,
+                force=request.query_params.get('force') == 'true'
             )
 
-            if success:
+            if requested:
                 return Response(
-                    {'message': 'Ticket migration initiated successfully'},
-                    status=status.HTTP_200_OK
+                    {'message': 'Ticket migration initiated successfully', **migration_data(team)},
+                    status=status.HTTP_202_ACCEPTED
                 )
             else:
                 return Response(
-                    {'message': 'Failed to initiate ticket migration'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    {'message': f'Ticket migration is already {team.migration_status}', **migration_data(team)},
+                    status=status.HTTP_200_OK
                 )
 
         except StudentTeam.DoesNotExist:
@@ -306,7 +200,26 @@ class TeamMakerView(ViewSet):
                 {'message': str(ex)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        except Exception as ex:
-            # Log the error
-            print(f"Error publishing to Valkey: {str(ex)}")
-            return False
+
+    @action(detail=True, methods=['get'])
+    def migration(self, request, pk=None):
+        """Status of the team's most recent ticket migration request"""
+        try:
+            team = StudentTeam.objects.get(pk=pk)
+        except StudentTeam.DoesNotExist:
+            return Response({'message': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if team.migration_message_id is None:
+            return Response({'message': 'Tickets have not been migrated for this team'}, status=status.HTTP_404_NOT_FOUND)
+
+        refresh_status(team)
+        return Response(migration_data(team), status=status.HTTP_200_OK)
+
+
+def migration_data(team):
+    return {
+        'team': team.id,
+        'message_id': team.migration_message_id,
+        'status': team.migration_status,
+        'requested_on': team.migration_requested_on,
+    }
@@ -0,0 +1,18 @@
+"""
+ASGI config for LearningPlatform project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Only the streaming endpoints are routed to it in production; everything else
+stays on the WSGI workers.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "LearningPlatform.settings")
+
+application = get_asgi_application()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 import structlog
 import logging.config
@@ -75,6 +76,7 @@ CORS_ORIGIN_WHITELIST = (
 
 CORS_EXPOSE_HEADERS = (
     'Location',
+    'X-Sync-Cursor',
 )
 
 MIDDLEWARE = [
@@ -90,7 +92,7 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'LearningAPI.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -149,10 +151,28 @@ DATABASES = {
     }
 }
 
+# `manage.py test` gets a Valkey database of its own, so tests that clear
+# keys never touch the queues and caches of a running instance
+VALKEY_TEST_DB = os.getenv("VALKEY_TEST_DB", 15)
+TESTING = sys.argv[1:2] == ['test']
+
 VALKEY_CONFIG = {
     'HOST': os.getenv("VALKEY_HOST","localhost"),
     'PORT': os.getenv("VALKEY_PORT", 6379),
-    'DB': os.getenv("VALKEY_DB", 0),
+    'DB': VALKEY_TEST_DB if TESTING else os.getenv("VALKEY_DB", 0),
+}
+
+GITHUB_CONFIG = {
+    'API_URL': os.getenv("GITHUB_API_URL", "https://api.github.com"),
+    'TOKEN': os.getenv("GITHUB_TOKEN"),
+    # Requests left in the hourly quota that are kept back for interactive use
+    'RESERVE': int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", 50)),
+    # Requests GithubClient.batch keeps in flight at once
+    'CONCURRENCY': int(os.getenv("GITHUB_CONCURRENCY", 8)),
+    # Seconds a GET response and its ETag are kept for conditional requests
+    'ETAG_TTL': int(os.getenv("GITHUB_ETAG_TTL", 86400)),
+    # Shared secret GitHub signs webhook deliveries with. Unset rejects every delivery.
+    'WEBHOOK_SECRET': os.getenv("GITHUB_WEBHOOK_SECRET"),
 }
 
 # Password validation
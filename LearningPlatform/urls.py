@@ -51,12 +51,18 @@ router.register(r'teams', views.TeamMakerView, 'team_maker')
 router.register(r'timelines', views.TimelineView, 'timeline')
 router.register(r'weights', views.LearningWeightViewSet, 'weight')
 router.register(r'foundations', views.FoundationsViewSet, 'foundation')
+router.register(r'jobs', views.ProvisioningJobViewSet, 'job')
 
 
 urlpatterns = [
+    path('cohorts/<int:cohort_id>/stream', views.cohort_event_stream, name='cohort-stream'),
+    path('cohorts/<int:cohort_id>/stream/ticket', views.stream_ticket, name='cohort-stream-ticket'),
     path('', include(router.urls)),
     path('records/entries/<int:entry_id>', views.LearningRecordViewSet.as_view({'delete': 'entries'}), name="entries"),
     path('queries/popular', views.popular_queries, name='popular-queries'),
+    path('github/status', views.github_status, name='github-status'),
+    path('github/webhook', views.github_webhook, name='github-webhook'),
+    path('exports/<str:dataset>.<str:file_format>', views.export_dataset, name='export'),
 
     path('accounts', views.register_user),
     path('notify', views.notify, name='notify'),
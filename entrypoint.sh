@@ -1,7 +1,11 @@
 #!/bin/sh
 
-python manage.py makemigrations
-python manage.py migrate
-python manage.py collectstatic
+# Every service runs this image with its own command. Only the API host
+# sets MIGRATE_ON_START, so the workers never migrate concurrently at boot.
+if [ "$MIGRATE_ON_START" = "1" ]; then
+    python manage.py makemigrations
+    python manage.py migrate
+    python manage.py collectstatic --noinput
+fi
 
-exec gunicorn -w 3 -b 0.0.0.0:8000 LearningPlatform.wsgi
+exec "$@"